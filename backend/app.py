@@ -1,7 +1,12 @@
 from flask import Flask
+import db
 from schema import init_schema
 from config import get_config
 from routes import register_blueprints
+from cli import register_commands
+from services import (
+    render_cache, project_store, media_store, media_send, search_cache, media_variants, tile_pyramid, metrics, profiler,
+)
 
 
 def create_app():
@@ -11,11 +16,38 @@ def create_app():
     app = Flask(__name__)
     app.config.from_object(config)
     
+    # Share one pooled connection per request
+    db.init_app(app)
+
+    # Size the rendered markdown cache
+    render_cache.init_app(app)
+
+    # Size the project lookup cache
+    project_store.init_app(app)
+
+    # Size the media name cache and choose how media bytes are sent
+    media_store.init_app(app)
+    media_send.init_app(app)
+
+    # Size the search results cache
+    search_cache.init_app(app)
+    media_variants.init_app(app)
+    tile_pyramid.init_app(app)
+
+    # Time every request for the admin dashboard and /metrics
+    metrics.init_app(app)
+
+    # Sample stacks of opted-in requests and keep profiles of slow ones
+    profiler.init_app(app)
+
     # Initialize database schema
     init_schema()
     
     # Register all blueprints
     register_blueprints(app)
+
+    # Register maintenance CLI commands
+    register_commands(app)
     
     return app
 
@@ -0,0 +1 @@
+"""Load and performance tools. Run from backend/, e.g. `python -m bench.stress`."""
@@ -0,0 +1,173 @@
+"""
+Benchmark the hot routes against a generated world.
+
+Generates a deterministic world in a scratch directory, then drives the
+Flask test client against article_view, project_home, /api/search,
+/api/articles and the media listings. Reports p50/p95/p99 latency and
+queries per request, and writes JSON results for diffing between
+versions:
+
+    python -m bench.run --articles 5000 --requests 200 --output before.json
+
+Queries are the statements the app executed through db's TracedCursor,
+so SQLite's own internal statements, such as FTS5 shadow-table reads,
+are not counted.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import platform
+import random
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+
+def _percentile(sorted_values: list[float], pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, round(pct / 100 * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def _scenarios(conn: sqlite3.Connection, rng: random.Random) -> dict[str, list[str]]:
+    """Build the URL list for every scenario from what the generator created."""
+    projects = [r["slug"] for r in conn.execute("SELECT slug FROM projects ORDER BY id;")]
+    articles = [
+        f"/projects/{r['slug']}/a/{r['id']}"
+        for r in conn.execute("SELECT a.id, p.slug FROM articles a JOIN projects p ON a.project_id = p.id;")
+    ]
+    titles = [r["title"] for r in conn.execute("SELECT title FROM articles ORDER BY id LIMIT 500;")]
+    terms = [t.split()[0][: rng.randint(3, 6)] for t in titles] + ["dragon", "empire", "river crown"]
+
+    return {
+        "article_view": articles,
+        "project_home": [f"/projects/{slug}" for slug in projects],
+        "search": [f"/api/search?q={term}" for term in terms],
+        "api_articles_page": [f"/projects/{slug}/api/articles?limit=100" for slug in projects],
+        "api_articles_full": [f"/projects/{slug}/api/articles" for slug in projects],
+        "media_page": [f"/projects/{slug}/media" for slug in projects],
+        "api_media": [f"/projects/{slug}/api/media" for slug in projects],
+    }
+
+
+def _run_scenario(client, urls: list[str], rng: random.Random, requests: int, warmup: int) -> dict:
+    import db
+
+    for _ in range(warmup):
+        client.get(rng.choice(urls)).close()
+
+    latencies, queries, errors = [], [], 0
+    for _ in range(requests):
+        url = rng.choice(urls)
+        queries_before = db.thread_query_count()
+        started = time.perf_counter()
+        response = client.get(url)
+        response.get_data()
+        latencies.append((time.perf_counter() - started) * 1000)
+        queries.append(db.thread_query_count() - queries_before)
+        if response.status_code != 200:
+            errors += 1
+        response.close()
+
+    latencies.sort()
+    return {
+        "requests": requests,
+        "errors": errors,
+        "p50_ms": round(_percentile(latencies, 50), 3),
+        "p95_ms": round(_percentile(latencies, 95), 3),
+        "p99_ms": round(_percentile(latencies, 99), 3),
+        "mean_ms": round(statistics.fmean(latencies), 3),
+        "queries_per_request": round(statistics.fmean(queries), 2),
+    }
+
+
+def _git_revision(path: str) -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=path, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--projects", type=int, default=1)
+    parser.add_argument("--articles", type=int, default=2000, help="Articles per project.")
+    parser.add_argument("--depth", type=int, default=3, help="Folder tree depth.")
+    parser.add_argument("--fanout", type=int, default=4, help="Subfolders per folder.")
+    parser.add_argument("--media", type=int, default=50, help="Media files per project.")
+    parser.add_argument("--links", type=int, default=3, help="Max article links per section.")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--requests", type=int, default=200, help="Measured requests per scenario.")
+    parser.add_argument("--warmup", type=int, default=20, help="Unmeasured requests per scenario.")
+    parser.add_argument("--only", action="append", help="Run only this scenario (repeatable).")
+    parser.add_argument("--output", help="Write JSON results to this file.")
+    args = parser.parse_args(argv)
+
+    output = os.path.abspath(args.output) if args.output else None
+    backend_dir = os.getcwd()
+    # All data paths are relative to the working directory, so run in a scratch one
+    os.chdir(tempfile.mkdtemp(prefix="mythdb-bench-"))
+    sys.path.insert(0, backend_dir)
+
+    import db
+    from app import app
+    from bench.worldgen import generate_world
+    from db import db_conn
+
+    if not db.TRACE_QUERIES:
+        parser.error("queries are counted from the SQL trace; enable SQL_TRACE in the config")
+
+    started = time.perf_counter()
+    generate_world(
+        projects=args.projects, articles=args.articles, depth=args.depth, fanout=args.fanout,
+        media=args.media, links=args.links, seed=args.seed,
+    )
+    generation_s = time.perf_counter() - started
+
+    rng = random.Random(args.seed)
+    with db_conn() as conn:
+        scenarios = _scenarios(conn, rng)
+
+    client = app.test_client()
+    results = {}
+    for name, urls in scenarios.items():
+        if args.only and name not in args.only:
+            continue
+        results[name] = _run_scenario(client, urls, rng, args.requests, args.warmup)
+
+    report = {
+        "timestamp": datetime.now(tz=timezone.utc).isoformat(),
+        "revision": _git_revision(backend_dir),
+        "python": platform.python_version(),
+        "sqlite": sqlite3.sqlite_version,
+        "world": {k: getattr(args, k) for k in ("projects", "articles", "depth", "fanout", "media", "links", "seed")},
+        "generation_seconds": round(generation_s, 2),
+        "scenarios": results,
+    }
+
+    print(f"{'scenario':<20}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'queries':>10}{'errors':>8}")
+    for name, r in results.items():
+        print(
+            f"{name:<20}{r['p50_ms']:>10.2f}{r['p95_ms']:>10.2f}{r['p99_ms']:>10.2f}"
+            f"{r['queries_per_request']:>10.1f}{r['errors']:>8}"
+        )
+
+    if output:
+        with open(output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"Results written to {output}")
+    return 1 if any(r["errors"] for r in results.values()) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
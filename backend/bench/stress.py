@@ -0,0 +1,91 @@
+"""
+Concurrency stress test for the SQLite connection profile.
+
+Runs writer threads calling update_article_content and reader threads
+requesting article_view against a scratch database, then reports
+throughput and fails (exit code 1) on any "database is locked" error:
+
+    python -m bench.stress --writers 8 --readers 8 --seconds 10
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--writers", type=int, default=8, help="Threads saving article bodies.")
+    parser.add_argument("--readers", type=int, default=8, help="Threads rendering article pages.")
+    parser.add_argument("--seconds", type=float, default=10.0, help="How long to run.")
+    parser.add_argument("--articles", type=int, default=200, help="Articles in the scratch project.")
+    args = parser.parse_args(argv)
+
+    # All data paths are relative to the working directory, so run in a scratch one
+    backend_dir = os.getcwd()
+    os.chdir(tempfile.mkdtemp(prefix="mythdb-stress-"))
+    sys.path.insert(0, backend_dir)
+
+    from app import app
+    from services.article_store import create_article, update_article_content
+    from services.project_store import add_project
+
+    project = add_project("Stress World", "Benchmark")
+    article_ids = [
+        create_article(project_id=project["id"], folder_id=None, type_key="generic", title=f"Article {i}")["id"]
+        for i in range(args.articles)
+    ]
+
+    counts = {"writes": 0, "reads": 0, "lock_errors": 0, "other_errors": 0}
+    counts_lock = threading.Lock()
+    deadline = time.monotonic() + args.seconds
+
+    def record(key: str) -> None:
+        with counts_lock:
+            counts[key] += 1
+
+    def writer() -> None:
+        rng = random.Random()
+        while time.monotonic() < deadline:
+            try:
+                body = " ".join(f"word{rng.randrange(1000)}" for _ in range(200))
+                update_article_content(rng.choice(article_ids), body)
+                record("writes")
+            except sqlite3.OperationalError as e:
+                record("lock_errors" if "locked" in str(e) or "busy" in str(e) else "other_errors")
+
+    def reader() -> None:
+        rng = random.Random()
+        client = app.test_client()
+        while time.monotonic() < deadline:
+            try:
+                response = client.get(f"/projects/{project['slug']}/a/{rng.choice(article_ids)}")
+                record("reads" if response.status_code == 200 else "other_errors")
+            except sqlite3.OperationalError as e:
+                record("lock_errors" if "locked" in str(e) or "busy" in str(e) else "other_errors")
+
+    threads = [threading.Thread(target=writer) for _ in range(args.writers)]
+    threads += [threading.Thread(target=reader) for _ in range(args.readers)]
+    started = time.monotonic()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.monotonic() - started
+
+    print(f"writes:       {counts['writes']} ({counts['writes'] / elapsed:.1f}/s)")
+    print(f"reads:        {counts['reads']} ({counts['reads'] / elapsed:.1f}/s)")
+    print(f"lock errors:  {counts['lock_errors']}")
+    print(f"other errors: {counts['other_errors']}")
+    return 1 if counts["lock_errors"] or counts["other_errors"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
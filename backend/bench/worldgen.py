@@ -0,0 +1,226 @@
+"""
+Deterministic synthetic world generator for benchmarks.
+
+Creates projects with a folder tree of configurable depth and fanout,
+articles with realistic markdown (headings, lists, tables, images and
+article: cross-links), filled-in prompt values and small PNG media files.
+The same seed always produces the same world.
+
+Must run inside a configured app (see bench.run), e.g.:
+
+    from bench.worldgen import generate_world
+    generate_world(projects=1, articles=5000, seed=42)
+"""
+
+from __future__ import annotations
+
+import io
+import random
+import struct
+import zlib
+from datetime import datetime, timedelta, timezone
+from typing import Any
+
+from db import db_conn
+from services.article_store import slugify, text_columns
+from services.folder_store import slugify as folder_slugify
+from services.fuzzy_index import index_terms, normalize_term
+from services.media_store import add_media
+from services.project_store import add_project, invalidate_project_cache
+
+_SYLLABLES = [
+    "ash", "fal", "qel", "thar", "an", "mor", "wyn", "dral", "eth", "kor", "vel", "zan",
+    "ith", "ul", "gor", "sil", "bra", "nym", "tor", "el", "dun", "ris", "ka", "lor",
+]
+_WORDS = (
+    "the of and to in a is was for on that with as by at from his her their ancient old "
+    "empire kingdom river mountain city village war peace king queen lord lady priest "
+    "temple god spirit dragon sword shield tower gate wall road forest sea island storm "
+    "fire ash iron gold silver blood oath exile rebellion council trade guild army fleet "
+    "legend prophecy ruin crown throne border harvest winter summer night dawn"
+).split()
+_GENRES = ["Fantasy", "Science Fiction", "Horror", "Steampunk", "Mythic"]
+_HEADINGS = ["History", "Geography", "Culture", "Notable Figures", "Conflicts", "Trivia"]
+
+# Fixed epoch so timestamps (and therefore render cache keys) are reproducible
+_EPOCH = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+
+def _name(rng: random.Random, syllables: int = 3) -> str:
+    return "".join(rng.choice(_SYLLABLES) for _ in range(rng.randint(2, syllables))).capitalize()
+
+
+def _sentence(rng: random.Random) -> str:
+    words = [rng.choice(_WORDS) for _ in range(rng.randint(8, 20))]
+    return " ".join(words).capitalize() + "."
+
+
+def _png_bytes(width: int, height: int, rgb: tuple[int, int, int]) -> bytes:
+    """A valid solid-colour PNG, so media tooling sees real images."""
+    def chunk(kind: bytes, data: bytes) -> bytes:
+        return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data))
+
+    row = b"\x00" + bytes(rgb) * width
+    return (
+        b"\x89PNG\r\n\x1a\n"
+        + chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0))
+        + chunk(b"IDAT", zlib.compress(row * height))
+        + chunk(b"IEND", b"")
+    )
+
+
+def _body(rng: random.Random, title: str, link_targets: list[tuple[str, str]], media: list[str], links: int) -> str:
+    parts = [f"# {title}", "", " ".join(_sentence(rng) for _ in range(rng.randint(2, 5))), ""]
+    for heading in rng.sample(_HEADINGS, rng.randint(1, 4)):
+        parts += [f"## {heading}", ""]
+        paragraph = [_sentence(rng) for _ in range(rng.randint(3, 8))]
+        for _ in range(rng.randint(0, links)):
+            if link_targets:
+                link_title, link_slug = rng.choice(link_targets)
+                paragraph.insert(rng.randrange(len(paragraph) + 1), f"See [{link_title}](article:{link_slug}).")
+        parts += [" ".join(paragraph), ""]
+        if rng.random() < 0.3:
+            parts += [f"- **{_name(rng)}**: {_sentence(rng)}" for _ in range(rng.randint(2, 5))] + [""]
+        if rng.random() < 0.15:
+            parts += ["| Name | Role |", "| --- | --- |"]
+            parts += [f"| {_name(rng)} | {rng.choice(_WORDS)} |" for _ in range(rng.randint(2, 5))] + [""]
+        if media and rng.random() < 0.2:
+            parts += [f"![{rng.choice(_WORDS)}](media/{rng.choice(media)})", ""]
+    return "\n".join(parts)
+
+
+def _generate_folders(conn, rng: random.Random, project_id: int, depth: int, fanout: int, now: str) -> list[int]:
+    folder_ids: list[int] = []
+    level: list[int | None] = [None]
+    for _ in range(depth):
+        next_level: list[int | None] = []
+        for parent_id in level:
+            taken: set[str] = set()
+            for _ in range(fanout):
+                name = _name(rng)
+                slug = folder_slugify(name)
+                while slug in taken:
+                    name += " " + _name(rng, 2)
+                    slug = folder_slugify(name)
+                taken.add(slug)
+                cursor = conn.execute(
+                    "INSERT INTO folders (project_id, parent_id, name, slug, created_at) VALUES (?, ?, ?, ?, ?);",
+                    (project_id, parent_id, name, slug, now),
+                )
+                folder_ids.append(cursor.lastrowid)
+                index_terms(conn, "folder", [(cursor.lastrowid, project_id, name)])
+                next_level.append(cursor.lastrowid)
+        level = next_level
+    return folder_ids
+
+
+def _generate_prompt_values(conn, rng: random.Random, project_id: int, now: str) -> None:
+    by_type: dict[str, list[int]] = {}
+    for r in conn.execute(
+        "SELECT a.id, t.key FROM articles a JOIN article_types t ON a.type_id = t.id WHERE a.project_id = ?;",
+        (project_id,),
+    ):
+        by_type.setdefault(r["key"], []).append(r["id"])
+
+    prompts = conn.execute(
+        "SELECT p.id, p.type, p.linked_style_key, t.key AS type_key FROM prompts p "
+        "JOIN article_types t ON p.article_type_id = t.id;"
+    ).fetchall()
+
+    rows = []
+    for prompt in prompts:
+        for article_id in by_type.get(prompt["type_key"], []):
+            value, linked_id = None, None
+            if prompt["type"] == "select" and prompt["linked_style_key"]:
+                candidates = by_type.get(prompt["linked_style_key"])
+                if candidates and rng.random() < 0.8:
+                    linked_id = rng.choice(candidates)
+            elif rng.random() < 0.8:
+                value = f"{rng.randint(1, 900)} {rng.choice(_WORDS)}"
+            rows.append((article_id, prompt["id"], value, linked_id, now, now))
+
+    conn.executemany(
+        """
+        INSERT OR IGNORE INTO prompt_values
+        (article_id, prompt_id, value, linked_article_id, created_at, updated_at)
+        VALUES (?, ?, ?, ?, ?, ?);
+        """,
+        rows,
+    )
+
+
+def generate_world(
+    *,
+    projects: int = 1,
+    articles: int = 1000,
+    depth: int = 3,
+    fanout: int = 4,
+    media: int = 20,
+    links: int = 3,
+    seed: int = 42,
+) -> list[dict[str, Any]]:
+    """
+    Generate `projects` projects with `articles` articles each.
+
+    Folders form a tree `depth` levels deep with `fanout` children per
+    folder; articles are spread over the root and all folders. Each
+    section of an article gets up to `links` article: cross-links.
+    Returns the created project rows.
+    """
+    rng = random.Random(seed)
+    created = []
+
+    for p in range(projects):
+        project = add_project(f"{_name(rng)} {p + 1}", rng.choice(_GENRES))
+        project_id = int(project["id"])
+
+        media_files = []
+        with db_conn() as conn:
+            for i in range(media):
+                png = _png_bytes(64, 48, (rng.randrange(256), rng.randrange(256), rng.randrange(256)))
+                media_files.append(add_media(conn, project_id, f"{slugify(_name(rng))}-{i}.png", io.BytesIO(png)))
+
+        with db_conn() as conn:
+            now = _EPOCH.isoformat()
+            folder_ids: list[int | None] = [None, *_generate_folders(conn, rng, project_id, depth, fanout, now)]
+            type_ids = {r["key"]: r["id"] for r in conn.execute("SELECT id, key FROM article_types;")}
+            type_keys = sorted(type_ids)
+
+            taken: set[str] = set()
+            titles: list[tuple[str, str]] = []
+            for i in range(articles):
+                title = f"{_name(rng)} {_name(rng, 2)}"
+                slug = slugify(title)
+                if slug in taken:
+                    title, slug = f"{title} {i}", f"{slug}-{i}"
+                taken.add(slug)
+                titles.append((title, slug))
+
+            batch = []
+            for i, (title, slug) in enumerate(titles):
+                body = _body(rng, title, titles, media_files, links)
+                stamp = (_EPOCH + timedelta(minutes=i)).isoformat()
+                batch.append((
+                    project_id, rng.choice(folder_ids), type_ids[rng.choice(type_keys)], slug, title,
+                    normalize_term(title), body,
+                    *text_columns(body), stamp, stamp,
+                ))
+            conn.executemany(
+                """
+                INSERT INTO articles (project_id, folder_id, type_id, slug, title, title_norm, body_content,
+                                      body_text, word_count, char_count,
+                                      created_at, updated_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?);
+                """,
+                batch,
+            )
+            index_terms(
+                conn, "article",
+                conn.execute("SELECT id, project_id, title FROM articles WHERE project_id = ?;", (project_id,)).fetchall(),
+            )
+            _generate_prompt_values(conn, rng, project_id, now)
+
+        invalidate_project_cache(project_id)
+        created.append(project)
+
+    return created
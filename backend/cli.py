@@ -0,0 +1,101 @@
+"""Maintenance commands, available through `flask --app app <command>`."""
+
+from pathlib import Path
+
+import click
+
+from db import db_conn
+from services.exporter import export_project_zip, parse_since
+from services.fuzzy_index import rebuild_fuzzy_index
+from services.importer import import_markdown
+from services.blob_store import prune_blobs
+from services.media_store import reconcile_media, referenced_blobs
+from services.project_fs import get_content_root
+from services.project_store import get_project_by_slug, load_projects
+from services.search_index import rebuild_search_index
+
+
+def register_commands(app):
+    """Register all CLI commands with the Flask app."""
+
+    @app.cli.command("rebuild-search-index")
+    def rebuild_search_index_command():
+        """Rebuild the full-text search index from the articles and projects tables."""
+        rebuild_search_index()
+        click.echo("Search index rebuilt.")
+
+    @app.cli.command("rebuild-fuzzy-index")
+    def rebuild_fuzzy_index_command():
+        """Rebuild the trigram index of article titles, folder names and media filenames."""
+        with db_conn() as conn:
+            rebuild_fuzzy_index(conn, conn.execute("SELECT project_id, filename FROM media;").fetchall())
+        click.echo("Fuzzy index rebuilt.")
+
+    @app.cli.command("reconcile-media")
+    @click.argument("project_slug", required=False)
+    def reconcile_media_command(project_slug):
+        """Adopt files dropped into media folders and drop rows whose blob is missing (all projects, or one).
+
+        Reconciling every project also deletes blobs no media row refers to.
+        """
+        if project_slug:
+            project = get_project_by_slug(project_slug)
+            if not project:
+                raise click.ClickException(f"Project '{project_slug}' not found.")
+            projects = [project]
+        else:
+            projects = load_projects()
+        for project in projects:
+            counts = reconcile_media(project)
+            click.echo(
+                f"{project['slug']}: {counts['added']} added, {counts['updated']} updated, {counts['removed']} removed."
+            )
+        if not project_slug:
+            click.echo(f"{prune_blobs(referenced_blobs())} unreferenced blob(s) deleted.")
+
+    @app.cli.command("import-markdown")
+    @click.argument("project_slug")
+    @click.argument("source", required=False, type=click.Path(exists=True, path_type=Path))
+    @click.option("--type", "type_key", default="generic", show_default=True, help="Article type for imported files.")
+    def import_markdown_command(project_slug, source, type_key):
+        """Import a markdown directory or .zip (default: the project's content/ folder)."""
+        project = get_project_by_slug(project_slug)
+        if not project:
+            raise click.ClickException(f"Project '{project_slug}' not found.")
+
+        def report(done, total):
+            click.echo(f"\rImported {done}/{total} files", nl=done == total)
+
+        try:
+            summary = import_markdown(
+                project,
+                source or get_content_root(project),
+                type_key=type_key,
+                progress=report,
+            )
+        except ValueError as e:
+            raise click.ClickException(str(e))
+        click.echo(
+            f"{summary['articles_created']} article(s), {summary['folders_created']} folder(s) created; "
+            f"{summary['links_rewritten']} link(s) rewritten."
+        )
+
+    @app.cli.command("export-project")
+    @click.argument("project_slug")
+    @click.argument("output", type=click.Path(dir_okay=False, writable=True, path_type=Path))
+    @click.option("--since", default=None, help="Only include changes after this ISO timestamp.")
+    def export_project_command(project_slug, output, since):
+        """Write the project (markdown, media, manifest.json) to a .zip file."""
+        project = get_project_by_slug(project_slug)
+        if not project:
+            raise click.ClickException(f"Project '{project_slug}' not found.")
+
+        try:
+            since = parse_since(since) if since else None
+        except ValueError:
+            raise click.ClickException(f"Invalid --since timestamp '{since}'.")
+
+        with output.open("wb") as f:
+            for chunk in export_project_zip(project, since=since):
+                f.write(chunk)
+        click.echo(f"Exported '{project_slug}' to {output}.")
@@ -15,6 +15,63 @@ class Config:
     TESTING = False
     MAX_CONTENT_LENGTH = 10 * 1024 * 1024  # 10 MB
 
+    # SQLite connection profile, applied once to every new connection
+    SQLITE_PRAGMAS = {
+        "journal_mode": "WAL",  # readers no longer block behind writers
+        "synchronous": "NORMAL",  # durable in WAL mode except on power loss
+        "busy_timeout": 5000,  # ms to wait for a lock before "database is locked"
+        "cache_size": -20000,  # negative = KiB, so ~20 MB page cache per connection
+        "mmap_size": 256 * 1024 * 1024,
+        "temp_store": "MEMORY",
+    }
+
+    # Rendered markdown cache
+    RENDER_CACHE_MAX_BYTES = 32 * 1024 * 1024  # 32 MB per process
+    RENDER_CACHE_PERSIST = True  # keep rendered HTML in rendered_html across restarts (written in the background)
+
+    # Project lookup cache (get_project_by_slug)
+    PROJECT_CACHE_TTL = 30.0  # seconds; bounds staleness across worker processes
+    PROJECT_CACHE_SIZE = 256
+
+    # Search results cache (per process; invalidated by the search_generation counter)
+    SEARCH_CACHE_SIZE = 512
+
+    # Media lookups by name (per process), so revalidating a media URL needs no query
+    MEDIA_CACHE_TTL = 30.0  # seconds; bounds staleness across worker processes
+    MEDIA_CACHE_SIZE = 4096
+
+    # Let a fronting proxy send media bytes: None, "x-accel-redirect" (nginx) or "x-sendfile" (Apache, lighttpd)
+    MEDIA_SENDFILE = None
+    MEDIA_ACCEL_REDIRECT_PREFIX = "/_data/"  # nginx `internal` location aliasing DATA_DIR
+
+    # Resized media variants (needs Pillow; without it the originals are served)
+    MEDIA_VARIANT_WIDTHS = (160, 480, 1024, 1920)  # ?w= is rounded up to one of these
+    MEDIA_VARIANT_PREGENERATE = (160, 480)  # rendered in the background right after an upload
+    MEDIA_VARIANT_QUALITY = 80
+    MEDIA_VARIANT_WORKERS = 2
+
+    # Deep-zoom tile pyramids for huge images (pyvips streams them; Pillow is the capped fallback)
+    MEDIA_TILE_MIN_SIDE = 4096  # uploads with a longer side get a pyramid automatically; 0 = only on request
+    MEDIA_TILE_PILLOW_MAX_PIXELS = 100_000_000  # without pyvips, larger images aren't tiled
+
+    # Per-request SQL tracing: slow and repeated query logs, DB time in metrics
+    SQL_TRACE = True
+    SQL_SERVER_TIMING = True  # report query count and DB time in a Server-Timing header
+    SLOW_QUERY_MS = 100.0  # log statements slower than this, with EXPLAIN QUERY PLAN
+    REPEATED_QUERY_WARNING = 10  # log a statement run this many times in one request (N+1)
+
+    # Request metrics (admin dashboard and /metrics), shared between worker processes
+    METRICS_DIR = DATA_DIR / "metrics"  # per-process snapshots; None keeps metrics per process
+    METRICS_FLUSH_SECONDS = 10.0
+
+    # Sampling profiler for slow requests; opt in by endpoint name or sample rate
+    PROFILE_DIR = DATA_DIR / "profiles"
+    PROFILE_ROUTES: tuple[str, ...] = ()  # e.g. ("articles.article_view", "projects.project_home")
+    PROFILE_SAMPLE_RATE = 0.0  # fraction of all other requests to sample
+    PROFILE_THRESHOLD_MS = 500.0  # keep profiles of sampled requests slower than this
+    PROFILE_INTERVAL_MS = 5.0
+    PROFILE_KEEP = 20
+
 
 class DevelopmentConfig(Config):
     """Development configuration."""
@@ -25,12 +82,14 @@ class DevelopmentConfig(Config):
 class ProductionConfig(Config):
     """Production configuration."""
     DEBUG = False
+    SQL_SERVER_TIMING = False  # don't expose query counts to clients
 
 
 class TestingConfig(Config):
     """Testing configuration."""
     TESTING = True
     MAX_CONTENT_LENGTH = 5 * 1024 * 1024  # 5 MB for tests
+    RENDER_CACHE_PERSIST = False
 
 
 def get_config() -> type[Config]:
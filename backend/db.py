@@ -1,27 +1,348 @@
 from __future__ import annotations
 
+import queue
+import re
 import sqlite3
+import threading
+import time
+from functools import lru_cache
 from pathlib import Path
 from contextlib import contextmanager
 
+from flask import current_app, g, has_app_context, request
+
 DB_PATH = Path("data/mythdb.sqlite")
 
+# Idle connections kept around for reuse; extra connections are closed on release
+POOL_SIZE = 8
+
+# Applied to every new connection; replaced by Config.SQLITE_PRAGMAS in init_app()
+PRAGMAS: dict[str, object] = {"foreign_keys": "ON"}
+
+# Per-request query tracing; set from Config.SQL_TRACE etc. in init_app()
+TRACE_QUERIES = False
+SERVER_TIMING = False
+SLOW_QUERY_MS = 100.0
+REPEATED_QUERY_WARNING = 10
+
+_data_dir_ready = False
+_stats_lock = threading.Lock()
+_stats = {"opened": 0, "reused": 0, "closed": 0}
+_thread_queries = threading.local()
+
+
+def _bump(counter: str) -> None:
+    with _stats_lock:
+        _stats[counter] += 1
+
 
 def _ensure_data_dir() -> None:
-    DB_PATH.parent.mkdir(parents=True, exist_ok=True)
+    global _data_dir_ready
+    if not _data_dir_ready:
+        DB_PATH.parent.mkdir(parents=True, exist_ok=True)
+        _data_dir_ready = True
 
 
 def get_connection() -> sqlite3.Connection:
+    """Open a new, fully configured connection. Prefer db_conn() over calling this directly."""
     _ensure_data_dir()
-    conn = sqlite3.connect(DB_PATH)
+    # Pooled connections move between threads, but only ever serve one at a time
+    conn = sqlite3.connect(
+        DB_PATH,
+        check_same_thread=False,
+        cached_statements=256,
+        factory=TracedConnection if TRACE_QUERIES else sqlite3.Connection,
+    )
     conn.row_factory = sqlite3.Row
-    conn.execute("PRAGMA foreign_keys = ON;")
+    for name, value in PRAGMAS.items():
+        conn.execute(f"PRAGMA {name} = {value};")
+    _bump("opened")
     return conn
 
 
+_WHITESPACE_RE = re.compile(r"\s+")
+_STRING_RE = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_RE = re.compile(r"\b\d+(?:\.\d+)?\b")
+_IN_LIST_RE = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+
+
+@lru_cache(maxsize=1024)
+def normalize_sql(sql: str) -> str:
+    """Collapse whitespace and literals so repeats of one statement compare equal."""
+    sql = _WHITESPACE_RE.sub(" ", sql).strip().rstrip(";")
+    sql = _STRING_RE.sub("?", sql)
+    sql = _NUMBER_RE.sub("?", sql)
+    return _IN_LIST_RE.sub("(?, ...)", sql)
+
+
+class QueryRecord:
+    """One statement run during a request; fetches add to its duration and rows."""
+
+    __slots__ = ("sql", "params", "duration", "rows")
+
+    def __init__(self, sql: str, params, duration: float, rows: int):
+        self.sql = sql
+        self.params = params
+        self.duration = duration
+        self.rows = rows
+
+
+def thread_query_count() -> int:
+    """
+    Statements this thread has executed through TracedCursor (so only with
+    SQL_TRACE on), including those run while a streamed body is generated.
+    """
+    return getattr(_thread_queries, "count", 0)
+
+
+def _record_query(sql: str, params, duration: float, rows: int) -> QueryRecord | None:
+    _thread_queries.count = thread_query_count() + 1
+    log = g.get("_sql_log") if has_app_context() else None
+    if log is None:
+        return None
+    record = QueryRecord(sql, params, duration, rows)
+    log.append(record)
+    return record
+
+
+class TracedCursor(sqlite3.Cursor):
+    """Cursor that times execution and fetching and records it in the request's query log."""
+
+    _record: QueryRecord | None = None
+
+    def execute(self, sql, parameters=()):
+        started = time.perf_counter()
+        try:
+            return super().execute(sql, parameters)
+        finally:
+            rows = max(self.rowcount, 0)
+            self._record = _record_query(sql, parameters, time.perf_counter() - started, rows)
+
+    def executemany(self, sql, seq_of_parameters):
+        started = time.perf_counter()
+        try:
+            return super().executemany(sql, seq_of_parameters)
+        finally:
+            rows = max(self.rowcount, 0)
+            self._record = _record_query(sql, None, time.perf_counter() - started, rows)
+
+    def _fetched(self, started: float, rows: int) -> None:
+        if self._record is not None:
+            self._record.duration += time.perf_counter() - started
+            self._record.rows += rows
+
+    def fetchone(self):
+        started = time.perf_counter()
+        row = super().fetchone()
+        self._fetched(started, row is not None)
+        return row
+
+    def fetchmany(self, size=None):
+        started = time.perf_counter()
+        rows = super().fetchmany(self.arraysize if size is None else size)
+        self._fetched(started, len(rows))
+        return rows
+
+    def fetchall(self):
+        started = time.perf_counter()
+        rows = super().fetchall()
+        self._fetched(started, len(rows))
+        return rows
+
+    def __next__(self):
+        started = time.perf_counter()
+        try:
+            row = super().__next__()
+        except StopIteration:
+            self._fetched(started, 0)
+            raise
+        self._fetched(started, 1)
+        return row
+
+
+class TracedConnection(sqlite3.Connection):
+    """Connection whose shortcut methods go through TracedCursor."""
+
+    def cursor(self, factory=TracedCursor):
+        return super().cursor(factory)
+
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+
+class ConnectionPool:
+    """A bounded LIFO pool of idle connections, shared by requests and background work."""
+
+    def __init__(self, max_idle: int = POOL_SIZE):
+        self._idle: queue.LifoQueue[sqlite3.Connection] = queue.LifoQueue(maxsize=max_idle)
+
+    def acquire(self) -> sqlite3.Connection:
+        try:
+            conn = self._idle.get_nowait()
+        except queue.Empty:
+            return get_connection()
+        _bump("reused")
+        return conn
+
+    def release(self, conn: sqlite3.Connection) -> None:
+        if conn.in_transaction:
+            conn.rollback()
+        try:
+            self._idle.put_nowait(conn)
+        except queue.Full:
+            conn.close()
+            _bump("closed")
+
+    def idle_count(self) -> int:
+        return self._idle.qsize()
+
+
+pool = ConnectionPool()
+
+
+def get_pool_stats() -> dict[str, int]:
+    """Connection counters since process start (opened vs reused)."""
+    with _stats_lock:
+        stats = dict(_stats)
+    stats["idle"] = pool.idle_count()
+    return stats
+
+
+def _request_connection() -> sqlite3.Connection:
+    """The connection bound to the current app context, acquired on first use."""
+    conn = g.get("_db_conn")
+    if conn is None:
+        conn = pool.acquire()
+        g._db_conn = conn
+        g._db_depth = 0
+    else:
+        _bump("reused")
+    return conn
+
+
+def _release_request_connection(exc: BaseException | None = None) -> None:
+    conn = g.pop("_db_conn", None)
+    g.pop("_db_depth", None)
+    if conn is not None:
+        pool.release(conn)
+
+
+def get_request_queries() -> list[QueryRecord]:
+    """Statements recorded so far in the current request (empty when tracing is off)."""
+    if not has_app_context():
+        return []
+    return g.get("_sql_log") or []
+
+
+def _query_plan(sql: str, params) -> str:
+    """EXPLAIN QUERY PLAN output as an indented tree."""
+    with db_conn() as conn:
+        rows = conn.execute(f"EXPLAIN QUERY PLAN {sql}", params or ()).fetchall()
+    depth = {0: -1}
+    lines = []
+    for r in rows:
+        depth[r["id"]] = depth.get(r["parent"], -1) + 1
+        lines.append("  " * depth[r["id"]] + r["detail"])
+    return "\n".join(lines)
+
+
+def _start_query_log() -> None:
+    g._sql_log = []
+    g._request_started = time.perf_counter()
+
+
+def _finish_query_log(response):
+    """
+    Attach Server-Timing for the request's SQL (if enabled) and log slow and repeated statements.
+
+    Queries run while a streamed body is generated happen after this and
+    are not counted.
+    """
+    log = g.pop("_sql_log", None)
+    if log is None:
+        return response
+    total_ms = sum(r.duration for r in log) * 1000
+    app_ms = (time.perf_counter() - g.pop("_request_started")) * 1000
+    if SERVER_TIMING:
+        response.headers.add(
+            "Server-Timing",
+            f'db;dur={total_ms:.2f};desc="{len(log)} queries", app;dur={app_ms:.2f}',
+        )
+
+    logger = current_app.logger
+    where = f"{request.method} {request.path}"
+    counts: dict[str, int] = {}
+    for record in log:
+        normalized = normalize_sql(record.sql)
+        counts[normalized] = counts.get(normalized, 0) + 1
+        duration_ms = record.duration * 1000
+        if duration_ms < SLOW_QUERY_MS:
+            continue
+        try:
+            plan = _query_plan(record.sql, record.params)
+        except sqlite3.Error as e:
+            plan = f"(no plan: {e})"
+        logger.warning(
+            "Slow query (%.1f ms, %d rows) in %s:\n%s\n%s",
+            duration_ms, record.rows, where, normalized, plan,
+        )
+
+    for normalized, count in counts.items():
+        if count >= REPEATED_QUERY_WARNING:
+            logger.warning("Query ran %d times in %s: %s", count, where, normalized)
+    return response
+
+
+def init_app(app) -> None:
+    """
+    Apply the connection profile from the app config and return each
+    request's connection to the pool when its app context ends.
+
+    With SQL_TRACE on, every statement a request runs is timed and
+    counted (see get_request_queries), slow or repeated statements are
+    logged, and with SQL_SERVER_TIMING the totals go out in a
+    Server-Timing header.
+    """
+    global PRAGMAS, TRACE_QUERIES, SERVER_TIMING, SLOW_QUERY_MS, REPEATED_QUERY_WARNING
+    PRAGMAS = {"foreign_keys": "ON", **app.config["SQLITE_PRAGMAS"]}
+    TRACE_QUERIES = app.config["SQL_TRACE"]
+    SERVER_TIMING = app.config["SQL_SERVER_TIMING"]
+    SLOW_QUERY_MS = app.config["SLOW_QUERY_MS"]
+    REPEATED_QUERY_WARNING = app.config["REPEATED_QUERY_WARNING"]
+    app.teardown_appcontext(_release_request_connection)
+    if TRACE_QUERIES:
+        app.before_request(_start_query_log)
+        app.after_request(_finish_query_log)
+
+
 @contextmanager
 def db_conn():
-    conn = get_connection()
+    """
+    Yield a connection and commit on success / roll back on error.
+
+    Inside a Flask app context every block shares one connection; nested
+    blocks join the outermost transaction. Outside an app context (CLI,
+    background threads) each block borrows a connection from the pool.
+    """
+    if has_app_context():
+        conn = _request_connection()
+        g._db_depth += 1
+        try:
+            yield conn
+            if g._db_depth == 1:
+                conn.commit()
+        except Exception:
+            if g._db_depth == 1:
+                conn.rollback()
+            raise
+        finally:
+            g._db_depth -= 1
+        return
+
+    conn = pool.acquire()
     try:
         yield conn
         conn.commit()
@@ -29,4 +350,4 @@ def db_conn():
         conn.rollback()
         raise
     finally:
-        conn.close()
+        pool.release(conn)
@@ -1,7 +1,6 @@
 """Article management routes."""
 
 from flask import Blueprint, render_template, request, redirect, url_for, abort, jsonify
-import markdown as md
 from db import db_conn
 from services.project_store import get_project_by_slug
 from services.article_store import (
@@ -16,12 +15,10 @@ from services.article_store import (
 from services.prompt_store import (
     get_prompts_for_article_type,
     get_prompt_values_for_article,
-    get_linked_articles,
     save_prompt_value,
     create_prompt_values_for_article,
 )
-from services.media_store import rewrite_media_urls
-from services.markdown_service import process_article_links
+from services.markdown_service import render_article_html
 
 bp = Blueprint("articles", __name__, url_prefix="/projects")
 
@@ -82,29 +79,17 @@ def article_view(slug: str, article_id: int):
     if not article or article["project_id"] != int(project["id"]):
         abort(404)
 
-    # Render markdown content
-    raw_md = article["body_content"]
-    # Process article links before markdown rendering
-    raw_md = process_article_links(raw_md, project["slug"])
-    rendered_html = md.markdown(
-        raw_md,
-        extensions=["tables", "fenced_code", "footnotes", "toc"],
-    )
-    rendered_html = rewrite_media_urls(rendered_html, project["slug"])
+    rendered_html = render_article_html(project, article)
 
     # Get prompts and their values
     prompts = get_prompts_for_article_type(article["type_id"])
     prompt_values = get_prompt_values_for_article(article_id)
     
-    # For each select prompt, get linked articles and build tooltip data
-    linked_articles_by_key = {}
-    prompt_linked_type_keys = {}  # Map prompt key to linked type key for tooltips
+    # Select prompts offer articles of their linked type; candidates come from
+    # the suggest API as the user types, so only the current choice is loaded here
+    prompt_linked_type_keys = {}  # Map prompt key to linked type key for tooltips and suggestions
     for prompt in prompts:
         if prompt["type"] == "select" and prompt["linked_style_key"]:
-            linked_articles_by_key[prompt["key"]] = get_linked_articles(
-                prompt["linked_style_key"],
-                int(project["id"])
-            )
             prompt_linked_type_keys[prompt["key"]] = prompt["linked_style_key"]
 
     return render_template(
@@ -115,7 +100,6 @@ def article_view(slug: str, article_id: int):
         rendered_html=rendered_html,
         prompts=prompts,
         prompt_values=prompt_values,
-        linked_articles_by_key=linked_articles_by_key,
         prompt_linked_type_keys=prompt_linked_type_keys,
     )
 
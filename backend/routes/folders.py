@@ -2,7 +2,7 @@
 
 from flask import Blueprint, request, redirect, url_for, abort, jsonify
 from services.project_store import get_project_by_slug
-from services.folder_store import create_folder, delete_folder, rename_folder
+from services.folder_store import create_folder, delete_folder, rename_folder, get_folder_by_id, get_folder_level
 
 bp = Blueprint("folders", __name__, url_prefix="/projects")
 
@@ -54,3 +54,26 @@ def rename_folder_route(slug: str, folder_id: int):
         return jsonify({"success": True, "folder": folder})
     except ValueError as e:
         return jsonify({"success": False, "error": str(e)}), 400
+
+
+@bp.route("/<slug>/api/folders", methods=["GET"])
+def get_folder_level_api(slug: str):
+    """API endpoint to get one level of the folder tree.
+
+    Optional query parameter:
+      - parent_id: Folder whose contents to list (omit for the project root)
+
+    Returns JSON with the direct subfolders (including folder_count and
+    article_count) and the articles directly inside the folder.
+    """
+    project = get_project_by_slug(slug)
+    if not project:
+        abort(404)
+
+    parent_id = request.args.get("parent_id", type=int)
+    if parent_id is not None:
+        folder = get_folder_by_id(parent_id)
+        if not folder or folder["project_id"] != int(project["id"]):
+            abort(404)
+
+    return jsonify(get_folder_level(int(project["id"]), parent_id))
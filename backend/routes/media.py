@@ -1,11 +1,21 @@
 """Media management routes."""
 
-from flask import Blueprint, render_template, request, redirect, url_for, abort, send_from_directory
+import os
+import re
+
+from flask import Blueprint, render_template, request, redirect, url_for, abort, jsonify
+from services.blob_store import blob_path
+from services.image_info import MIME_BY_EXT, read_image_info
 from services.project_store import get_project_by_slug
-from services.media_store import list_media, save_uploaded_image, get_media_dir
+from services.media_send import not_modified, send_media
+from services.media_store import get_media, list_media, save_uploaded_image
+from services.media_variants import FORMATS, get_variant, pick_format, pick_width
+from services.tile_pyramid import TILE_MIMETYPE, get_pyramid, pyramid_status, schedule_pyramid, tile_path
 
 bp = Blueprint("media", __name__, url_prefix="/projects")
 
+_DIGEST_RE = re.compile(r"[0-9a-f]{64}")
+
 
 @bp.route("/<slug>/media")
 def project_media(slug: str):
@@ -40,13 +50,123 @@ def media_upload(slug: str):
         return redirect(url_for("media.project_media", slug=slug, error=str(e)))
 
 
+def _requested_variant() -> tuple[int, str] | None:
+    """(width, format) asked for by ?w= and the Accept header, or None for the original."""
+    width = request.args.get("w", type=int)
+    if not width or width <= 0:
+        return None
+    return pick_width(width), pick_format(request.headers.get("Accept", ""))
+
+
+def _send_item(project, item, *, immutable: bool = False):
+    """Send a media row's content, or the variant ?w= asks for when one can be made."""
+    wanted = _requested_variant()
+    variant = get_variant(project, item, *wanted) if wanted else None
+    if variant is not None:
+        # Variant file names are <hash>-w<width>.<format>, unique to their content
+        response = send_media(variant, FORMATS[wanted[1]][1], variant.name, immutable=immutable)
+    else:
+        response = send_media(blob_path(item["hash"]), item["mime"], item["hash"], immutable=immutable)
+    if wanted:
+        response.vary.add("Accept")
+    return response
+
+
 @bp.route("/<slug>/media/files/<path:filename>")
 def media_file(slug: str, filename: str):
-    """Serve a media file from a project."""
+    """Serve a media file from a project; ?w=<px> serves a resized copy at most about that wide.
+
+    The name may be pointed at new content, so responses are revalidated
+    on every use; the ETag is the content hash and both lookups are
+    cached, so a 304 normally costs no query.
+    """
+    project = get_project_by_slug(slug)
+    if not project:
+        abort(404)
+
+    # Names only resolve through the media table, so nothing outside the blob store is reachable
+    item = get_media(int(project["id"]), filename)
+    if not item:
+        abort(404)
+    return _send_item(project, item)
+
+
+@bp.route("/<slug>/media/blob/<digest>/<path:filename>")
+def media_blob(slug: str, digest: str, filename: str):
+    """Serve media by content hash, cacheable for a year; ?w=<px> as for media_file.
+
+    The URL can never change meaning, so revalidation is answered from
+    the URL alone. The filename is only there for people and downloads.
+    """
+    if not _DIGEST_RE.fullmatch(digest):
+        abort(404)
+    wanted = _requested_variant()
+    etags = [digest]
+    if wanted:
+        etags.append(f"{digest}-w{wanted[0]}.{wanted[1]}")
+    for etag in etags:
+        if request.if_none_match.contains(etag):
+            response = not_modified(etag, immutable=True)
+            if wanted:
+                response.vary.add("Accept")
+            return response
+
+    project = get_project_by_slug(slug)
+    path = blob_path(digest)
+    if not project or not path.is_file():
+        abort(404)
+    # The blob's own header stands in for its media row
+    with open(path, "rb") as f:
+        mime, width, _height = read_image_info(f)
+    mime = mime or MIME_BY_EXT.get(os.path.splitext(filename)[1].lower(), "application/octet-stream")
+    item = {"hash": digest, "mime": mime, "width": width}
+    return _send_item(project, item, immutable=True)
+
+
+@bp.route("/<slug>/media/pyramid/<path:filename>", methods=["GET", "POST"])
+def media_pyramid(slug: str, filename: str):
+    """Deep-zoom tiles of a media image: GET reports their state, POST starts building them.
+    
+    Returns JSON with status ("ready", "building" or "missing") and, when
+    ready, the image size, max_zoom, tile_size and a tiles URL template
+    ({z}/{x}/{y}) usable by Leaflet-style viewers.
+    """
     project = get_project_by_slug(slug)
     if not project:
         abort(404)
+    item = get_media(int(project["id"]), filename)
+    if not item:
+        abort(404)
+
+    if request.method == "POST":
+        try:
+            status = schedule_pyramid(project, item)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+    else:
+        status = pyramid_status(project, item["hash"])
 
-    media_dir = get_media_dir(project)
-    # send_from_directory safely serves only within that directory
-    return send_from_directory(media_dir, filename)
+    payload = {"status": status}
+    pyramid = get_pyramid(project, item["hash"]) if status == "ready" else None
+    if pyramid:
+        first_tile = url_for("media.media_tile", slug=slug, digest=item["hash"], z=0, x=0, y=0)
+        payload.update(pyramid, tiles=first_tile.replace("/0/0/0.jpg", "/{z}/{x}/{y}.jpg"))
+    return jsonify(payload), 202 if status == "building" else 200
+
+
+@bp.route("/<slug>/media/tiles/<digest>/<int:z>/<int:x>/<int:y>.jpg")
+def media_tile(slug: str, digest: str, z: int, x: int, y: int):
+    """Serve one tile of a pyramid, cacheable for a year."""
+    if not _DIGEST_RE.fullmatch(digest):
+        abort(404)
+    # Tile URLs embed the content hash, so a cached tile can never go stale
+    etag = f"{digest}-z{z}-{x}-{y}"
+    if request.if_none_match.contains(etag):
+        return not_modified(etag, immutable=True)
+    project = get_project_by_slug(slug)
+    if not project:
+        abort(404)
+    path = tile_path(project, digest, z, x, y)
+    if not path.is_file():
+        abort(404)
+    return send_media(path, TILE_MIMETYPE, etag, immutable=True)
@@ -1,6 +1,9 @@
 """Page routes - static pages and dashboard."""
 
-from flask import Blueprint, render_template
+from flask import Blueprint, Response, abort, jsonify, render_template, send_file
+
+from services.metrics import dashboard_summary, registry, render_prometheus
+from services.profiler import get_profile_path, list_profiles
 
 bp = Blueprint("pages", __name__)
 
@@ -13,5 +16,31 @@ def index():
 
 @bp.route("/admin")
 def admin_dashboard():
-    """Render admin dashboard."""
-    return render_template("admin.html", active_page="admin")
+    """Render admin dashboard with live request metrics."""
+    return render_template(
+        "admin.html",
+        active_page="admin",
+        metrics=dashboard_summary(registry.aggregate()),
+        profiles=list_profiles(),
+    )
+
+
+@bp.route("/admin/api/metrics")
+def admin_metrics_api():
+    """Dashboard metrics as JSON, polled by the admin page."""
+    return jsonify(dashboard_summary(registry.aggregate()))
+
+
+@bp.route("/metrics")
+def prometheus_metrics():
+    """Request, database, cache and memory metrics in Prometheus text format."""
+    return Response(render_prometheus(registry.aggregate()), mimetype="text/plain; version=0.0.4")
+
+
+@bp.route("/admin/profiles/<profile_id>.folded")
+def download_profile(profile_id: str):
+    """Download a slow-request profile as collapsed stacks (flamegraph.pl / speedscope input)."""
+    path = get_profile_path(profile_id)
+    if path is None:
+        abort(404)
+    return send_file(path, mimetype="text/plain", as_attachment=True, download_name=f"profile-{profile_id}.folded")
@@ -1,16 +1,26 @@
 """Project management routes."""
 
-from flask import Blueprint, render_template, request, redirect, url_for, abort, jsonify
-import markdown as md
+import base64
+import json
+from datetime import datetime, timezone
+
+from flask import Blueprint, Response, render_template, request, redirect, url_for, abort, jsonify, stream_with_context
 from services.project_store import load_projects, add_project, get_project_by_slug, _get_project_statistics, update_project_description
-from services.folder_store import get_folders_tree
-from services.article_store import list_article_types
-from services.media_store import rewrite_media_urls
-from services.markdown_service import process_article_links
-from db import db_conn
+from services.folder_store import get_folder_level
+from services.article_store import list_article_types, iter_project_articles, suggest_articles
+from services.markdown_service import render_project_description
+from services.importer import import_markdown
+from services.media_store import list_media
+from services.exporter import export_project_zip, parse_since
 
 bp = Blueprint("projects", __name__, url_prefix="/projects")
 
+DEFAULT_ARTICLE_FIELDS = ("id", "slug", "title", "type_name")
+MAX_ARTICLES_PAGE_SIZE = 500
+DEFAULT_SUGGEST_LIMIT = 10
+MAX_SUGGEST_LIMIT = 50
+MEDIA_THUMBNAIL_WIDTH = 160
+
 @bp.route("/")
 def projects_overview():
     """List all projects."""
@@ -38,26 +48,14 @@ def create_project():
 
 @bp.route("/<slug>")
 def project_home(slug: str):
-    """Display project home and folder/article tree."""
+    """Display project home and the top level of the folder/article tree (deeper levels load on expand)."""
     project = get_project_by_slug(slug)
     if not project:
         abort(404)
 
-    # Render project description markdown
-    raw_md = project.get("description", "")
-    if raw_md:
-        raw_md = process_article_links(raw_md, slug)
-        rendered_html = md.markdown(
-            raw_md,
-            extensions=["tables", "fenced_code", "footnotes", "toc"],
-        )
-    else:
-        rendered_html = ""
-        
-    rendered_html = rewrite_media_urls(rendered_html, slug)
-    project["rendered_description"] = rendered_html
+    project["rendered_description"] = render_project_description(project)
 
-    tree = get_folders_tree(int(project["id"]))
+    tree = get_folder_level(int(project["id"]), None)
     types = list_article_types()
     stats = _get_project_statistics(int(project["id"]))
     error = request.args.get("error")
@@ -72,65 +70,151 @@ def project_home(slug: str):
         error=error,
     )
 
+def _encode_cursor(title: str, article_id: int) -> str:
+    raw = json.dumps([title, article_id], ensure_ascii=False).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii")
+
+
+def _decode_cursor(cursor: str) -> tuple[str, int]:
+    try:
+        title, article_id = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+        return str(title), int(article_id)
+    except (ValueError, TypeError):
+        raise ValueError("Invalid cursor.")
+
+
+def _stream_json_array(items):
+    """Encode an iterable of dicts as a JSON array, one element at a time."""
+    yield "["
+    for i, item in enumerate(items):
+        yield ("," if i else "") + json.dumps(item)
+    yield "]"
+
+
 @bp.route("/<slug>/api/articles", methods=["GET"])
 def get_project_articles_api(slug: str):
-    """API endpoint to get all articles in a project for linking.
+    """API endpoint to list articles in a project for linking.
     
-    Optional query parameter:
+    Optional query parameters:
       - exclude_id: Article ID to exclude (for excluding current article)
+      - type: Only return articles of this type key
+      - fields: Comma-separated fields to return (default: id,slug,title,type_name)
+      - limit: Page size (max 500); omit to stream every article
+      - cursor: Opaque cursor from a previous page's X-Next-Cursor header
     
-    Returns JSON list of articles with id, slug, title, type_name.
+    Returns a streamed JSON list of articles ordered by title. When more
+    pages exist, the X-Next-Cursor header (and a rel="next" Link header)
+    point at the next page.
     """
     project = get_project_by_slug(slug)
     if not project:
         abort(404)
     
     exclude_id = request.args.get("exclude_id", type=int)
+    type_key = request.args.get("type") or None
+    limit = request.args.get("limit", type=int)
+    fields_arg = request.args.get("fields", "")
+    fields = [f.strip() for f in fields_arg.split(",") if f.strip()] or list(DEFAULT_ARTICLE_FIELDS)
+
+    try:
+        after = _decode_cursor(request.args["cursor"]) if request.args.get("cursor") else None
+        if limit is not None:
+            limit = max(1, min(limit, MAX_ARTICLES_PAGE_SIZE))
+        articles = iter_project_articles(
+            int(project["id"]),
+            fields=fields,
+            type_key=type_key,
+            exclude_id=exclude_id,
+            after=after,
+            # One extra row tells us whether another page exists
+            limit=limit + 1 if limit is not None else None,
+        )
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    headers = {}
+    if limit is not None:
+        # Pages are bounded, so materialize one to know whether another follows
+        page = list(articles)
+        if len(page) > limit:
+            page = page[:limit]
+            next_cursor = _encode_cursor(page[-1]["title"], page[-1]["id"])
+            next_url = url_for(
+                "projects.get_project_articles_api",
+                slug=slug,
+                **{**request.args.to_dict(), "cursor": next_cursor},
+            )
+            headers["X-Next-Cursor"] = next_cursor
+            headers["Link"] = f'<{next_url}>; rel="next"'
+        articles = page
+
+    items = ({f: a[f] for f in fields} for a in articles)
+    return Response(
+        stream_with_context(_stream_json_array(items)),
+        mimetype="application/json",
+        headers=headers,
+    )
+
+
+@bp.route("/<slug>/api/articles/suggest", methods=["GET"])
+def suggest_project_articles_api(slug: str):
+    """Title typeahead for link pickers and select prompts.
     
-    with db_conn() as conn:
-        query = """
-            SELECT a.id, a.slug, a.title, t.name AS type_name
-            FROM articles a
-            JOIN article_types t ON a.type_id = t.id
-            WHERE a.project_id = ?
-        """
-        params = [int(project["id"])]
-        
-        if exclude_id:
-            query += " AND a.id != ?"
-            params.append(exclude_id)
-        
-        query += " ORDER BY a.title ASC;"
-        
-        rows = conn.execute(query, params).fetchall()
-        articles = [dict(r) for r in rows]
+    Query parameters:
+      - q: What has been typed so far (empty lists the first titles)
+      - type: Only suggest articles of this type key
+      - exclude_id: Article ID to leave out (the one being edited)
+      - limit: Number of suggestions (default 10, max 50)
     
-    return jsonify(articles)
+    Returns a JSON list of {id, slug, title, type_key, type_name}, titles
+    starting with q first.
+    """
+    project = get_project_by_slug(slug)
+    if not project:
+        abort(404)
+
+    limit = request.args.get("limit", DEFAULT_SUGGEST_LIMIT, type=int)
+    suggestions = suggest_articles(
+        int(project["id"]),
+        request.args.get("q", ""),
+        type_key=request.args.get("type") or None,
+        exclude_id=request.args.get("exclude_id", type=int),
+        limit=max(1, min(limit, MAX_SUGGEST_LIMIT)),
+    )
+    return jsonify(suggestions)
 
 
 @bp.route("/<slug>/api/media", methods=["GET"])
 def get_project_media_api(slug: str):
-    """API endpoint to get all media files in a project.
+    """API endpoint to get the media files in a project.
+    
+    Optional query parameters:
+      - limit: Page size; omit for every file
+      - offset: Number of files to skip
     
-    Returns JSON list of media files with filename.
+    Returns JSON list of media files (filename, url, thumbnail, size, mime,
+    width, height) ordered by filename.
     """
     project = get_project_by_slug(slug)
     if not project:
         abort(404)
-    
-    from pathlib import Path
-    media_dir = Path("data/projects") / project["slug"] / "media"
-    
-    media_files = []
-    if media_dir.exists():
-        allowed_exts = {".png", ".jpg", ".jpeg", ".webp", ".gif"}
-        for file_path in sorted(media_dir.iterdir()):
-            if file_path.is_file() and file_path.suffix.lower() in allowed_exts:
-                media_files.append({
-                    "filename": file_path.name,
-                    "url": f"/projects/{project['slug']}/media/files/{file_path.name}"
-                })
-    
+
+    limit = request.args.get("limit", type=int)
+    offset = max(0, request.args.get("offset", 0, type=int))
+    media_files = [
+        {
+            "filename": item["filename"],
+            "url": url_for("media.media_file", slug=slug, filename=item["filename"]),
+            "thumbnail": url_for(
+                "media.media_blob", slug=slug, digest=item["hash"], filename=item["filename"], w=MEDIA_THUMBNAIL_WIDTH
+            ),
+            "size": item["size"],
+            "mime": item["mime"],
+            "width": item["width"],
+            "height": item["height"],
+        }
+        for item in list_media(project, limit=max(1, limit) if limit is not None else None, offset=offset)
+    ]
     return jsonify(media_files)
 
 @bp.route("/<slug>/edit", methods=["POST"])
@@ -150,3 +234,55 @@ def edit_project(slug: str):
             url_for("projects.project_home", slug=slug, error=str(e))
         )
 
+
+@bp.route("/<slug>/import", methods=["POST"])
+def import_project_markdown(slug: str):
+    """Import a .zip of markdown files (folders become folders) into a project.
+
+    Form fields:
+      - file: The .zip archive
+      - type_key: Article type for imported files (default: generic)
+
+    Returns JSON with counts of created articles, folders and rewritten links.
+    """
+    project = get_project_by_slug(slug)
+    if not project:
+        abort(404)
+
+    file = request.files.get("file")
+    if not file or not file.filename:
+        return jsonify({"success": False, "error": "No file selected."}), 400
+
+    try:
+        summary = import_markdown(project, file.stream, type_key=request.form.get("type_key", "generic"))
+        return jsonify({"success": True, **summary})
+    except ValueError as e:
+        return jsonify({"success": False, "error": str(e)}), 400
+
+
+@bp.route("/<slug>/export", methods=["GET"])
+def export_project(slug: str):
+    """Download the project as a streamed .zip (markdown, media and manifest.json).
+
+    Optional query parameter:
+      - since: ISO timestamp, UTC unless it has an offset (e.g. a previous
+        manifest's exported_at); only articles and media changed after it
+        are included
+    """
+    project = get_project_by_slug(slug)
+    if not project:
+        abort(404)
+
+    since = None
+    if request.args.get("since"):
+        try:
+            since = parse_since(request.args["since"])
+        except ValueError:
+            return jsonify({"error": "Invalid 'since' timestamp."}), 400
+
+    stamp = datetime.now(tz=timezone.utc).strftime("%Y%m%d-%H%M%S")
+    return Response(
+        stream_with_context(export_project_zip(project, since=since)),
+        mimetype="application/zip",
+        headers={"Content-Disposition": f'attachment; filename="{slug}-{stamp}.zip"'},
+    )
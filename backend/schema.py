@@ -1,169 +1,1118 @@
+"""
+Versioned schema migrations.
+
+The schema version lives in SQLite's PRAGMA user_version. Each entry in
+MIGRATIONS upgrades the database by one version and runs exactly once;
+when the database is current, init_schema() costs a single PRAGMA read.
+To change the schema (or the seeded types/prompts), append a new step —
+never edit one that has shipped.
+"""
+
 from __future__ import annotations
 
+import hashlib
+import html
+import json
+import os
+import re
+import shutil
+import sqlite3
+import struct
+import tempfile
+import unicodedata
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import BinaryIO, Optional
+
+from config import DATA_DIR
 from db import db_conn
 from constants import DEFAULT_ARTICLE_TYPES, DEFAULT_PROMPTS_PER_ARTICLE_TYPE
 
 
-def init_schema() -> None:
-    with db_conn() as conn:
-        # Projects
-        conn.execute(
-            """
-            CREATE TABLE IF NOT EXISTS projects (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                slug TEXT NOT NULL UNIQUE,
-                name TEXT NOT NULL,
-                genre TEXT NOT NULL,
-                description TEXT NOT NULL DEFAULT '',
-                created_at TEXT NOT NULL
-            );
-            """
-        )
+def _has_column(conn: sqlite3.Connection, table: str, column: str) -> bool:
+    return any(r["name"] == column for r in conn.execute(f"PRAGMA table_info({table});"))
 
-        # Article types
-        conn.execute(
-            """
-            CREATE TABLE IF NOT EXISTS article_types (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                key TEXT NOT NULL UNIQUE,
-                name TEXT NOT NULL
-            );
-            """
-        )
 
-        # Folders (organize articles hierarchically)
-        conn.execute(
-            """
-            CREATE TABLE IF NOT EXISTS folders (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                project_id INTEGER NOT NULL,
-                parent_id INTEGER,
-                name TEXT NOT NULL,
-                slug TEXT NOT NULL,
-                created_at TEXT NOT NULL,
-                FOREIGN KEY(project_id) REFERENCES projects(id) ON DELETE CASCADE,
-                FOREIGN KEY(parent_id) REFERENCES folders(id) ON DELETE CASCADE,
-                UNIQUE(project_id, parent_id, slug)
-            );
-            """
+def text_counts(body_content: str | None) -> tuple[int, int]:
+    """Word and character counts of raw markdown, as migration 4 stored them (migration 6 recounts)."""
+    body_content = body_content or ""
+    return len(body_content.split()), len(body_content)
+
+
+def _migration_1_initial(conn: sqlite3.Connection) -> None:
+    """Core tables and default seeds. Also adopts databases created before versioning."""
+    # Projects
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS projects (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            slug TEXT NOT NULL UNIQUE,
+            name TEXT NOT NULL,
+            genre TEXT NOT NULL,
+            description TEXT NOT NULL DEFAULT '',
+            created_at TEXT NOT NULL
+        );
+        """
+    )
+
+    # Article types
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS article_types (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            key TEXT NOT NULL UNIQUE,
+            name TEXT NOT NULL
+        );
+        """
+    )
+
+    # Folders (organize articles hierarchically)
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS folders (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            project_id INTEGER NOT NULL,
+            parent_id INTEGER,
+            name TEXT NOT NULL,
+            slug TEXT NOT NULL,
+            created_at TEXT NOT NULL,
+            FOREIGN KEY(project_id) REFERENCES projects(id) ON DELETE CASCADE,
+            FOREIGN KEY(parent_id) REFERENCES folders(id) ON DELETE CASCADE,
+            UNIQUE(project_id, parent_id, slug)
+        );
+        """
+    )
+
+    # Articles (markdown content stored directly in DB)
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS articles (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            project_id INTEGER NOT NULL,
+            folder_id INTEGER,
+            type_id INTEGER NOT NULL,
+            slug TEXT NOT NULL,
+            title TEXT NOT NULL,
+            body_content TEXT NOT NULL DEFAULT '',
+            featured_image TEXT,
+            created_at TEXT NOT NULL,
+            updated_at TEXT NOT NULL,
+            FOREIGN KEY(project_id) REFERENCES projects(id) ON DELETE CASCADE,
+            FOREIGN KEY(folder_id) REFERENCES folders(id) ON DELETE CASCADE,
+            FOREIGN KEY(type_id) REFERENCES article_types(id),
+            UNIQUE(project_id, slug)
+        );
+        """
+    )
+
+    # Columns added to early databases after their tables were created
+    if not _has_column(conn, "projects", "description"):
+        conn.execute("ALTER TABLE projects ADD COLUMN description TEXT NOT NULL DEFAULT '';")
+    if not _has_column(conn, "articles", "featured_image"):
+        conn.execute("ALTER TABLE articles ADD COLUMN featured_image TEXT;")
+
+    # Helpful indexes
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_folders_project_id ON folders(project_id);")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_folders_parent_id ON folders(parent_id);")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_articles_project_id ON articles(project_id);")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_articles_folder_id ON articles(folder_id);")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_articles_type_id ON articles(type_id);")
+
+    # Prompts (structured fields for articles)
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS prompts (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            article_type_id INTEGER NOT NULL,
+            key TEXT NOT NULL,
+            text TEXT NOT NULL,
+            type TEXT NOT NULL,
+            linked_style_key TEXT,
+            created_at TEXT NOT NULL,
+            FOREIGN KEY(article_type_id) REFERENCES article_types(id) ON DELETE CASCADE,
+            UNIQUE(article_type_id, key)
+        );
+        """
+    )
+
+    # Prompt values (answers to prompts for specific articles)
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS prompt_values (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            article_id INTEGER NOT NULL,
+            prompt_id INTEGER NOT NULL,
+            value TEXT,
+            linked_article_id INTEGER,
+            created_at TEXT NOT NULL,
+            updated_at TEXT NOT NULL,
+            FOREIGN KEY(article_id) REFERENCES articles(id) ON DELETE CASCADE,
+            FOREIGN KEY(prompt_id) REFERENCES prompts(id) ON DELETE CASCADE,
+            FOREIGN KEY(linked_article_id) REFERENCES articles(id) ON DELETE SET NULL,
+            UNIQUE(article_id, prompt_id)
+        );
+        """
+    )
+
+    # Indexes for prompt values
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_prompt_values_article_id ON prompt_values(article_id);")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_prompt_values_prompt_id ON prompt_values(prompt_id);")
+
+    # Seed default article types and prompts (idempotent)
+    conn.executemany(
+        "INSERT OR IGNORE INTO article_types (key, name) VALUES (?, ?);",
+        DEFAULT_ARTICLE_TYPES,
+    )
+    now = datetime.now().isoformat()
+    conn.executemany(
+        """
+        INSERT OR IGNORE INTO prompts
+        (article_type_id, key, text, type, linked_style_key, created_at)
+        SELECT id, ?, ?, ?, ?, ? FROM article_types WHERE key = ?
+        """,
+        [
+            (
+                prompt_config["prompt_key"],
+                prompt_config["prompt_text"],
+                prompt_config["prompt_type"],
+                prompt_config.get("prompt_linked_type_key"),
+                now,
+                prompt_config["article_type_key"],
+            )
+            for prompt_config in DEFAULT_PROMPTS_PER_ARTICLE_TYPE
+        ],
+    )
+
+
+def _migration_2_search_index(conn: sqlite3.Connection) -> None:
+    """FTS5 indexes over articles and projects, kept in sync by triggers."""
+    conn.execute(
+        """
+        CREATE VIRTUAL TABLE IF NOT EXISTS articles_fts USING fts5(
+            title,
+            body_content,
+            content='articles',
+            content_rowid='id',
+            tokenize='unicode61 remove_diacritics 2',
+            prefix='2 3'
+        );
+        """
+    )
+    conn.execute(
+        """
+        CREATE TRIGGER IF NOT EXISTS articles_fts_ai AFTER INSERT ON articles BEGIN
+            INSERT INTO articles_fts (rowid, title, body_content)
+            VALUES (new.id, new.title, new.body_content);
+        END;
+        """
+    )
+    conn.execute(
+        """
+        CREATE TRIGGER IF NOT EXISTS articles_fts_ad AFTER DELETE ON articles BEGIN
+            INSERT INTO articles_fts (articles_fts, rowid, title, body_content)
+            VALUES ('delete', old.id, old.title, old.body_content);
+        END;
+        """
+    )
+    conn.execute(
+        """
+        CREATE TRIGGER IF NOT EXISTS articles_fts_au AFTER UPDATE OF title, body_content ON articles BEGIN
+            INSERT INTO articles_fts (articles_fts, rowid, title, body_content)
+            VALUES ('delete', old.id, old.title, old.body_content);
+            INSERT INTO articles_fts (rowid, title, body_content)
+            VALUES (new.id, new.title, new.body_content);
+        END;
+        """
+    )
+
+    conn.execute(
+        """
+        CREATE VIRTUAL TABLE IF NOT EXISTS projects_fts USING fts5(
+            name,
+            genre,
+            description,
+            content='projects',
+            content_rowid='id',
+            tokenize='unicode61 remove_diacritics 2',
+            prefix='2 3'
+        );
+        """
+    )
+    conn.execute(
+        """
+        CREATE TRIGGER IF NOT EXISTS projects_fts_ai AFTER INSERT ON projects BEGIN
+            INSERT INTO projects_fts (rowid, name, genre, description)
+            VALUES (new.id, new.name, new.genre, new.description);
+        END;
+        """
+    )
+    conn.execute(
+        """
+        CREATE TRIGGER IF NOT EXISTS projects_fts_ad AFTER DELETE ON projects BEGIN
+            INSERT INTO projects_fts (projects_fts, rowid, name, genre, description)
+            VALUES ('delete', old.id, old.name, old.genre, old.description);
+        END;
+        """
+    )
+    conn.execute(
+        """
+        CREATE TRIGGER IF NOT EXISTS projects_fts_au AFTER UPDATE OF name, genre, description ON projects BEGIN
+            INSERT INTO projects_fts (projects_fts, rowid, name, genre, description)
+            VALUES ('delete', old.id, old.name, old.genre, old.description);
+            INSERT INTO projects_fts (rowid, name, genre, description)
+            VALUES (new.id, new.name, new.genre, new.description);
+        END;
+        """
+    )
+
+    # Index whatever already exists
+    conn.execute("INSERT INTO articles_fts (articles_fts) VALUES ('rebuild');")
+    conn.execute("INSERT INTO projects_fts (projects_fts) VALUES ('rebuild');")
+
+
+def _migration_3_render_cache(conn: sqlite3.Connection) -> None:
+    """Rendered markdown cache and the render_epoch that invalidates it."""
+    if not _has_column(conn, "projects", "render_epoch"):
+        conn.execute("ALTER TABLE projects ADD COLUMN render_epoch INTEGER NOT NULL DEFAULT 0;")
+
+    # Rendered markdown cache (see services/render_cache.py)
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS rendered_html (
+            kind TEXT NOT NULL,
+            object_id INTEGER NOT NULL,
+            version TEXT NOT NULL,
+            html TEXT NOT NULL,
+            PRIMARY KEY(kind, object_id)
+        );
+        """
+    )
+
+    # Creating, renaming or deleting an article can change how any link in its
+    # project resolves, so it invalidates every rendered page of that project.
+    conn.execute(
+        """
+        CREATE TRIGGER IF NOT EXISTS articles_render_epoch_ai AFTER INSERT ON articles BEGIN
+            UPDATE projects SET render_epoch = render_epoch + 1 WHERE id = new.project_id;
+        END;
+        """
+    )
+    conn.execute(
+        """
+        CREATE TRIGGER IF NOT EXISTS articles_render_epoch_au AFTER UPDATE OF slug ON articles BEGIN
+            UPDATE projects SET render_epoch = render_epoch + 1 WHERE id = new.project_id;
+        END;
+        """
+    )
+    conn.execute(
+        """
+        CREATE TRIGGER IF NOT EXISTS articles_render_epoch_ad AFTER DELETE ON articles BEGIN
+            UPDATE projects SET render_epoch = render_epoch + 1 WHERE id = old.project_id;
+            DELETE FROM rendered_html WHERE kind = 'article' AND object_id = old.id;
+        END;
+        """
+    )
+
+
+def _migration_4_project_stats(conn: sqlite3.Connection) -> None:
+    """Per-article word/char counts and per-project aggregates kept by triggers."""
+    if not _has_column(conn, "articles", "word_count"):
+        conn.execute("ALTER TABLE articles ADD COLUMN word_count INTEGER NOT NULL DEFAULT 0;")
+        conn.execute("ALTER TABLE articles ADD COLUMN char_count INTEGER NOT NULL DEFAULT 0;")
+        rows = conn.execute("SELECT id, body_content FROM articles;").fetchall()
+        conn.executemany(
+            "UPDATE articles SET word_count = ?, char_count = ? WHERE id = ?;",
+            [(*text_counts(r["body_content"]), r["id"]) for r in rows],
         )
 
-        # Articles (markdown content stored directly in DB)
-        conn.execute(
-            """
-            CREATE TABLE IF NOT EXISTS articles (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                project_id INTEGER NOT NULL,
-                folder_id INTEGER,
-                type_id INTEGER NOT NULL,
-                slug TEXT NOT NULL,
-                title TEXT NOT NULL,
-                body_content TEXT NOT NULL DEFAULT '',
-                featured_image TEXT,
-                created_at TEXT NOT NULL,
-                updated_at TEXT NOT NULL,
-                FOREIGN KEY(project_id) REFERENCES projects(id) ON DELETE CASCADE,
-                FOREIGN KEY(folder_id) REFERENCES folders(id) ON DELETE CASCADE,
-                FOREIGN KEY(type_id) REFERENCES article_types(id),
-                UNIQUE(project_id, slug)
-            );
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_articles_project_updated ON articles(project_id, updated_at);")
+
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS project_stats (
+            project_id INTEGER PRIMARY KEY,
+            articles_count INTEGER NOT NULL DEFAULT 0,
+            folders_count INTEGER NOT NULL DEFAULT 0,
+            total_words INTEGER NOT NULL DEFAULT 0,
+            total_chars INTEGER NOT NULL DEFAULT 0,
+            FOREIGN KEY(project_id) REFERENCES projects(id) ON DELETE CASCADE
+        );
+        """
+    )
+    conn.execute(
+        """
+        CREATE TRIGGER IF NOT EXISTS project_stats_projects_ai AFTER INSERT ON projects BEGIN
+            INSERT OR IGNORE INTO project_stats (project_id) VALUES (new.id);
+        END;
+        """
+    )
+    conn.execute(
+        """
+        CREATE TRIGGER IF NOT EXISTS project_stats_articles_ai AFTER INSERT ON articles BEGIN
+            INSERT OR IGNORE INTO project_stats (project_id) VALUES (new.project_id);
+            UPDATE project_stats
+            SET articles_count = articles_count + 1,
+                total_words = total_words + new.word_count,
+                total_chars = total_chars + new.char_count
+            WHERE project_id = new.project_id;
+        END;
+        """
+    )
+    conn.execute(
+        """
+        CREATE TRIGGER IF NOT EXISTS project_stats_articles_ad AFTER DELETE ON articles BEGIN
+            UPDATE project_stats
+            SET articles_count = articles_count - 1,
+                total_words = total_words - old.word_count,
+                total_chars = total_chars - old.char_count
+            WHERE project_id = old.project_id;
+        END;
+        """
+    )
+    conn.execute(
+        """
+        CREATE TRIGGER IF NOT EXISTS project_stats_articles_au AFTER UPDATE OF word_count, char_count ON articles BEGIN
+            UPDATE project_stats
+            SET total_words = total_words - old.word_count + new.word_count,
+                total_chars = total_chars - old.char_count + new.char_count
+            WHERE project_id = new.project_id;
+        END;
+        """
+    )
+    conn.execute(
+        """
+        CREATE TRIGGER IF NOT EXISTS project_stats_folders_ai AFTER INSERT ON folders BEGIN
+            INSERT OR IGNORE INTO project_stats (project_id) VALUES (new.project_id);
+            UPDATE project_stats SET folders_count = folders_count + 1
+            WHERE project_id = new.project_id;
+        END;
+        """
+    )
+    conn.execute(
+        """
+        CREATE TRIGGER IF NOT EXISTS project_stats_folders_ad AFTER DELETE ON folders BEGIN
+            UPDATE project_stats SET folders_count = folders_count - 1
+            WHERE project_id = old.project_id;
+        END;
+        """
+    )
+
+    # Recompute from scratch so adopted databases start out exact
+    conn.execute(
+        """
+        INSERT OR REPLACE INTO project_stats (project_id, articles_count, folders_count, total_words, total_chars)
+        SELECT p.id,
+               (SELECT COUNT(*) FROM articles a WHERE a.project_id = p.id),
+               (SELECT COUNT(*) FROM folders f WHERE f.project_id = p.id),
+               (SELECT COALESCE(SUM(word_count), 0) FROM articles a WHERE a.project_id = p.id),
+               (SELECT COALESCE(SUM(char_count), 0) FROM articles a WHERE a.project_id = p.id)
+        FROM projects p;
+        """
+    )
+
+
+def _migration_5_listing_indexes(conn: sqlite3.Connection) -> None:
+    """Composite indexes for per-level folder listings and keyset article paging."""
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_folders_project_parent ON folders(project_id, parent_id);")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_articles_project_folder ON articles(project_id, folder_id);")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_articles_project_title ON articles(project_id, title, id);")
+
+
+# Migration 6 keeps its own copy of the markdown to plain text conversion
+# (services/plain_text.py as it shipped) and of the columns it derives.
+# Line prefixes that are markup: headings, blockquotes, list markers, task boxes
+_V6_HEADING_RE = re.compile(r"\s{0,3}#{1,6}(?:\s+|$)")
+_V6_QUOTE_RE = re.compile(r"\s{0,3}(?:>\s?)+")
+_V6_LIST_RE = re.compile(r"\s*(?:[-*+]|\d{1,9}[.)])\s+(?:\[[ xX]\]\s+)?")
+_V6_FENCE_RE = re.compile(r"\s{0,3}(`{3,}|~{3,})")
+# Lines dropped entirely: horizontal rules, table rules, setext underlines, reference definitions
+_V6_DROPPED_LINE_RE = re.compile(
+    r"\s{0,3}(?:(?:[-*_]\s*){3,}|=+|\|?\s*:?-+:?\s*(?:\|\s*:?-+:?\s*)+\|?|\[[^\]]+\]:\s+\S.*)\s*$"
+)
+_V6_CLOSING_HASHES_RE = re.compile(r"\s+#+\s*$")
+
+_V6_INLINE_RE = re.compile(
+    r"""
+      (?P<image>!\[(?P<alt>[^\]]*)\]\([^)]*\))
+    | (?P<link>\[(?P<label>[^\]]+)\](?:\([^)]*\)|\[[^\]]*\]))
+    | (?P<footnote>\[\^[^\]]+\])
+    | (?P<code>(?P<ticks>`+)(?P<code_text>.+?)(?P=ticks))
+    | <(?P<autolink>(?:https?|mailto):[^>\s]+)>
+    | (?P<tag></?[A-Za-z][^>]*>)
+    | \\(?P<escaped>[\\`*_{}\[\]()#+\-.!|>~])
+    | (?P<entity>&(?:[A-Za-z]+|\#\d+|\#x[0-9A-Fa-f]+);)
+    | (?P<markup>\*{1,3}|~~|(?<!\w)_{1,3}|_{1,3}(?!\w))
+    | (?P<pipe>\s*\|\s*)
+    """,
+    re.VERBOSE,
+)
+
+
+class _V6Builder:
+    """Accumulates text pieces and the anchors mapping text offsets to source offsets."""
+
+    def __init__(self):
+        self.parts: list[str] = []
+        self.length = 0
+        self.offsets: list[list[int]] = []
+
+    def add(self, text: str, source_pos: int) -> None:
+        if not text:
+            return
+        if not self.offsets or self.offsets[-1][1] + (self.length - self.offsets[-1][0]) != source_pos:
+            self.offsets.append([self.length, source_pos])
+        self.parts.append(text)
+        self.length += len(text)
+
+    def separator(self, text: str) -> None:
+        """
+        A space or newline with no source of its own (line and block joins).
+
+        Runs collapse to one character, a newline winning over a space,
+        so offsets already recorded never shift.
+        """
+        if not self.length:
+            return
+        last = self.parts[-1]
+        if last.endswith("\n") or (last.endswith(" ") and text == " "):
+            return
+        if last == " ":
+            self.parts[-1] = text
+            return
+        self.parts.append(text)
+        self.length += len(text)
+
+
+def _v6_inline(builder: _V6Builder, line: str, base: int) -> None:
+    pos = 0
+    for match in _V6_INLINE_RE.finditer(line):
+        builder.add(line[pos:match.start()], base + pos)
+        pos = match.end()
+        kind = match.lastgroup
+        if match.group("image") is not None:
+            _v6_inline(builder, match.group("alt"), base + match.start("alt"))
+        elif match.group("link") is not None:
+            _v6_inline(builder, match.group("label"), base + match.start("label"))
+        elif match.group("code") is not None:
+            builder.add(match.group("code_text"), base + match.start("code_text"))
+        elif match.group("autolink") is not None:
+            builder.add(match.group("autolink"), base + match.start("autolink"))
+        elif match.group("escaped") is not None:
+            builder.add(match.group("escaped"), base + match.start("escaped"))
+        elif match.group("entity") is not None:
+            builder.add(html.unescape(match.group("entity")), base + match.start())
+        elif kind == "pipe":
+            builder.separator(" ")
+    builder.add(line[pos:], base + pos)
+
+
+def _v6_markdown_to_text(markdown_text: str | None) -> tuple[str, list[list[int]]]:
+    """Plain text of markdown and its [text_offset, source_offset] anchors."""
+    builder = _V6Builder()
+    fence = None
+    pos = 0
+    for line in (markdown_text or "").splitlines(keepends=True):
+        start = pos
+        pos += len(line)
+        content = line.rstrip("\r\n")
+
+        fence_match = _V6_FENCE_RE.match(content)
+        if fence is not None:
+            if fence_match and fence_match.group(1)[0] == fence[0] and len(fence_match.group(1)) >= len(fence):
+                fence = None
+                builder.separator("\n")
+            else:
+                builder.add(content, start)
+                builder.separator("\n")
+            continue
+        if fence_match:
+            fence = fence_match.group(1)
+            builder.separator("\n")
+            continue
+
+        if not content.strip():
+            builder.separator("\n")
+            continue
+        if _V6_DROPPED_LINE_RE.match(content):
+            builder.separator("\n")
+            continue
+
+        offset = 0
+        block_start = content.lstrip().startswith("|")  # table row
+        for prefix_re in (_V6_QUOTE_RE, _V6_HEADING_RE, _V6_LIST_RE):
+            prefix = prefix_re.match(content, offset)
+            if prefix:
+                offset = prefix.end()
+                block_start = block_start or prefix_re is _V6_LIST_RE
+        heading = _V6_HEADING_RE.match(content)
+        end = len(content)
+        if heading:
+            closing = _V6_CLOSING_HASHES_RE.search(content, offset)
+            if closing:
+                end = closing.start()
+        body = content[offset:end].strip()
+        if not body:
+            continue
+        lead = len(content[offset:end]) - len(content[offset:end].lstrip())
+
+        builder.separator("\n" if block_start or heading else " ")
+        _v6_inline(builder, body, start + offset + lead)
+        if heading:
+            builder.separator("\n")
+
+    return "".join(builder.parts).rstrip(), builder.offsets
+
+
+
+def _v6_text_columns(body_content: str | None) -> tuple[str, str, int, int]:
+    body_text, offsets = _v6_markdown_to_text(body_content)
+    return body_text, json.dumps(offsets, separators=(",", ":")), len(body_text.split()), len(body_text)
+
+
+def _migration_6_plain_text(conn: sqlite3.Connection) -> None:
+    """Stored plain-text projections of article bodies and project descriptions; FTS indexes them."""
+    if not _has_column(conn, "articles", "body_text"):
+        conn.execute("ALTER TABLE articles ADD COLUMN body_text TEXT NOT NULL DEFAULT '';")
+        conn.execute("ALTER TABLE articles ADD COLUMN body_text_offsets TEXT NOT NULL DEFAULT '[]';")
+    if not _has_column(conn, "projects", "description_text"):
+        conn.execute("ALTER TABLE projects ADD COLUMN description_text TEXT NOT NULL DEFAULT '';")
+
+    # The markdown indexes go first so the backfill doesn't update them row by row
+    for name in ("articles_fts_ai", "articles_fts_ad", "articles_fts_au",
+                 "projects_fts_ai", "projects_fts_ad", "projects_fts_au"):
+        conn.execute(f"DROP TRIGGER IF EXISTS {name};")
+    conn.execute("DROP TABLE IF EXISTS articles_fts;")
+    conn.execute("DROP TABLE IF EXISTS projects_fts;")
+
+    last_id = 0
+    while True:
+        rows = conn.execute(
+            "SELECT id, body_content FROM articles WHERE id > ? ORDER BY id LIMIT 500;", (last_id,)
+        ).fetchall()
+        if not rows:
+            break
+        conn.executemany(
             """
+            UPDATE articles SET body_text = ?, body_text_offsets = ?, word_count = ?, char_count = ?
+            WHERE id = ?;
+            """,
+            [(*_v6_text_columns(r["body_content"]), r["id"]) for r in rows],
         )
+        last_id = rows[-1]["id"]
+    conn.executemany(
+        "UPDATE projects SET description_text = ? WHERE id = ?;",
+        [
+            (_v6_markdown_to_text(r["description"])[0], r["id"])
+            for r in conn.execute("SELECT id, description FROM projects;").fetchall()
+        ],
+    )
 
-        # Helpful indexes
-        conn.execute("CREATE INDEX IF NOT EXISTS idx_folders_project_id ON folders(project_id);")
-        conn.execute("CREATE INDEX IF NOT EXISTS idx_folders_parent_id ON folders(parent_id);")
-        conn.execute("CREATE INDEX IF NOT EXISTS idx_articles_project_id ON articles(project_id);")
-        conn.execute("CREATE INDEX IF NOT EXISTS idx_articles_folder_id ON articles(folder_id);")
-        conn.execute("CREATE INDEX IF NOT EXISTS idx_articles_type_id ON articles(type_id);")
-
-        # Migration: Add description column to projects if it doesn't exist
-        try:
-            conn.execute("ALTER TABLE projects ADD COLUMN description TEXT NOT NULL DEFAULT '';")
-        except:
-            # Column already exists
-            pass
-
-        # Migration: Add featured_image column if it doesn't exist
-        try:
-            conn.execute("ALTER TABLE articles ADD COLUMN featured_image TEXT;")
-        except:
-            # Column already exists
-            pass
-
-        # Seed default article types (idempotent)
-        for key, name in DEFAULT_ARTICLE_TYPES:
-            conn.execute(
-                "INSERT OR IGNORE INTO article_types (key, name) VALUES (?, ?);",
-                (key, name),
-            )
+    conn.execute(
+        """
+        CREATE VIRTUAL TABLE articles_fts USING fts5(
+            title,
+            body_text,
+            content='articles',
+            content_rowid='id',
+            tokenize='unicode61 remove_diacritics 2',
+            prefix='2 3'
+        );
+        """
+    )
+    conn.execute(
+        """
+        CREATE TRIGGER articles_fts_ai AFTER INSERT ON articles BEGIN
+            INSERT INTO articles_fts (rowid, title, body_text)
+            VALUES (new.id, new.title, new.body_text);
+        END;
+        """
+    )
+    conn.execute(
+        """
+        CREATE TRIGGER articles_fts_ad AFTER DELETE ON articles BEGIN
+            INSERT INTO articles_fts (articles_fts, rowid, title, body_text)
+            VALUES ('delete', old.id, old.title, old.body_text);
+        END;
+        """
+    )
+    conn.execute(
+        """
+        CREATE TRIGGER articles_fts_au AFTER UPDATE OF title, body_text ON articles BEGIN
+            INSERT INTO articles_fts (articles_fts, rowid, title, body_text)
+            VALUES ('delete', old.id, old.title, old.body_text);
+            INSERT INTO articles_fts (rowid, title, body_text)
+            VALUES (new.id, new.title, new.body_text);
+        END;
+        """
+    )
+
+    conn.execute(
+        """
+        CREATE VIRTUAL TABLE projects_fts USING fts5(
+            name,
+            genre,
+            description_text,
+            content='projects',
+            content_rowid='id',
+            tokenize='unicode61 remove_diacritics 2',
+            prefix='2 3'
+        );
+        """
+    )
+    conn.execute(
+        """
+        CREATE TRIGGER projects_fts_ai AFTER INSERT ON projects BEGIN
+            INSERT INTO projects_fts (rowid, name, genre, description_text)
+            VALUES (new.id, new.name, new.genre, new.description_text);
+        END;
+        """
+    )
+    conn.execute(
+        """
+        CREATE TRIGGER projects_fts_ad AFTER DELETE ON projects BEGIN
+            INSERT INTO projects_fts (projects_fts, rowid, name, genre, description_text)
+            VALUES ('delete', old.id, old.name, old.genre, old.description_text);
+        END;
+        """
+    )
+    conn.execute(
+        """
+        CREATE TRIGGER projects_fts_au AFTER UPDATE OF name, genre, description_text ON projects BEGIN
+            INSERT INTO projects_fts (projects_fts, rowid, name, genre, description_text)
+            VALUES ('delete', old.id, old.name, old.genre, old.description_text);
+            INSERT INTO projects_fts (rowid, name, genre, description_text)
+            VALUES (new.id, new.name, new.genre, new.description_text);
+        END;
+        """
+    )
+
+    conn.execute("INSERT INTO articles_fts (articles_fts) VALUES ('rebuild');")
+    conn.execute("INSERT INTO projects_fts (projects_fts) VALUES ('rebuild');")
+
+
+def _migration_7_search_generation(conn: sqlite3.Connection) -> None:
+    """A counter bumped by every write search can see; keys the search results cache."""
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS search_generation (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            value INTEGER NOT NULL DEFAULT 0
+        );
+        """
+    )
+    conn.execute("INSERT OR IGNORE INTO search_generation (id, value) VALUES (1, 0);")
+
+    bump = "UPDATE search_generation SET value = value + 1 WHERE id = 1;"
+    triggers = {
+        "search_generation_articles_ai": "AFTER INSERT ON articles",
+        "search_generation_articles_ad": "AFTER DELETE ON articles",
+        "search_generation_articles_au": "AFTER UPDATE OF title, slug, body_text, type_id, project_id ON articles",
+        "search_generation_projects_ai": "AFTER INSERT ON projects",
+        "search_generation_projects_ad": "AFTER DELETE ON projects",
+        "search_generation_projects_au": "AFTER UPDATE OF name, slug, genre, description_text ON projects",
+    }
+    for name, event in triggers.items():
+        conn.execute(f"CREATE TRIGGER IF NOT EXISTS {name} {event} BEGIN {bump} END;")
+
+
+# Migrations 8-11 keep their own copies of the naming, indexing and file
+# layout rules they were written against, so a later change to the
+# services can't change what an old migration does.
+_V8_NON_ALNUM_RE = re.compile(r"[^0-9a-z]+")
+_V8_IMAGE_EXTS = {".png", ".jpg", ".jpeg", ".webp", ".gif"}
+_V8_PROJECTS_DIR = DATA_DIR / "projects"
+_V11_BLOB_DIR = DATA_DIR / "blobs"
+
+
+def _v8_normalize(text: str) -> str:
+    text = unicodedata.normalize("NFKD", text or "")
+    text = "".join(c for c in text if not unicodedata.combining(c)).lower()
+    return _V8_NON_ALNUM_RE.sub(" ", text).strip()
+
+
+def _v8_trigrams(text: str) -> set[str]:
+    grams = set()
+    for word in _v8_normalize(text).split():
+        padded = f"  {word} "
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+def _v8_media_files(conn: sqlite3.Connection) -> list[tuple[int, Path]]:
+    """(project_id, path) of every image in a project media folder."""
+    files = []
+    for project in conn.execute("SELECT id, slug FROM projects;").fetchall():
+        media_dir = _V8_PROJECTS_DIR / project["slug"] / "media"
+        if media_dir.is_dir():
+            files += [
+                (project["id"], path)
+                for path in sorted(media_dir.iterdir())
+                if path.is_file() and path.suffix.lower() in _V8_IMAGE_EXTS
+            ]
+    return files
+
+
+_V10_MIME_BY_EXT = {
+    ".png": "image/png",
+    ".jpg": "image/jpeg",
+    ".jpeg": "image/jpeg",
+    ".gif": "image/gif",
+    ".webp": "image/webp",
+}
+
+# JPEG start-of-frame markers (C4, C8 and CC are not frames)
+_V10_JPEG_SOF = {0xC0, 0xC1, 0xC2, 0xC3, 0xC5, 0xC6, 0xC7, 0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF}
+
+
+def _v10_png(f: BinaryIO, head: bytes) -> Optional[tuple[int, int]]:
+    if head[12:16] != b"IHDR":
+        return None
+    return struct.unpack(">II", head[16:24])
+
+
+def _v10_gif(f: BinaryIO, head: bytes) -> Optional[tuple[int, int]]:
+    return struct.unpack("<HH", head[6:10])
+
+
+def _v10_webp(f: BinaryIO, head: bytes) -> Optional[tuple[int, int]]:
+    chunk = head[12:16]
+    if chunk == b"VP8 " and head[23:26] == b"\x9d\x01\x2a":
+        w, h = struct.unpack("<HH", head[26:30])
+        return w & 0x3FFF, h & 0x3FFF
+    if chunk == b"VP8L" and head[20] == 0x2F:
+        bits = int.from_bytes(head[21:25], "little")
+        return (bits & 0x3FFF) + 1, ((bits >> 14) & 0x3FFF) + 1
+    if chunk == b"VP8X":
+        return int.from_bytes(head[24:27], "little") + 1, int.from_bytes(head[27:30], "little") + 1
+    return None
+
+
+def _v10_jpeg(f: BinaryIO, head: bytes) -> Optional[tuple[int, int]]:
+    f.seek(2)
+    while True:
+        byte = f.read(1)
+        while byte and byte != b"\xff":
+            byte = f.read(1)
+        while byte == b"\xff":
+            byte = f.read(1)
+        if not byte:
+            return None
+        marker = byte[0]
+        if marker in (0xD8, 0x01) or 0xD0 <= marker <= 0xD7:
+            continue  # standalone markers carry no length
+        length_bytes = f.read(2)
+        if len(length_bytes) < 2:
+            return None
+        length = struct.unpack(">H", length_bytes)[0]
+        if marker in _V10_JPEG_SOF:
+            frame = f.read(5)
+            if len(frame) < 5:
+                return None
+            h, w = struct.unpack(">HH", frame[1:5])
+            return w, h
+        f.seek(length - 2, 1)
+
+
+def _v10_read_image_info(f: BinaryIO) -> tuple[Optional[str], Optional[int], Optional[int]]:
+    """(mime, width, height) from an image file's headers, None where they don't say."""
+    head = f.read(32)
+    if head.startswith(b"\x89PNG\r\n\x1a\n"):
+        mime, reader = "image/png", _v10_png
+    elif head[:6] in (b"GIF87a", b"GIF89a"):
+        mime, reader = "image/gif", _v10_gif
+    elif head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        mime, reader = "image/webp", _v10_webp
+    elif head.startswith(b"\xff\xd8"):
+        mime, reader = "image/jpeg", _v10_jpeg
+    else:
+        return None, None, None
+
+    try:
+        size = reader(f, head)
+    except (struct.error, IndexError, OSError):
+        size = None
+    return (mime, *size) if size else (mime, None, None)
+
+
+def _v10_sha256(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        while chunk := f.read(1024 * 1024):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _migration_8_trigram_index(conn: sqlite3.Connection) -> None:
+    """Trigram postings over article titles, folder names and media filenames (see services/fuzzy_index.py)."""
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS trigram_terms (
+            id INTEGER PRIMARY KEY,
+            kind TEXT NOT NULL,
+            object_id INTEGER,
+            project_id INTEGER NOT NULL,
+            term TEXT NOT NULL
+        );
+        """
+    )
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_trigram_terms_object ON trigram_terms(kind, object_id);")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_trigram_terms_project ON trigram_terms(project_id, kind, term);")
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS trigrams (
+            gram TEXT NOT NULL,
+            term_id INTEGER NOT NULL,
+            PRIMARY KEY (gram, term_id)
+        ) WITHOUT ROWID;
+        """
+    )
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_trigrams_term ON trigrams(term_id);")
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS trigram_df (
+            gram TEXT PRIMARY KEY,
+            df INTEGER NOT NULL
+        ) WITHOUT ROWID;
+        """
+    )
+
+    # Removing a term drops its postings; removing what it names removes the term
+    conn.execute(
+        """
+        CREATE TRIGGER IF NOT EXISTS trigram_terms_ad AFTER DELETE ON trigram_terms BEGIN
+            UPDATE trigram_df SET df = df - 1
+            WHERE gram IN (SELECT gram FROM trigrams WHERE term_id = old.id);
+            DELETE FROM trigrams WHERE term_id = old.id;
+        END;
+        """
+    )
+    conn.execute(
+        """
+        CREATE TRIGGER IF NOT EXISTS trigram_articles_ad AFTER DELETE ON articles BEGIN
+            DELETE FROM trigram_terms WHERE kind = 'article' AND object_id = old.id;
+        END;
+        """
+    )
+    conn.execute(
+        """
+        CREATE TRIGGER IF NOT EXISTS trigram_folders_ad AFTER DELETE ON folders BEGIN
+            DELETE FROM trigram_terms WHERE kind = 'folder' AND object_id = old.id;
+        END;
+        """
+    )
+    conn.execute(
+        """
+        CREATE TRIGGER IF NOT EXISTS trigram_projects_ad AFTER DELETE ON projects BEGIN
+            DELETE FROM trigram_terms WHERE project_id = old.id;
+        END;
+        """
+    )
 
-        # Prompts (structured fields for articles)
+    names = [("article", r["id"], r["project_id"], r["title"]) for r in conn.execute("SELECT id, project_id, title FROM articles;")]
+    names += [("folder", r["id"], r["project_id"], r["name"]) for r in conn.execute("SELECT id, project_id, name FROM folders;")]
+    names += [("media", None, project_id, path.name) for project_id, path in _v8_media_files(conn)]
+    df: dict[str, int] = {}
+    for kind, object_id, project_id, term in names:
+        term_id = conn.execute(
+            "INSERT INTO trigram_terms (kind, object_id, project_id, term) VALUES (?, ?, ?, ?);",
+            (kind, object_id, project_id, term),
+        ).lastrowid
+        grams = _v8_trigrams(term)
+        conn.executemany("INSERT INTO trigrams (gram, term_id) VALUES (?, ?);", [(g, term_id) for g in grams])
+        for gram in grams:
+            df[gram] = df.get(gram, 0) + 1
+    conn.executemany("INSERT INTO trigram_df (gram, df) VALUES (?, ?);", list(df.items()))
+
+
+def _migration_9_title_prefix_index(conn: sqlite3.Connection) -> None:
+    """Case-folded article titles with prefix indexes, for title suggestions."""
+    if not _has_column(conn, "articles", "title_norm"):
+        conn.execute("ALTER TABLE articles ADD COLUMN title_norm TEXT NOT NULL DEFAULT '';")
+    rows = conn.execute("SELECT id, title FROM articles;").fetchall()
+    conn.executemany(
+        "UPDATE articles SET title_norm = ? WHERE id = ?;",
+        [(_v8_normalize(r["title"]), r["id"]) for r in rows],
+    )
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_articles_title_norm ON articles(project_id, title_norm);")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_articles_type_title_norm ON articles(project_id, type_id, title_norm);")
+
+
+def _migration_10_media_table(conn: sqlite3.Connection) -> None:
+    """One row per media file with its metadata, so listings and counts don't scan folders."""
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS media (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            project_id INTEGER NOT NULL,
+            filename TEXT NOT NULL,
+            size INTEGER NOT NULL,
+            mime TEXT NOT NULL,
+            width INTEGER,
+            height INTEGER,
+            hash TEXT NOT NULL,
+            mtime REAL NOT NULL,
+            created_at TEXT NOT NULL,
+            UNIQUE(project_id, filename),
+            FOREIGN KEY(project_id) REFERENCES projects(id) ON DELETE CASCADE
+        );
+        """
+    )
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_media_project_filename_nocase ON media(project_id, filename COLLATE NOCASE);")
+    conn.execute(
+        """
+        CREATE TRIGGER IF NOT EXISTS trigram_media_ad AFTER DELETE ON media BEGIN
+            DELETE FROM trigram_terms
+            WHERE kind = 'media' AND project_id = old.project_id AND object_id IS NULL AND term = old.filename;
+        END;
+        """
+    )
+
+    # Describe the files already on disk; they stay where they are until migration 11
+    now = datetime.now(tz=timezone.utc).isoformat()
+    for project_id, path in _v8_media_files(conn):
+        with open(path, "rb") as f:
+            mime, width, height = _v10_read_image_info(f)
+        stat = path.stat()
         conn.execute(
             """
-            CREATE TABLE IF NOT EXISTS prompts (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                article_type_id INTEGER NOT NULL,
-                key TEXT NOT NULL,
-                text TEXT NOT NULL,
-                type TEXT NOT NULL,
-                linked_style_key TEXT,
-                created_at TEXT NOT NULL,
-                FOREIGN KEY(article_type_id) REFERENCES article_types(id) ON DELETE CASCADE,
-                UNIQUE(article_type_id, key)
-            );
-            """
+            INSERT OR IGNORE INTO media (project_id, filename, size, mime, width, height, hash, mtime, created_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?);
+            """,
+            (
+                project_id, path.name, stat.st_size,
+                mime or _V10_MIME_BY_EXT.get(path.suffix.lower(), "application/octet-stream"),
+                width, height, _v10_sha256(path), stat.st_mtime, now,
+            ),
         )
 
-        # Prompt values (answers to prompts for specific articles)
+
+def _migration_11_blob_store(conn: sqlite3.Connection) -> None:
+    """
+    Copy media files from the project folders into the shared blob store
+    (services/blob_store.py).
+
+    The originals stay until the migrations have committed (see
+    _remove_migrated_media): if anything rolls back, the media rows go
+    with it and a retry has to find the files where migration 10 did.
+    """
+    for project_id, path in _v8_media_files(conn):
+        # Rehashed in case the file changed after migration 10 described it
+        digest = _v10_sha256(path)
+        size = path.stat().st_size
+        target = _V11_BLOB_DIR / digest[:2] / digest
+        if target.exists():
+            os.utime(target)  # keeps blob_store.prune_blobs() off it
+        else:
+            target.parent.mkdir(parents=True, exist_ok=True)
+            # Through a temp file, so an interrupted copy never sits under the blob's name
+            fd, tmp_name = tempfile.mkstemp(dir=target.parent, prefix=".migrate-")
+            os.close(fd)
+            try:
+                shutil.copyfile(path, tmp_name)
+                os.replace(tmp_name, target)
+            except BaseException:
+                Path(tmp_name).unlink(missing_ok=True)
+                raise
         conn.execute(
-            """
-            CREATE TABLE IF NOT EXISTS prompt_values (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                article_id INTEGER NOT NULL,
-                prompt_id INTEGER NOT NULL,
-                value TEXT,
-                linked_article_id INTEGER,
-                created_at TEXT NOT NULL,
-                updated_at TEXT NOT NULL,
-                FOREIGN KEY(article_id) REFERENCES articles(id) ON DELETE CASCADE,
-                FOREIGN KEY(prompt_id) REFERENCES prompts(id) ON DELETE CASCADE,
-                FOREIGN KEY(linked_article_id) REFERENCES articles(id) ON DELETE SET NULL,
-                UNIQUE(article_id, prompt_id)
-            );
-            """
+            "UPDATE media SET hash = ?, size = ? WHERE project_id = ? AND filename = ?;",
+            (digest, size, project_id, path.name),
         )
 
-        # Indexes for prompt values
-        conn.execute("CREATE INDEX IF NOT EXISTS idx_prompt_values_article_id ON prompt_values(article_id);")
-        conn.execute("CREATE INDEX IF NOT EXISTS idx_prompt_values_prompt_id ON prompt_values(prompt_id);")
-
-        # Seed default prompts (idempotent)
-        from datetime import datetime
-        now = datetime.now().isoformat()
-        
-        for prompt_config in DEFAULT_PROMPTS_PER_ARTICLE_TYPE:
-            article_type_key = prompt_config["article_type_key"]
-            # Get the article type id
-            type_result = conn.execute(
-                "SELECT id FROM article_types WHERE key = ?",
-                (article_type_key,)
-            ).fetchone()
-            
-            if type_result:
-                type_id = type_result[0]
-                conn.execute(
-                    """
-                    INSERT OR IGNORE INTO prompts 
-                    (article_type_id, key, text, type, linked_style_key, created_at)
-                    VALUES (?, ?, ?, ?, ?, ?)
-                    """,
-                    (
-                        type_id,
-                        prompt_config["prompt_key"],
-                        prompt_config["prompt_text"],
-                        prompt_config["prompt_type"],
-                        prompt_config.get("prompt_linked_type_key"),
-                        now,
-                    ),
-                )
+
+def _remove_migrated_media() -> None:
+    """
+    Delete the project-folder originals of media that migration 11 copied
+    into the blob store, once that copy has committed. A file is only
+    removed if the blob its media row names holds the same bytes.
+    """
+    with db_conn() as conn:
+        files = _v8_media_files(conn)
+        hashes = {
+            (r["project_id"], r["filename"]): r["hash"]
+            for r in conn.execute("SELECT project_id, filename, hash FROM media;")
+        }
+    for project_id, path in files:
+        digest = hashes.get((project_id, path.name))
+        if digest and (_V11_BLOB_DIR / digest[:2] / digest).is_file() and _v10_sha256(path) == digest:
+            path.unlink(missing_ok=True)
+
+
+def _migration_12_folder_search_generation(conn: sqlite3.Connection) -> None:
+    """Folder writes invalidate cached searches too, now that search returns folders."""
+    bump = "UPDATE search_generation SET value = value + 1 WHERE id = 1;"
+    triggers = {
+        "search_generation_folders_ai": "AFTER INSERT ON folders",
+        "search_generation_folders_ad": "AFTER DELETE ON folders",
+        "search_generation_folders_au": "AFTER UPDATE OF name, slug, parent_id, project_id ON folders",
+    }
+    for name, event in triggers.items():
+        conn.execute(f"CREATE TRIGGER IF NOT EXISTS {name} {event} BEGIN {bump} END;")
+
+
+def _migration_13_word_breakdown_indexes(conn: sqlite3.Connection) -> None:
+    """Covering indexes for the per-type and per-folder word sums on the project page.
+
+    word_count was added by ALTER TABLE, so it sits after the bodies in each
+    row; with it in the index the GROUP BYs never touch the table.
+    """
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_articles_project_type_words ON articles(project_id, type_id, word_count);")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_articles_project_folder_words ON articles(project_id, folder_id, word_count);")
+    # Same leading columns as the new folder index, which serves its lookups
+    conn.execute("DROP INDEX IF EXISTS idx_articles_project_folder;")
+
+
+def _migration_14_name_prefix_indexes(conn: sqlite3.Connection) -> None:
+    """Case-insensitive indexes on folder names and media filenames across projects, for prefix search."""
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_folders_name_nocase ON folders(name COLLATE NOCASE);")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_media_filename_nocase ON media(filename COLLATE NOCASE);")
+
+
+def _migration_15_drop_text_offsets(conn: sqlite3.Connection) -> None:
+    """Drop articles.body_text_offsets: the plain-text to markdown anchors were written but never read."""
+    if _has_column(conn, "articles", "body_text_offsets"):
+        conn.execute("ALTER TABLE articles DROP COLUMN body_text_offsets;")
+
+
+# MIGRATIONS[n] upgrades a database from user_version n to n + 1
+MIGRATIONS = [
+    _migration_1_initial,
+    _migration_2_search_index,
+    _migration_3_render_cache,
+    _migration_4_project_stats,
+    _migration_5_listing_indexes,
+    _migration_6_plain_text,
+    _migration_7_search_generation,
+    _migration_8_trigram_index,
+    _migration_9_title_prefix_index,
+    _migration_10_media_table,
+    _migration_11_blob_store,
+    _migration_12_folder_search_generation,
+    _migration_13_word_breakdown_indexes,
+    _migration_14_name_prefix_indexes,
+    _migration_15_drop_text_offsets,
+]
+
+SCHEMA_VERSION = len(MIGRATIONS)
+
+
+def get_schema_version() -> int:
+    with db_conn() as conn:
+        return conn.execute("PRAGMA user_version;").fetchone()[0]
+
+
+def init_schema() -> None:
+    """Apply pending migrations; a no-op (one PRAGMA read) when the schema is current."""
+    if get_schema_version() >= SCHEMA_VERSION:
+        return
+
+    with db_conn() as conn:
+        # Serialize concurrently booting workers; re-check once we hold the write lock
+        conn.execute("BEGIN IMMEDIATE;")
+        version = conn.execute("PRAGMA user_version;").fetchone()[0]
+        for step, migration in enumerate(MIGRATIONS[version:], start=version + 1):
+            migration(conn)
+            conn.execute(f"PRAGMA user_version = {step};")
+
+    # Migration 11 only copied the media files; the originals can go now that it is committed
+    if version < 11:
+        _remove_migrated_media()
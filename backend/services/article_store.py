@@ -2,9 +2,12 @@ from __future__ import annotations
 
 import re
 from datetime import datetime, timezone
-from typing import Any, Optional
+from typing import Any, Iterator, Optional
 
 from db import db_conn
+from services.fuzzy_index import index_terms, normalize_term, word_prefix_lookup
+from services.plain_text import markdown_to_text
+from services.project_store import invalidate_project_cache
 
 
 def slugify(text: str) -> str:
@@ -14,6 +17,15 @@ def slugify(text: str) -> str:
     return s or "article"
 
 
+def text_columns(body_content: str | None) -> tuple[str, int, int]:
+    """
+    Columns stored alongside an article body: its plain text and the word
+    and character counts of the plain text.
+    """
+    body_text = markdown_to_text(body_content)
+    return body_text, len(body_text.split()), len(body_text)
+
+
 def list_article_types() -> list[dict[str, Any]]:
     with db_conn() as conn:
         rows = conn.execute(
@@ -86,14 +98,17 @@ def create_article(
     now = datetime.now(tz=timezone.utc).isoformat()
     base_slug = slugify(title)
     slug = unique_article_slug(project_id, base_slug)
+    body_text, word_count, char_count = text_columns(body_content)
 
     with db_conn() as conn:
         conn.execute(
             """
-            INSERT INTO articles (project_id, folder_id, type_id, slug, title, body_content, featured_image, created_at, updated_at)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?);
+            INSERT INTO articles (project_id, folder_id, type_id, slug, title, title_norm, body_content, featured_image,
+                                  body_text, word_count, char_count, created_at, updated_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?);
             """,
-            (project_id, folder_id, type_row["id"], slug, title, body_content, featured_image, now, now),
+            (project_id, folder_id, type_row["id"], slug, title, normalize_term(title), body_content, featured_image,
+             body_text, word_count, char_count, now, now),
         )
         row = conn.execute(
             """
@@ -106,9 +121,154 @@ def create_article(
             """,
             (project_id, slug),
         ).fetchone()
+        index_terms(conn, "article", [(row["id"], project_id, title)])
 
+    # New slug can resolve previously broken links (render_epoch changed)
+    invalidate_project_cache(project_id)
     return dict(row)
 
+# Columns the article listing API may return, keyed by public field name
+ARTICLE_LIST_FIELDS = {
+    "id": "a.id",
+    "slug": "a.slug",
+    "title": "a.title",
+    "folder_id": "a.folder_id",
+    "type_key": "t.key",
+    "type_name": "t.name",
+    "updated_at": "a.updated_at",
+}
+
+
+def iter_project_articles(
+    project_id: int,
+    *,
+    fields: list[str],
+    type_key: str | None = None,
+    exclude_id: int | None = None,
+    after: tuple[str, int] | None = None,
+    limit: int | None = None,
+    batch_size: int = 500,
+) -> Iterator[dict[str, Any]]:
+    """
+    Yield a project's articles ordered by (title, id), fetching in batches.
+
+    Pagination is keyset based: pass the (title, id) of the last article
+    seen as `after` to continue from there, so every page costs an index
+    seek regardless of how deep it is. Unknown fields raise ValueError
+    immediately rather than on first iteration.
+    """
+    unknown = [f for f in fields if f not in ARTICLE_LIST_FIELDS]
+    if unknown:
+        raise ValueError(f"Unknown field(s): {', '.join(unknown)}")
+
+    # title and id are always selected; they drive the cursor
+    columns = {"id": "a.id", "title": "a.title"}
+    columns.update((f, ARTICLE_LIST_FIELDS[f]) for f in fields)
+    select = ", ".join(f"{expr} AS {name}" for name, expr in columns.items())
+
+    query = f"""
+        SELECT {select}
+        FROM articles a
+        JOIN article_types t ON a.type_id = t.id
+        WHERE a.project_id = ?
+    """
+    params: list[Any] = [project_id]
+
+    if type_key:
+        query += " AND t.key = ?"
+        params.append(type_key)
+    if exclude_id:
+        query += " AND a.id != ?"
+        params.append(exclude_id)
+    if after:
+        query += " AND (a.title, a.id) > (?, ?)"
+        params.extend(after)
+
+    query += " ORDER BY a.title ASC, a.id ASC"
+    if limit is not None:
+        query += " LIMIT ?"
+        params.append(limit)
+
+    return _iter_rows(query + ";", params, batch_size)
+
+# Shortest query whose matches on later title words are suggested too
+SUGGEST_WORD_MIN_CHARS = 3
+
+
+def suggest_articles(
+    project_id: int,
+    query: str,
+    *,
+    type_key: str | None = None,
+    exclude_id: int | None = None,
+    limit: int = 10,
+) -> list[dict[str, Any]]:
+    """
+    Typeahead matches for a title: articles whose title starts with the
+    query, then ones with a later word starting with it.
+
+    Titles are matched on title_norm (lowercase, accents and punctuation
+    folded, see normalize_term), so the first group is a range seek on
+    the project's title index and stays cheap however many articles the
+    project has. Later-word matches come from the trigram index and only
+    for queries of SUGGEST_WORD_MIN_CHARS or more. An empty query lists
+    the first titles alphabetically.
+    """
+    prefix = normalize_term(query)
+    # normalize_term only emits [0-9a-z ], so this bounds every string starting with prefix
+    upper = prefix + "\x7f"
+    filters = "a.project_id = ?"
+    params: list[Any] = [project_id]
+    if type_key:
+        filters += " AND a.type_id = (SELECT id FROM article_types WHERE key = ?)"
+        params.append(type_key)
+    if exclude_id:
+        filters += " AND a.id != ?"
+        params.append(exclude_id)
+
+    select = """
+        SELECT a.id, a.slug, a.title, t.key AS type_key, t.name AS type_name
+        FROM articles a
+        JOIN article_types t ON a.type_id = t.id
+    """
+    with db_conn() as conn:
+        rows = conn.execute(
+            f"""
+            {select}
+            WHERE {filters} AND a.title_norm >= ? AND a.title_norm < ?
+            ORDER BY a.title_norm, a.id
+            LIMIT ?;
+            """,
+            (*params, prefix, upper, limit),
+        ).fetchall()
+        remaining = limit - len(rows)
+        if len(prefix) >= SUGGEST_WORD_MIN_CHARS and remaining > 0:
+            ids = word_prefix_lookup("article", project_id, prefix)
+            if ids:
+                placeholders = ",".join("?" for _ in ids)
+                rows += conn.execute(
+                    f"""
+                    {select}
+                    WHERE {filters} AND a.id IN ({placeholders}) AND NOT (a.title_norm >= ? AND a.title_norm < ?)
+                    ORDER BY a.title_norm, a.id
+                    LIMIT ?;
+                    """,
+                    (*params, *ids, prefix, upper, remaining),
+                ).fetchall()
+    return [dict(r) for r in rows]
+
+
+def _iter_rows(query: str, params: list[Any], batch_size: int) -> Iterator[dict[str, Any]]:
+    with db_conn() as conn:
+        cursor = conn.execute(query, params)
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                break
+            for row in rows:
+                yield dict(row)
+
+
 def get_article_by_id(article_id: int) -> Optional[dict[str, Any]]:
     with db_conn() as conn:
         row = conn.execute(
@@ -146,10 +306,15 @@ def get_article_full(article_id: int) -> Optional[dict[str, Any]]:
 def update_article_content(article_id: int, body_content: str) -> None:
     """Update the markdown content of an article."""
     now = datetime.now(tz=timezone.utc).isoformat()
+    body_text, word_count, char_count = text_columns(body_content)
     with db_conn() as conn:
         conn.execute(
-            "UPDATE articles SET body_content = ?, updated_at = ? WHERE id = ?;",
-            (body_content, now, article_id),
+            """
+            UPDATE articles
+            SET body_content = ?, body_text = ?, word_count = ?, char_count = ?, updated_at = ?
+            WHERE id = ?;
+            """,
+            (body_content, body_text, word_count, char_count, now, article_id),
         )
 
 
@@ -172,7 +337,10 @@ def update_article_featured_image(article_id: int, featured_image: str | None) -
 def delete_article(article_id: int) -> None:
     """Delete an article from the database."""
     with db_conn() as conn:
+        row = conn.execute("SELECT project_id FROM articles WHERE id = ?;", (article_id,)).fetchone()
         conn.execute("DELETE FROM articles WHERE id = ?;", (article_id,))
+    if row:
+        invalidate_project_cache(row["project_id"])
 
 
 def rename_article(article_id: int, new_title: str) -> dict[str, Any]:
@@ -204,8 +372,8 @@ def rename_article(article_id: int, new_title: str) -> dict[str, Any]:
     
     with db_conn() as conn:
         conn.execute(
-            "UPDATE articles SET title = ?, slug = ?, updated_at = ? WHERE id = ?;",
-            (new_title, new_slug, now, article_id),
+            "UPDATE articles SET title = ?, title_norm = ?, slug = ?, updated_at = ? WHERE id = ?;",
+            (new_title, normalize_term(new_title), new_slug, now, article_id),
         )
         row = conn.execute(
             """
@@ -218,5 +386,7 @@ def rename_article(article_id: int, new_title: str) -> dict[str, Any]:
             """,
             (article_id,),
         ).fetchone()
+        index_terms(conn, "article", [(article_id, article["project_id"], new_title)])
     
+    invalidate_project_cache(article["project_id"])
     return dict(row)
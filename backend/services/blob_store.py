@@ -0,0 +1,103 @@
+"""
+Content-addressed file storage shared by all projects.
+
+Each distinct file is stored once, named by its SHA-256:
+  data/blobs/<first two hex digits>/<sha256>
+The media table maps user-facing names to these hashes, so the same
+image uploaded under several names or into several projects takes the
+space of one.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import os
+import tempfile
+import time
+from pathlib import Path
+from typing import BinaryIO, Iterable
+
+BLOB_DIR = Path("data/blobs")
+CHUNK_SIZE = 1024 * 1024
+# prune_blobs() leaves blobs this recent alone: an upload stores its blob before its media row exists
+PRUNE_GRACE_SECONDS = 3600
+
+
+def blob_path(digest: str) -> Path:
+    return BLOB_DIR / digest[:2] / digest
+
+
+def _put(tmp_path: Path, digest: str) -> None:
+    """Move a finished temp file into place, or drop it if the blob is already stored."""
+    target = blob_path(digest)
+    if target.exists():
+        tmp_path.unlink()
+        os.utime(target)  # counts as recent for prune_blobs()
+        return
+    target.parent.mkdir(parents=True, exist_ok=True)
+    os.replace(tmp_path, target)
+
+
+def store_stream(stream: BinaryIO) -> tuple[str, int]:
+    """
+    Copy a stream into the store, hashing as it is written.
+
+    The data goes to a temp file inside the store (same filesystem, so
+    the final rename is atomic) and is discarded if an identical blob
+    already exists. Returns (sha256, size).
+    """
+    BLOB_DIR.mkdir(parents=True, exist_ok=True)
+    digest = hashlib.sha256()
+    size = 0
+    fd, tmp_name = tempfile.mkstemp(dir=BLOB_DIR, prefix=".upload-")
+    try:
+        with os.fdopen(fd, "wb") as tmp:
+            while chunk := stream.read(CHUNK_SIZE):
+                digest.update(chunk)
+                tmp.write(chunk)
+                size += len(chunk)
+        _put(Path(tmp_name), digest.hexdigest())
+    except BaseException:
+        Path(tmp_name).unlink(missing_ok=True)
+        raise
+    return digest.hexdigest(), size
+
+
+def adopt_file(path: Path) -> tuple[str, int]:
+    """Move an existing file into the store (removing it from where it was). Returns (sha256, size)."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        while chunk := f.read(CHUNK_SIZE):
+            digest.update(chunk)
+    size = path.stat().st_size
+    target = blob_path(digest.hexdigest())
+    if target.exists():
+        path.unlink()
+        os.utime(target)
+    else:
+        target.parent.mkdir(parents=True, exist_ok=True)
+        try:
+            os.replace(path, target)
+        except OSError:
+            # Different filesystem: copy through a temp file in the store instead
+            with open(path, "rb") as f:
+                store_stream(f)
+            path.unlink()
+    return digest.hexdigest(), size
+
+
+def prune_blobs(referenced: Iterable[str]) -> int:
+    """Delete stored blobs whose hash isn't in `referenced`. Returns how many were removed."""
+    keep = set(referenced)
+    cutoff = time.time() - PRUNE_GRACE_SECONDS
+    removed = 0
+    if not BLOB_DIR.is_dir():
+        return 0
+    for shard in BLOB_DIR.iterdir():
+        if not shard.is_dir():
+            continue
+        for blob in shard.iterdir():
+            if blob.name not in keep and blob.stat().st_mtime < cutoff:
+                blob.unlink(missing_ok=True)
+                removed += 1
+    return removed
@@ -0,0 +1,207 @@
+"""Streaming project export: a zip of markdown articles, media and a manifest."""
+
+from __future__ import annotations
+
+import json
+import time
+import zipfile
+from datetime import datetime, timezone
+from typing import Any, Iterator, Optional
+
+from db import db_conn
+from services.blob_store import blob_path
+from services.media_store import list_media
+
+# Articles fetched (and prompt values looked up) per round trip
+EXPORT_BATCH_SIZE = 500
+# Read size when copying media into the archive
+MEDIA_CHUNK_SIZE = 1024 * 1024
+
+
+class _ZipStream:
+    """
+    Write-only, non-seekable file object that hands written bytes back out.
+
+    zipfile detects the missing seek() and writes data descriptors instead
+    of going back to patch headers, so the archive can be produced
+    front to back and streamed as it is built.
+    """
+
+    def __init__(self):
+        self._chunks: list[bytes] = []
+        self._position = 0
+
+    def write(self, data) -> int:
+        data = bytes(data)
+        self._chunks.append(data)
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def flush(self) -> None:
+        pass
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def _front_matter(meta: dict[str, Any]) -> str:
+    """YAML front-matter; values are JSON encoded, which YAML parses as-is."""
+    lines = ["---"]
+    for key, value in meta.items():
+        if isinstance(value, dict):
+            lines.append(f"{key}:")
+            lines.extend(f"  {json.dumps(k)}: {json.dumps(v, ensure_ascii=False)}" for k, v in value.items())
+        else:
+            lines.append(f"{key}: {json.dumps(value, ensure_ascii=False)}")
+    lines.append("---")
+    return "\n".join(lines) + "\n\n"
+
+
+def _safe_part(name: str) -> str:
+    return name.replace("/", "-").replace("\\", "-").strip() or "untitled"
+
+
+def _folder_paths(conn, project_id: int) -> dict[Optional[int], str]:
+    """Map folder id to its path under content/, using folder names."""
+    rows = {
+        r["id"]: (r["parent_id"], _safe_part(r["name"]))
+        for r in conn.execute("SELECT id, parent_id, name FROM folders WHERE project_id = ?;", (project_id,))
+    }
+    paths: dict[Optional[int], str] = {None: "content"}
+
+    def path_of(folder_id):
+        if folder_id not in paths:
+            parent_id, name = rows[folder_id]
+            paths[folder_id] = f"{path_of(parent_id)}/{name}"
+        return paths[folder_id]
+
+    for folder_id in rows:
+        path_of(folder_id)
+    return paths
+
+
+def _prompt_values(conn, article_ids: list[int]) -> dict[int, dict[str, Any]]:
+    placeholders = ",".join("?" for _ in article_ids)
+    values: dict[int, dict[str, Any]] = {}
+    for r in conn.execute(
+        f"""
+        SELECT pv.article_id, p.key, pv.value, la.slug AS linked_slug
+        FROM prompt_values pv
+        JOIN prompts p ON pv.prompt_id = p.id
+        LEFT JOIN articles la ON pv.linked_article_id = la.id
+        WHERE pv.article_id IN ({placeholders})
+          AND (pv.value IS NOT NULL OR pv.linked_article_id IS NOT NULL);
+        """,
+        article_ids,
+    ):
+        value = f"article:{r['linked_slug']}" if r["linked_slug"] else r["value"]
+        values.setdefault(r["article_id"], {})[r["key"]] = value
+    return values
+
+
+def parse_since(text: str) -> datetime:
+    """
+    Read an export `since` timestamp. Values without an offset are taken
+    as UTC, like the timestamps the app stores. Raises ValueError.
+    """
+    since = datetime.fromisoformat(text)
+    if since.tzinfo is None:
+        since = since.replace(tzinfo=timezone.utc)
+    return since
+
+
+def export_project_zip(project: dict[str, Any], since: datetime | None = None) -> Iterator[bytes]:
+    """
+    Yield a zip archive of the project chunk by chunk.
+
+    Layout:
+      content/<folder path>/<slug>.md   markdown with front-matter
+      media/<filename>                   project media, copied in 1 MB chunks
+      manifest.json                      every article and media file, plus exported_at
+
+    With `since` (see parse_since; e.g. a previous manifest's exported_at)
+    only articles and media changed after it are included; the manifest
+    still lists everything so deletions can be detected.
+    """
+    project_id = int(project["id"])
+    exported_at = datetime.now(tz=timezone.utc).isoformat()
+    # Stored timestamps are UTC isoformat strings, so SQL can compare them as text in that form only
+    since_iso = since.astimezone(timezone.utc).isoformat() if since else None
+    since_ts = since.timestamp() if since else None
+    stream = _ZipStream()
+    manifest: dict[str, Any] = {
+        "project": {k: project[k] for k in ("slug", "name", "genre", "created_at")},
+        "exported_at": exported_at,
+        "since": since_iso,
+        "articles": [],
+        "media": [],
+    }
+
+    with zipfile.ZipFile(stream, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+        with db_conn() as conn:
+            folder_paths = _folder_paths(conn, project_id)
+            description = project.get("description") or ""
+            if description:
+                archive.writestr("content/_project.md", description)
+
+            cursor = conn.execute(
+                """
+                SELECT a.id, a.folder_id, a.slug, a.title, a.body_content, a.featured_image,
+                       a.created_at, a.updated_at, t.key AS type_key,
+                       (? IS NULL OR a.updated_at > ? OR EXISTS (
+                            SELECT 1 FROM prompt_values pv WHERE pv.article_id = a.id AND pv.updated_at > ?
+                       )) AS changed
+                FROM articles a
+                JOIN article_types t ON a.type_id = t.id
+                WHERE a.project_id = ?
+                ORDER BY a.id;
+                """,
+                (since_iso, since_iso, since_iso, project_id),
+            )
+            while True:
+                rows = cursor.fetchmany(EXPORT_BATCH_SIZE)
+                if not rows:
+                    break
+                changed = [r for r in rows if r["changed"]]
+                prompts = _prompt_values(conn, [r["id"] for r in changed]) if changed else {}
+
+                for r in rows:
+                    path = f"{folder_paths[r['folder_id']]}/{r['slug']}.md"
+                    manifest["articles"].append(
+                        {"id": r["id"], "slug": r["slug"], "path": path, "updated_at": r["updated_at"]}
+                    )
+                    if not r["changed"]:
+                        continue
+                    meta = {
+                        "title": r["title"],
+                        "type": r["type_key"],
+                        "featured_image": r["featured_image"],
+                        "created_at": r["created_at"],
+                        "updated_at": r["updated_at"],
+                        "prompts": prompts.get(r["id"], {}),
+                    }
+                    archive.writestr(path, _front_matter(meta) + (r["body_content"] or ""))
+                yield stream.drain()
+
+        for item in sorted(list_media(project), key=lambda m: m["filename"]):
+            manifest["media"].append({"filename": item["filename"], "size": item["size"], "mtime": item["mtime"]})
+            if since_ts is not None and item["mtime"] <= since_ts:
+                continue
+            path = blob_path(item["hash"])
+            info = zipfile.ZipInfo(f"media/{item['filename']}", time.localtime(item["mtime"])[:6])
+            info.file_size = item["size"]  # lets zipfile decide on zip64 up front
+            info.external_attr = 0o644 << 16
+            info.compress_type = zipfile.ZIP_STORED  # images are already compressed
+            with open(path, "rb") as src, archive.open(info, "w") as dest:
+                while chunk := src.read(MEDIA_CHUNK_SIZE):
+                    dest.write(chunk)
+                    yield stream.drain()
+
+        archive.writestr("manifest.json", json.dumps(manifest, indent=2, ensure_ascii=False))
+
+    yield stream.drain()
@@ -7,6 +7,7 @@ from datetime import datetime, timezone
 from typing import Any, Optional
 
 from db import db_conn
+from services.fuzzy_index import index_terms
 
 
 def slugify(text: str) -> str:
@@ -102,6 +103,7 @@ def create_folder(
             """,
             (project_id, parent_id, slug),
         ).fetchone()
+        index_terms(conn, "folder", [(row["id"], project_id, name)])
 
     return dict(row)
 
@@ -116,70 +118,41 @@ def get_folder_by_id(folder_id: int) -> Optional[dict[str, Any]]:
     return dict(row) if row else None
 
 
-def get_folders_tree(project_id: int) -> dict[str, Any]:
+def get_folder_level(project_id: int, parent_id: Optional[int]) -> dict[str, Any]:
     """
-    Build a hierarchical tree of folders for a project.
-    Returns a nested dict structure suitable for rendering in templates.
+    One level of the folder tree: the direct subfolders of parent_id (with
+    their subfolder and article counts) and the articles directly inside it.
+    The project page renders the root level and the sidebar fetches the rest on expand.
     """
     with db_conn() as conn:
-        # Fetch all folders for this project
         folders = conn.execute(
-            "SELECT id, parent_id, name, slug FROM folders WHERE project_id = ? ORDER BY name ASC;",
-            (project_id,),
+            """
+            SELECT f.id, f.parent_id, f.name, f.slug,
+                   (SELECT COUNT(*) FROM folders c WHERE c.project_id = f.project_id AND c.parent_id = f.id)
+                       AS folder_count,
+                   (SELECT COUNT(*) FROM articles a WHERE a.project_id = f.project_id AND a.folder_id = f.id)
+                       AS article_count
+            FROM folders f
+            WHERE f.project_id = ? AND f.parent_id IS ?
+            ORDER BY f.name ASC;
+            """,
+            (project_id, parent_id),
         ).fetchall()
-        
-        # Fetch all articles with their folder associations
+
         articles = conn.execute(
             """
             SELECT a.id, a.folder_id, a.title, a.slug, a.created_at
             FROM articles a
-            WHERE a.project_id = ?
+            WHERE a.project_id = ? AND a.folder_id IS ?
             ORDER BY a.created_at DESC;
             """,
-            (project_id,),
+            (project_id, parent_id),
         ).fetchall()
 
-    # Convert to dicts
-    folder_list = [dict(f) for f in folders]
-    article_list = [dict(a) for a in articles]
-
-    # Group articles by folder_id
-    articles_by_folder = {}
-    for article in article_list:
-        folder_id = article["folder_id"]
-        if folder_id not in articles_by_folder:
-            articles_by_folder[folder_id] = []
-        articles_by_folder[folder_id].append(article)
-
-    # Build nested structure
-    def build_tree_recursive(parent_id: Optional[int]) -> dict[str, Any]:
-        # Get immediate children of this parent
-        children = [f for f in folder_list if f["parent_id"] == parent_id]
-        
-        return {
-            "folders": [
-                {
-                    "id": child["id"],
-                    "name": child["name"],
-                    "slug": child["slug"],
-                    "articles": articles_by_folder.get(child["id"], []),
-                    **build_tree_recursive(child["id"]),
-                }
-                for child in children
-            ]
-        }
-
-    # Root level (parent_id = None)
-    tree_data = build_tree_recursive(None)
-    
-    # Add root articles (articles with folder_id = None)
-    root_articles = articles_by_folder.get(None, [])
-    
     return {
-        "id": None,
-        "name": "Root",
-        "articles": root_articles,
-        "folders": tree_data["folders"],
+        "parent_id": parent_id,
+        "folders": [dict(f) for f in folders],
+        "articles": [dict(a) for a in articles],
     }
 
 
@@ -274,5 +247,6 @@ def rename_folder(folder_id: int, new_name: str) -> dict[str, Any]:
             "SELECT id, project_id, parent_id, name, slug, created_at FROM folders WHERE id = ? LIMIT 1;",
             (folder_id,),
         ).fetchone()
+        index_terms(conn, "folder", [(folder_id, folder["project_id"], new_name)])
     
     return dict(row)
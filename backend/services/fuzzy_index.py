@@ -0,0 +1,222 @@
+"""
+Trigram index for typo-tolerant lookups of short names: article titles,
+folder names and media filenames.
+
+Each indexed name is a row in trigram_terms; its trigrams are postings in
+trigrams (gram, term_id), and trigram_df counts postings per gram. A
+lookup reads the postings of the query's rarest grams, up to a fixed
+budget, and keeps the names sharing most of them; only those are scored
+against all of the query's grams, also in SQL. Common grams ("  a",
+"or ") are left out once the budget is spent: they say little about
+which name was meant and would otherwise make a misspelled query read a
+large share of the index. Deletes are handled by triggers; inserts and
+renames go through index_terms() because SQL can't split names into
+grams.
+"""
+
+from __future__ import annotations
+
+import math
+import re
+import unicodedata
+from typing import Any, Iterable, Optional
+
+from db import db_conn
+
+# Fraction of the query's trigrams a name must contain to be a candidate
+DEFAULT_THRESHOLD = 0.5
+# Postings one fuzzy_lookup() reads, rarest grams first (the rarest is always read)
+FUZZY_MAX_POSTINGS = 10_000
+# Names, by shared rare grams, that fuzzy_lookup() scores against every query gram
+FUZZY_MAX_CANDIDATES = 500
+# Postings read by one word_prefix_lookup(), so a common gram can't turn it into a scan
+WORD_PREFIX_MAX_CANDIDATES = 2000
+
+_NON_ALNUM_RE = re.compile(r"[^0-9a-z]+")
+
+
+def normalize_term(text: str) -> str:
+    """Lowercase, strip accents and turn punctuation into word breaks ("Qel'tharan" -> "qel tharan")."""
+    text = unicodedata.normalize("NFKD", text or "")
+    text = "".join(c for c in text if not unicodedata.combining(c)).lower()
+    return _NON_ALNUM_RE.sub(" ", text).strip()
+
+
+def trigrams(text: str) -> set[str]:
+    """Trigrams of every word, padded so word starts and ends count ("  a", " as", ..., "ll ")."""
+    grams = set()
+    for word in normalize_term(text).split():
+        padded = f"  {word} "
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+def index_terms(conn, kind: str, rows: Iterable[tuple[Optional[int], int, str]]) -> None:
+    """
+    Add or replace names in the index, inside the caller's transaction.
+
+    rows are (object_id, project_id, name). Media files have no id and
+    pass None; they're keyed by (project_id, name) instead.
+    """
+    for object_id, project_id, name in rows:
+        if object_id is None:
+            conn.execute(
+                "DELETE FROM trigram_terms WHERE kind = ? AND project_id = ? AND object_id IS NULL AND term = ?;",
+                (kind, project_id, name),
+            )
+        else:
+            conn.execute("DELETE FROM trigram_terms WHERE kind = ? AND object_id = ?;", (kind, object_id))
+        term_id = conn.execute(
+            "INSERT INTO trigram_terms (kind, object_id, project_id, term) VALUES (?, ?, ?, ?);",
+            (kind, object_id, project_id, name),
+        ).lastrowid
+        grams = [(gram, term_id) for gram in trigrams(name)]
+        conn.executemany("INSERT INTO trigrams (gram, term_id) VALUES (?, ?);", grams)
+        conn.executemany(
+            """
+            INSERT INTO trigram_df (gram, df) VALUES (?, 1)
+            ON CONFLICT(gram) DO UPDATE SET df = df + 1;
+            """,
+            [(gram,) for gram, _ in grams],
+        )
+
+
+def rebuild_fuzzy_index(conn, media: Iterable[tuple[int, str]] = ()) -> None:
+    """Re-index every article title and folder name, plus the given (project_id, filename) media."""
+    conn.execute("DELETE FROM trigrams;")
+    conn.execute("DELETE FROM trigram_df;")
+    conn.execute("DELETE FROM trigram_terms;")
+    index_terms(conn, "article", conn.execute("SELECT id, project_id, title FROM articles;").fetchall())
+    index_terms(conn, "folder", conn.execute("SELECT id, project_id, name FROM folders;").fetchall())
+    index_terms(conn, "media", ((None, project_id, filename) for project_id, filename in media))
+
+
+def word_prefix_lookup(kind: str, project_id: int, prefix: str) -> list[int]:
+    """
+    Ids of names of the given kind in a project with a word after the
+    first that starts with prefix (already normalized), e.g. "har" finds
+    "Northern Harbor".
+
+    The postings of the prefix's rarest gram drive the lookup (CROSS JOIN
+    keeps the planner from walking every name in the project instead), at
+    most WORD_PREFIX_MAX_CANDIDATES names are read, and they are checked
+    in Python.
+    """
+    words = prefix.split()
+    if not words:
+        return []
+    # Whole words are padded at both ends; the last one may be cut short, so only at its start
+    grams = set().union(*(trigrams(w) for w in words[:-1]))
+    start = f"  {words[-1]}"
+    grams.update(start[i:i + 3] for i in range(len(start) - 2))
+
+    with db_conn() as conn:
+        placeholders = ",".join("?" for _ in grams)
+        df = {
+            r["gram"]: r["df"]
+            for r in conn.execute(f"SELECT gram, df FROM trigram_df WHERE gram IN ({placeholders});", list(grams))
+        }
+        if len(df) < len(grams):
+            return []  # some gram occurs nowhere, so no name can match
+        rows = conn.execute(
+            """
+            SELECT t.object_id, t.term
+            FROM trigrams g
+            CROSS JOIN trigram_terms t ON t.id = g.term_id
+            WHERE g.gram = ? AND t.kind = ? AND t.project_id = ?
+            LIMIT ?;
+            """,
+            (min(df, key=df.get), kind, project_id, WORD_PREFIX_MAX_CANDIDATES),
+        ).fetchall()
+    needle = f" {prefix}"
+    return [r["object_id"] for r in rows if f" {normalize_term(r['term'])}".find(needle, 1) != -1]
+
+
+def fuzzy_lookup(
+    kind: str,
+    query: str,
+    *,
+    limit: int = 10,
+    threshold: float = DEFAULT_THRESHOLD,
+    exclude_ids: Iterable[int] = (),
+) -> list[dict[str, Any]]:
+    """
+    Names of the given kind that approximately contain the query, best first.
+
+    score is the share of the query's trigrams found in the name, so
+    "ashfal" scores 0.86 against "Ashfall Empire"; ties go to the name
+    closest in length (Jaccard similarity). Returns dicts with kind,
+    object_id, project_id, term and score.
+    """
+    query_grams = trigrams(query)
+    if not query_grams:
+        return []
+    needed = max(1, math.ceil(threshold * len(query_grams)))
+    excluded = set(exclude_ids)
+
+    with db_conn() as conn:
+        placeholders = ",".join("?" for _ in query_grams)
+        df = {
+            r["gram"]: r["df"]
+            for r in conn.execute(f"SELECT gram, df FROM trigram_df WHERE gram IN ({placeholders});", list(query_grams))
+        }
+        # Grams nobody has can't help; if too few remain, nothing can reach the threshold
+        present = sorted((g for g in query_grams if df.get(g)), key=df.get)
+        if len(present) < needed:
+            return []
+        probe, postings = [], 0
+        for gram in present:
+            if probe and postings + df[gram] > FUZZY_MAX_POSTINGS:
+                break
+            probe.append(gram)
+            postings += df[gram]
+
+        probe_placeholders = ",".join("?" for _ in probe)
+        query_placeholders = ",".join("?" for _ in query_grams)
+        rows = conn.execute(
+            f"""
+            WITH candidates AS (
+                SELECT t.id
+                FROM (
+                    SELECT term_id, COUNT(*) AS shared
+                    FROM trigrams
+                    WHERE gram IN ({probe_placeholders})
+                    GROUP BY term_id
+                ) c
+                JOIN trigram_terms t ON t.id = c.term_id
+                WHERE t.kind = ?
+                ORDER BY c.shared DESC, t.id
+                LIMIT ?
+            ),
+            scored AS (
+                SELECT g.term_id, SUM(g.gram IN ({query_placeholders})) AS shared, COUNT(*) AS grams
+                FROM candidates
+                JOIN trigrams g ON g.term_id = candidates.id
+                GROUP BY g.term_id
+            )
+            SELECT t.object_id, t.project_id, t.term, s.shared,
+                   s.shared * 1.0 / (s.grams + ? - s.shared) AS similarity
+            FROM scored s
+            JOIN trigram_terms t ON t.id = s.term_id
+            WHERE s.shared >= ?
+            ORDER BY s.shared DESC, similarity DESC, t.term
+            LIMIT ?;
+            """,
+            (
+                *probe, kind, FUZZY_MAX_CANDIDATES, *query_grams,
+                len(query_grams), needed, limit + len(excluded),
+            ),
+        ).fetchall()
+
+    return [
+        {
+            "kind": kind,
+            "object_id": r["object_id"],
+            "project_id": r["project_id"],
+            "term": r["term"],
+            "score": round(r["shared"] / len(query_grams), 3),
+            "similarity": r["similarity"],
+        }
+        for r in rows
+        if r["object_id"] not in excluded
+    ][:limit]
@@ -0,0 +1,98 @@
+"""
+Image type and dimensions from file headers.
+
+Only the first few bytes (JPEG: up to the frame header) are read, so
+this works on any size of file without decoding pixels or needing an
+imaging library.
+"""
+
+from __future__ import annotations
+
+import struct
+from typing import BinaryIO, Optional
+
+MIME_BY_EXT = {
+    ".png": "image/png",
+    ".jpg": "image/jpeg",
+    ".jpeg": "image/jpeg",
+    ".gif": "image/gif",
+    ".webp": "image/webp",
+}
+
+# JPEG start-of-frame markers (C4, C8 and CC are not frames)
+_JPEG_SOF = {0xC0, 0xC1, 0xC2, 0xC3, 0xC5, 0xC6, 0xC7, 0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF}
+
+
+def _png(f: BinaryIO, head: bytes) -> Optional[tuple[int, int]]:
+    if head[12:16] != b"IHDR":
+        return None
+    return struct.unpack(">II", head[16:24])
+
+
+def _gif(f: BinaryIO, head: bytes) -> Optional[tuple[int, int]]:
+    return struct.unpack("<HH", head[6:10])
+
+
+def _webp(f: BinaryIO, head: bytes) -> Optional[tuple[int, int]]:
+    chunk = head[12:16]
+    if chunk == b"VP8 " and head[23:26] == b"\x9d\x01\x2a":
+        w, h = struct.unpack("<HH", head[26:30])
+        return w & 0x3FFF, h & 0x3FFF
+    if chunk == b"VP8L" and head[20] == 0x2F:
+        bits = int.from_bytes(head[21:25], "little")
+        return (bits & 0x3FFF) + 1, ((bits >> 14) & 0x3FFF) + 1
+    if chunk == b"VP8X":
+        return int.from_bytes(head[24:27], "little") + 1, int.from_bytes(head[27:30], "little") + 1
+    return None
+
+
+def _jpeg(f: BinaryIO, head: bytes) -> Optional[tuple[int, int]]:
+    f.seek(2)
+    while True:
+        byte = f.read(1)
+        while byte and byte != b"\xff":
+            byte = f.read(1)
+        while byte == b"\xff":
+            byte = f.read(1)
+        if not byte:
+            return None
+        marker = byte[0]
+        if marker in (0xD8, 0x01) or 0xD0 <= marker <= 0xD7:
+            continue  # standalone markers carry no length
+        length_bytes = f.read(2)
+        if len(length_bytes) < 2:
+            return None
+        length = struct.unpack(">H", length_bytes)[0]
+        if marker in _JPEG_SOF:
+            frame = f.read(5)
+            if len(frame) < 5:
+                return None
+            h, w = struct.unpack(">HH", frame[1:5])
+            return w, h
+        f.seek(length - 2, 1)
+
+
+def read_image_info(f: BinaryIO) -> tuple[Optional[str], Optional[int], Optional[int]]:
+    """
+    (mime, width, height) of an image file opened in binary mode.
+
+    Returns None for anything the headers don't reveal; an unrecognised
+    file gives (None, None, None).
+    """
+    head = f.read(32)
+    if head.startswith(b"\x89PNG\r\n\x1a\n"):
+        mime, reader = "image/png", _png
+    elif head[:6] in (b"GIF87a", b"GIF89a"):
+        mime, reader = "image/gif", _gif
+    elif head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        mime, reader = "image/webp", _webp
+    elif head.startswith(b"\xff\xd8"):
+        mime, reader = "image/jpeg", _jpeg
+    else:
+        return None, None, None
+
+    try:
+        size = reader(f, head)
+    except (struct.error, IndexError, OSError):
+        size = None
+    return (mime, *size) if size else (mime, None, None)
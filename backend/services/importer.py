@@ -0,0 +1,246 @@
+"""Bulk import of a markdown vault (a directory or a .zip) into a project."""
+
+from __future__ import annotations
+
+import posixpath
+import re
+import zipfile
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Iterator, Optional
+from urllib.parse import unquote
+
+from db import db_conn
+from services.article_store import get_article_type_by_key, slugify as article_slugify, text_columns
+from services.folder_store import slugify as folder_slugify
+from services.fuzzy_index import index_terms, normalize_term
+from services.project_fs import RESERVED_DIRS, scan_markdown_files
+from services.project_store import invalidate_project_cache
+
+# Rows buffered before each executemany()
+IMPORT_BATCH_SIZE = 1000
+
+# [text](relative/path.md) or [text](path.md#heading); images are left alone
+_MD_LINK_RE = re.compile(r"(?<!!)\[([^\]]*)\]\(<?([^)\s>]+?\.md)(#[^)\s>]*)?>?\)", re.IGNORECASE)
+# [[Page]], [[Page#heading]], [[Page|alias]]; embeds (![[...]]) are left alone
+_WIKI_LINK_RE = re.compile(r"(?<!!)\[\[([^\]|#]+)(#[^\]|]*)?(?:\|([^\]]+))?\]\]")
+
+ProgressCallback = Callable[[int, int], None]
+
+
+def _is_skipped(rel_path: str) -> bool:
+    parts = rel_path.split("/")
+    return any(p.startswith(".") or p in RESERVED_DIRS or p == "__MACOSX" for p in parts)
+
+
+def _iter_zip(archive: zipfile.ZipFile) -> Iterator[tuple[str, Callable[[], bytes]]]:
+    for info in archive.infolist():
+        name = posixpath.normpath(info.filename.replace("\\", "/")).lstrip("/")
+        if info.is_dir() or name.startswith("..") or _is_skipped(name):
+            continue
+        if name.lower().endswith(".md"):
+            yield name, (lambda info=info: archive.read(info))
+
+
+def _iter_directory(root: Path) -> Iterator[tuple[str, Callable[[], bytes]]]:
+    for rel_path, abs_path in scan_markdown_files(root):
+        yield rel_path, (lambda abs_path=abs_path: Path(abs_path).read_bytes())
+
+
+def _unique_slug(base_slug: str, taken: set[str]) -> str:
+    slug = base_slug
+    i = 2
+    while slug in taken:
+        slug = f"{base_slug}-{i}"
+        i += 1
+    taken.add(slug)
+    return slug
+
+
+class _LinkRewriter:
+    """Turns links between imported files into article: links."""
+
+    def __init__(self, slug_by_path: dict[str, str]):
+        self.slug_by_path = slug_by_path
+        # Obsidian-style links often use just the file name; only unambiguous names resolve
+        self.slug_by_stem: dict[str, Optional[str]] = {}
+        for path, slug in slug_by_path.items():
+            stem = posixpath.splitext(posixpath.basename(path))[0].lower()
+            self.slug_by_stem[stem] = None if stem in self.slug_by_stem else slug
+        self.rewritten = 0
+
+    def _lookup(self, target: str, base_dir: str) -> Optional[str]:
+        target = unquote(target)
+        slug = self.slug_by_path.get(posixpath.normpath(posixpath.join(base_dir, target)))
+        if slug is None and "/" not in target:
+            slug = self.slug_by_stem.get(posixpath.splitext(target)[0].lower())
+        return slug
+
+    def rewrite(self, body: str, rel_path: str) -> str:
+        base_dir = posixpath.dirname(rel_path)
+
+        def md_link(match):
+            slug = self._lookup(match.group(2), base_dir)
+            if slug is None:
+                return match.group(0)
+            self.rewritten += 1
+            return f"[{match.group(1)}](article:{slug})"
+
+        def wiki_link(match):
+            target = match.group(1).strip()
+            if not target.lower().endswith(".md"):
+                target += ".md"
+            slug = self._lookup(target, base_dir)
+            if slug is None:
+                return match.group(0)
+            self.rewritten += 1
+            label = (match.group(3) or match.group(1)).strip()
+            return f"[{label}](article:{slug})"
+
+        if "](" in body:
+            body = _MD_LINK_RE.sub(md_link, body)
+        if "[[" in body:
+            body = _WIKI_LINK_RE.sub(wiki_link, body)
+        return body
+
+
+def import_markdown(
+    project: dict[str, Any],
+    source,
+    *,
+    type_key: str = "generic",
+    progress: ProgressCallback | None = None,
+) -> dict[str, int]:
+    """
+    Import every markdown file under source into the project.
+
+    source is a directory path, a path to a .zip, or a binary file object
+    holding a zip (e.g. an upload). Directories become folders (existing
+    folders with the same slug are reused), files become articles titled
+    after their file name, and links between imported files are rewritten
+    to article: links. Everything is written in a single transaction.
+
+    Returns counts of created folders and articles and rewritten links.
+    """
+    type_row = get_article_type_by_key(type_key)
+    if not type_row:
+        raise ValueError("Invalid article type.")
+
+    archive = None
+    if isinstance(source, (str, Path)) and Path(source).is_dir():
+        files = list(_iter_directory(Path(source)))
+    else:
+        try:
+            archive = zipfile.ZipFile(source)
+        except (zipfile.BadZipFile, OSError):
+            raise ValueError("Import source must be a directory or a .zip file.")
+        files = list(_iter_zip(archive))
+
+    try:
+        return _import_files(project, files, type_row["id"], progress)
+    finally:
+        if archive is not None:
+            archive.close()
+
+
+def _import_files(
+    project: dict[str, Any],
+    files: list[tuple[str, Callable[[], bytes]]],
+    type_id: int,
+    progress: ProgressCallback | None,
+) -> dict[str, int]:
+    project_id = int(project["id"])
+    now = datetime.now(tz=timezone.utc).isoformat()
+    total = len(files)
+    files.sort(key=lambda f: f[0].lower())
+
+    with db_conn() as conn:
+        # Folders: reuse existing ones by (parent, slug), create the rest parents-first
+        folder_ids: dict[tuple[Optional[int], str], int] = {
+            (r["parent_id"], r["slug"]): r["id"]
+            for r in conn.execute(
+                "SELECT id, parent_id, slug FROM folders WHERE project_id = ?;", (project_id,)
+            )
+        }
+        folder_by_dir: dict[str, Optional[int]] = {"": None}
+        folders_created = 0
+        for rel_path, _ in files:
+            parts = rel_path.split("/")[:-1]
+            for depth in range(1, len(parts) + 1):
+                dir_path = "/".join(parts[:depth])
+                if dir_path in folder_by_dir:
+                    continue
+                parent_id = folder_by_dir["/".join(parts[:depth - 1])]
+                name = parts[depth - 1]
+                key = (parent_id, folder_slugify(name))
+                if key not in folder_ids:
+                    cursor = conn.execute(
+                        """
+                        INSERT INTO folders (project_id, parent_id, name, slug, created_at)
+                        VALUES (?, ?, ?, ?, ?);
+                        """,
+                        (project_id, parent_id, name, key[1], now),
+                    )
+                    folder_ids[key] = cursor.lastrowid
+                    folders_created += 1
+                    index_terms(conn, "folder", [(cursor.lastrowid, project_id, name)])
+                folder_by_dir[dir_path] = folder_ids[key]
+
+        # Slugs are resolved in memory against everything already in the project
+        taken = {r["slug"] for r in conn.execute("SELECT slug FROM articles WHERE project_id = ?;", (project_id,))}
+        slug_by_path = {
+            rel_path: _unique_slug(article_slugify(posixpath.splitext(posixpath.basename(rel_path))[0]), taken)
+            for rel_path, _ in files
+        }
+        links = _LinkRewriter(slug_by_path)
+
+        batch: list[tuple] = []
+        for done, (rel_path, read) in enumerate(files, start=1):
+            body = links.rewrite(read().decode("utf-8", errors="replace"), rel_path)
+            title = posixpath.splitext(posixpath.basename(rel_path))[0].strip() or slug_by_path[rel_path]
+            batch.append((
+                project_id, folder_by_dir[posixpath.dirname(rel_path)], type_id,
+                slug_by_path[rel_path], title, normalize_term(title), body, *text_columns(body), now, now,
+            ))
+            if len(batch) >= IMPORT_BATCH_SIZE or done == total:
+                conn.executemany(
+                    """
+                    INSERT INTO articles (project_id, folder_id, type_id, slug, title, title_norm, body_content,
+                                          body_text, word_count, char_count,
+                                          created_at, updated_at)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?);
+                    """,
+                    batch,
+                )
+                batch.clear()
+                if progress:
+                    progress(done, total)
+
+        index_terms(
+            conn,
+            "article",
+            conn.execute(
+                "SELECT id, project_id, title FROM articles WHERE project_id = ? AND created_at = ?;",
+                (project_id, now),
+            ).fetchall(),
+        )
+
+        # Empty prompt values for every imported article, as create_article does
+        conn.execute(
+            """
+            INSERT OR IGNORE INTO prompt_values
+            (article_id, prompt_id, value, linked_article_id, created_at, updated_at)
+            SELECT a.id, p.id, NULL, NULL, ?, ?
+            FROM articles a
+            JOIN prompts p ON p.article_type_id = a.type_id
+            WHERE a.project_id = ? AND a.created_at = ?;
+            """,
+            (now, now, project_id, now),
+        )
+
+    invalidate_project_cache(project_id)
+    return {
+        "folders_created": folders_created,
+        "articles_created": total,
+        "links_rewritten": links.rewritten,
+    }
@@ -1,10 +1,18 @@
 from __future__ import annotations
 
+import hashlib
+import threading
 from pathlib import Path
+from typing import Any
 import markdown as md
+from markdown.extensions import Extension
+from markdown.treeprocessors import Treeprocessor
 import re
 from config import DATA_DIR
 from db import db_conn
+from services.media_store import rewrite_media_urls
+from services.project_store import get_render_epoch
+from services.render_cache import render_cache
 
 
 # Keep extensions centralized so you don’t repeat config everywhere
@@ -15,6 +23,118 @@ DEFAULT_MD_EXTENSIONS = [
     "toc"
 ]
 
+# Bump whenever rendering output changes so cached HTML is re-rendered
+RENDERER_VERSION = 2
+
+ARTICLE_LINK_PREFIX = "article:"
+ARTICLE_SLUG_RE = re.compile(r"[a-z0-9-]+")
+
+# Stay well below SQLite's bound-parameter limit
+_SLUG_BATCH_SIZE = 500
+
+_local = threading.local()
+
+
+def resolve_article_slugs(project_slug: str, slugs) -> dict[str, int]:
+    """Map article slugs in a project to their ids with one query per 500 slugs."""
+    slugs = list(set(slugs))
+    resolved: dict[str, int] = {}
+    if not slugs:
+        return resolved
+
+    with db_conn() as conn:
+        for i in range(0, len(slugs), _SLUG_BATCH_SIZE):
+            batch = slugs[i:i + _SLUG_BATCH_SIZE]
+            placeholders = ",".join("?" for _ in batch)
+            rows = conn.execute(
+                f"""
+                SELECT a.slug, a.id FROM articles a
+                JOIN projects p ON a.project_id = p.id
+                WHERE p.slug = ? AND a.slug IN ({placeholders});
+                """,
+                (project_slug, *batch),
+            ).fetchall()
+            resolved.update((row["slug"], row["id"]) for row in rows)
+    return resolved
+
+
+class ArticleLinkTreeprocessor(Treeprocessor):
+    """
+    Rewrite <a href="article:slug"> to the article's URL after inline parsing.
+
+    All links of a document are resolved together, so a body with hundreds
+    of cross-links costs a single query. Unknown slugs keep their
+    article: href and show up as broken links.
+    """
+
+    project_slug = ""
+
+    def run(self, root):
+        links = []
+        for el in root.iter("a"):
+            href = el.get("href", "")
+            if href.startswith(ARTICLE_LINK_PREFIX):
+                slug = href[len(ARTICLE_LINK_PREFIX):]
+                if ARTICLE_SLUG_RE.fullmatch(slug):
+                    links.append((el, slug))
+        if not links:
+            return None
+
+        ids = resolve_article_slugs(self.project_slug, (slug for _, slug in links))
+        for el, slug in links:
+            if slug in ids:
+                el.set("href", f"/projects/{self.project_slug}/a/{ids[slug]}")
+        return None
+
+
+class ArticleLinkExtension(Extension):
+    """Registers ArticleLinkTreeprocessor to run right after inline patterns."""
+
+    def extendMarkdown(self, md_instance):
+        self.processor = ArticleLinkTreeprocessor(md_instance)
+        md_instance.treeprocessors.register(self.processor, "article_links", 15)
+
+
+def _get_markdown(project_slug: str) -> md.Markdown:
+    """A per-thread Markdown instance, reset between documents instead of rebuilt."""
+    converter = getattr(_local, "markdown", None)
+    if converter is None:
+        _local.article_links = ArticleLinkExtension()
+        converter = md.Markdown(extensions=[*DEFAULT_MD_EXTENSIONS, _local.article_links])
+        _local.markdown = converter
+    _local.article_links.processor.project_slug = project_slug
+    return converter.reset()
+
+
+def render_project_markdown(raw_md: str, project_slug: str) -> str:
+    """Render markdown belonging to a project: article links, markdown, media URLs."""
+    if not raw_md:
+        return ""
+    html = _get_markdown(project_slug).convert(raw_md)
+    return rewrite_media_urls(html, project_slug)
+
+
+def render_article_html(project: dict[str, Any], article: dict[str, Any]) -> str:
+    """Rendered body of an article, served from the render cache when current."""
+    version = f"{article['updated_at']}|{get_render_epoch(project['id'])}|{RENDERER_VERSION}"
+    html = render_cache.get("article", article["id"], version)
+    if html is None:
+        html = render_project_markdown(article["body_content"], project["slug"])
+        render_cache.put("article", article["id"], version, html)
+    return html
+
+
+def render_project_description(project: dict[str, Any]) -> str:
+    """Rendered project description, served from the render cache when current."""
+    raw_md = project.get("description", "")
+    digest = hashlib.blake2b(raw_md.encode("utf-8"), digest_size=16).hexdigest()
+    version = f"{digest}|{get_render_epoch(project['id'])}|{RENDERER_VERSION}"
+    html = render_cache.get("project", project["id"], version)
+    if html is None:
+        html = render_project_markdown(raw_md, project["slug"])
+        render_cache.put("project", project["id"], version, html)
+    return html
+
 
 def render_markdown_file(path: str | Path, *, extensions=None) -> str:
     """
@@ -35,42 +155,3 @@ def render_markdown_file(path: str | Path, *, extensions=None) -> str:
         raw_md,
         extensions=extensions or DEFAULT_MD_EXTENSIONS,
     )
-
-
-def process_article_links(markdown_content: str, project_slug: str) -> str:
-    """
-    Convert article reference links from markdown format to proper links.
-    
-    Transforms:
-      [Article Title](article:article-slug) 
-    Into:
-      [Article Title](/projects/project-slug/a/article-id)
-    
-    Invalid article slugs are left as-is and will appear as broken links.
-    """
-    def replace_article_link(match):
-        title = match.group(1)
-        slug = match.group(2)
-        
-        # Look up article ID by slug in the project
-        with db_conn() as conn:
-            row = conn.execute(
-                """
-                SELECT a.id FROM articles a
-                JOIN projects p ON a.project_id = p.id
-                WHERE p.slug = ? AND a.slug = ?
-                LIMIT 1;
-                """,
-                (project_slug, slug),
-            ).fetchone()
-        
-        if row:
-            article_id = row["id"]
-            return f"[{title}](/projects/{project_slug}/a/{article_id})"
-        else:
-            # Keep the original format if article not found
-            return match.group(0)
-    
-    # Replace [text](article:slug) with proper links
-    pattern = r'\[([^\]]+)\]\(article:([a-z0-9-]+)\)'
-    return re.sub(pattern, replace_article_link, markdown_content)
@@ -0,0 +1,88 @@
+"""
+Sending media, tile and variant files with strong validators.
+
+Every file sent here has an ETag derived from its content hash, so
+revalidation costs a header comparison. Files reached through a URL
+that embeds the hash never change and are sent as public and immutable
+for a year; files reached by name are revalidated on each use.
+
+By default Flask streams the file and answers Range requests itself.
+With MEDIA_SENDFILE set, the response carries only headers and a
+fronting proxy sends the bytes (and handles Range) from disk:
+  "x-accel-redirect"  nginx; MEDIA_ACCEL_REDIRECT_PREFIX names an
+                      internal location that aliases the data folder
+  "x-sendfile"        Apache mod_xsendfile, lighttpd
+"""
+
+from __future__ import annotations
+
+from pathlib import Path
+from typing import Optional
+
+from flask import current_app, request, send_file
+
+from config import DATA_DIR
+
+# URLs that embed a content hash can be cached for this long
+IMMUTABLE_MAX_AGE = 365 * 24 * 3600
+
+# Settings, replaced from the app config in init_app()
+SENDFILE_MODE: Optional[str] = None
+ACCEL_REDIRECT_PREFIX = "/_data/"
+
+_SENDFILE_HEADERS = {"x-accel-redirect": "X-Accel-Redirect", "x-sendfile": "X-Sendfile"}
+
+
+def _set_caching(response, etag: str, immutable: bool) -> None:
+    response.set_etag(etag)
+    if immutable:
+        response.cache_control.no_cache = None
+        response.cache_control.public = True
+        response.cache_control.max_age = IMMUTABLE_MAX_AGE
+        response.cache_control.immutable = True
+    else:
+        response.cache_control.no_cache = True
+
+
+def not_modified(etag: str, *, immutable: bool = False):
+    """A 304 for a request whose If-None-Match already names etag, built without touching any file."""
+    response = current_app.response_class(status=304)
+    _set_caching(response, etag, immutable)
+    return response
+
+
+def send_media(path: Path, mimetype: str, etag: str, *, immutable: bool = False):
+    """
+    Send a file under the data folder with a strong ETag, answering
+    If-None-Match with 304 and Range with 206 (or leaving Range to the
+    proxy in sendfile mode).
+    """
+    if SENDFILE_MODE:
+        header = _SENDFILE_HEADERS[SENDFILE_MODE]
+        if SENDFILE_MODE == "x-accel-redirect":
+            target = ACCEL_REDIRECT_PREFIX.rstrip("/") + "/" + path.relative_to(DATA_DIR).as_posix()
+        else:
+            target = str(path.resolve())
+        response = current_app.response_class(mimetype=mimetype)
+        response.headers[header] = target
+        _set_caching(response, etag, immutable)
+        response = response.make_conditional(request)
+        if response.status_code == 304:
+            # The proxy would otherwise send the file anyway
+            del response.headers[header]
+        return response
+
+    # Resolved: send_file would take a relative path as relative to the app root
+    response = send_file(path.resolve(), mimetype=mimetype, etag=etag, conditional=True)
+    _set_caching(response, etag, immutable)
+    return response
+
+
+def init_app(app) -> None:
+    """Apply the media sending settings from the app config."""
+    global SENDFILE_MODE, ACCEL_REDIRECT_PREFIX
+    mode = app.config["MEDIA_SENDFILE"]
+    if mode and mode not in _SENDFILE_HEADERS:
+        raise ValueError(f"MEDIA_SENDFILE must be one of {sorted(_SENDFILE_HEADERS)} or None, not {mode!r}.")
+    SENDFILE_MODE = mode or None
+    ACCEL_REDIRECT_PREFIX = app.config["MEDIA_ACCEL_REDIRECT_PREFIX"]
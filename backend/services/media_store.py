@@ -1,21 +1,76 @@
 from __future__ import annotations
 
+import os
 import re
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
 from pathlib import Path
-from typing import Any
+from typing import Any, BinaryIO, Optional
 from werkzeug.utils import secure_filename
 
-from services.project_fs import get_project_dir
+from db import db_conn
+from services.blob_store import adopt_file, blob_path, store_stream
+from services.fuzzy_index import index_terms
+from services.image_info import MIME_BY_EXT, read_image_info
+from services.media_variants import pregenerate_variants
+from services.tile_pyramid import schedule_pyramid, tiles_available, wants_pyramid
+from services.project_fs import BASE_PROJECTS_DIR
+from services.search_cache import bump_search_generation
 
 
 ALLOWED_IMAGE_EXTS = {".png", ".jpg", ".jpeg", ".webp", ".gif"}  # keep it simple for v0
 
+MEDIA_COLUMNS = "id, filename, size, mime, width, height, hash, mtime"
 
-def get_media_dir(project: dict[str, Any]) -> Path:
-    root = get_project_dir(project)
-    media_dir = root / "media"
-    media_dir.mkdir(parents=True, exist_ok=True)
-    return media_dir
+
+class MediaCache:
+    """
+    Small TTL + LRU cache of media rows keyed by (project_id, filename),
+    so revalidating a media URL by name needs no query.
+
+    Media writes in this process clear it; the TTL bounds how long another
+    worker process can answer for a name whose content changed elsewhere.
+    """
+
+    def __init__(self, ttl: float = 30.0, max_size: int = 4096):
+        self.ttl = ttl
+        self.max_size = max_size
+        self._entries: OrderedDict[tuple[int, str], tuple[float, dict[str, Any]]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: tuple[int, str]) -> dict[str, Any] | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    def put(self, key: tuple[int, str], row: dict[str, Any]) -> None:
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, row)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+media_cache = MediaCache()
+
+
+def init_app(app) -> None:
+    """Apply the media lookup cache settings from the app config."""
+    media_cache.ttl = app.config["MEDIA_CACHE_TTL"]
+    media_cache.max_size = app.config["MEDIA_CACHE_SIZE"]
+    media_cache.clear()
 
 
 def is_allowed_image(filename: str) -> bool:
@@ -33,24 +88,79 @@ def rewrite_media_urls(html: str, project_slug: str) -> str:
         html
     )
 
-def _dedupe_filename(target_dir: Path, filename: str) -> str:
+def _upsert_media(conn, project_id: int, filename: str, digest: str, size: int, mtime: float) -> None:
+    """Point a media name at a stored blob, reading type and dimensions from its header."""
+    with open(blob_path(digest), "rb") as f:
+        mime, width, height = read_image_info(f)
+    conn.execute(
+        """
+        INSERT INTO media (project_id, filename, size, mime, width, height, hash, mtime, created_at)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ON CONFLICT(project_id, filename) DO UPDATE SET
+            size = excluded.size, mime = excluded.mime, width = excluded.width,
+            height = excluded.height, hash = excluded.hash, mtime = excluded.mtime;
+        """,
+        (
+            project_id, filename, size,
+            mime or MIME_BY_EXT.get(Path(filename).suffix.lower(), "application/octet-stream"),
+            width, height, digest, mtime, datetime.now(tz=timezone.utc).isoformat(),
+        ),
+    )
+    index_terms(conn, "media", [(None, project_id, filename)])
+
+
+def record_media(conn, project_id: int, path: Path) -> None:
+    """Move a file from a project's media folder into the blob store and add or refresh its media row."""
+    mtime = path.stat().st_mtime
+    digest, size = adopt_file(path)
+    _upsert_media(conn, project_id, path.name, digest, size, mtime)
+
+
+def _unique_media_name(conn, project_id: int, filename: str, digest: str) -> tuple[str, bool]:
     """
-    If filename exists, create filename-2.ext, filename-3.ext, ...
+    A free name for new content: filename, else filename-2.ext, -3, ...
+    Returns (name, already_stored); already_stored means filename holds
+    exactly this content, so there is nothing to add.
     """
-    base = Path(filename).stem
-    ext = Path(filename).suffix
-    candidate = filename
+    stem, ext = os.path.splitext(filename)
+    # secure_filename() leaves no GLOB metacharacters; GLOB is case-sensitive, so it can use the unique index
+    taken = {
+        r["filename"]: r["hash"]
+        for r in conn.execute(
+            "SELECT filename, hash FROM media WHERE project_id = ? AND (filename = ? OR filename GLOB ?);",
+            (project_id, filename, f"{stem}-*{ext}"),
+        )
+    }
+    if filename not in taken:
+        return filename, False
+    if taken[filename] == digest:
+        return filename, True
     i = 2
-    while (target_dir / candidate).exists():
-        candidate = f"{base}-{i}{ext}"
+    while f"{stem}-{i}{ext}" in taken:
         i += 1
-    return candidate
+    return f"{stem}-{i}{ext}", False
+
+
+def add_media(conn, project_id: int, filename: str, stream: BinaryIO) -> str:
+    """
+    Store a stream under a name in a project, returning the name used.
+
+    The content is hashed while it is written to the blob store, so a
+    duplicate costs no disk; re-uploading a file under its existing name
+    returns that name without adding anything.
+    """
+    digest, size = store_stream(stream)
+    name, already_stored = _unique_media_name(conn, project_id, filename, digest)
+    if not already_stored:
+        _upsert_media(conn, project_id, name, digest, size, time.time())
+    return name
 
 
 def save_uploaded_image(project: dict[str, Any], file_storage) -> str:
     """
-    Saves an uploaded file into the project's media folder.
-    Returns the saved filename (relative in media dir).
+    Stores an uploaded image in the blob store and names it in the
+    project's media table.
+    Returns the filename it is available under.
     """
     if not file_storage or not file_storage.filename:
         raise ValueError("No file selected.")
@@ -62,17 +172,82 @@ def save_uploaded_image(project: dict[str, Any], file_storage) -> str:
     if not is_allowed_image(filename):
         raise ValueError("Unsupported file type. Upload PNG, JPG, JPEG, WEBP, or GIF.")
 
-    media_dir = get_media_dir(project)
-
-    filename = _dedupe_filename(media_dir, filename)
-    file_storage.save(media_dir / filename)
+    with db_conn() as conn:
+        filename = add_media(conn, int(project["id"]), filename, file_storage.stream)
+    bump_search_generation()
+    media_cache.clear()
+    item = get_media(int(project["id"]), filename)
+    pregenerate_variants(project, item)
+    if wants_pyramid(item) and tiles_available():
+        schedule_pyramid(project, item)
     return filename
 
 
-def list_media(project: dict[str, Any]) -> list[dict[str, str]]:
-    media_dir = get_media_dir(project)
-    items = []
-    for p in sorted(media_dir.iterdir(), key=lambda x: x.name.lower()):
-        if p.is_file() and p.suffix.lower() in ALLOWED_IMAGE_EXTS:
-            items.append({"filename": p.name})
-    return items
+def get_media(project_id: int, filename: str) -> Optional[dict[str, Any]]:
+    """A media row by name, from media_cache when it is there. Callers get their own copy."""
+    row = media_cache.get((project_id, filename))
+    if row is None:
+        with db_conn() as conn:
+            found = conn.execute(
+                f"SELECT {MEDIA_COLUMNS} FROM media WHERE project_id = ? AND filename = ? LIMIT 1;",
+                (project_id, filename),
+            ).fetchone()
+        if found is None:
+            return None
+        row = dict(found)
+        media_cache.put((project_id, filename), row)
+    return dict(row)
+
+
+def list_media(project: dict[str, Any], *, limit: int | None = None, offset: int = 0) -> list[dict[str, Any]]:
+    """A project's media rows ordered by filename (case-insensitive), optionally one page of them."""
+    with db_conn() as conn:
+        rows = conn.execute(
+            f"""
+            SELECT {MEDIA_COLUMNS}
+            FROM media
+            WHERE project_id = ?
+            ORDER BY filename COLLATE NOCASE, id
+            LIMIT ? OFFSET ?;
+            """,
+            (int(project["id"]), -1 if limit is None else limit, offset),
+        ).fetchall()
+    return [dict(r) for r in rows]
+
+
+def reconcile_media(project: dict[str, Any]) -> dict[str, int]:
+    """
+    Bring a project's media rows in line with what is on disk: files
+    dropped into its media folder by hand are moved into the blob store
+    and named (replacing the content of a row with the same name), and
+    rows whose blob has gone missing are removed. Returns the counts.
+    """
+    project_id = int(project["id"])
+    media_dir = BASE_PROJECTS_DIR / project["slug"] / "media"
+    dropped = []
+    if media_dir.is_dir():
+        with os.scandir(media_dir) as entries:
+            dropped = sorted(e.name for e in entries if e.is_file() and is_allowed_image(e.name))
+
+    counts = {"added": 0, "updated": 0, "removed": 0}
+    with db_conn() as conn:
+        known = {
+            r["filename"]: r
+            for r in conn.execute("SELECT id, filename, hash FROM media WHERE project_id = ?;", (project_id,))
+        }
+        for filename in dropped:
+            record_media(conn, project_id, media_dir / filename)
+            counts["updated" if filename in known else "added"] += 1
+        gone = [(r["id"],) for name, r in known.items() if name not in dropped and not blob_path(r["hash"]).exists()]
+        conn.executemany("DELETE FROM media WHERE id = ?;", gone)
+        counts["removed"] = len(gone)
+
+    if any(counts.values()):
+        bump_search_generation()
+        media_cache.clear()
+    return counts
+
+
+def referenced_blobs() -> set[str]:
+    with db_conn() as conn:
+        return {r["hash"] for r in conn.execute("SELECT DISTINCT hash FROM media;")}
@@ -0,0 +1,162 @@
+"""
+Resized variants of media images: thumbnails and width-bounded WebP or
+JPEG copies for galleries, search results and pickers.
+
+Variants are rendered by a small thread pool, either ahead of time
+after an upload (MEDIA_VARIANT_PREGENERATE) or on the first request for
+a width, and cached under the project's _cache folder keyed by content
+hash, so renaming a file keeps its variants and re-uploads reuse them.
+Requests for the same missing variant wait on one render.
+
+Pillow is optional: without it (and for GIFs, which may be animated)
+no variants are made and callers serve the original. When pyvips is
+installed it renders instead, shrinking on load so even very large
+images never need decoding at full size.
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Optional
+
+from services.blob_store import blob_path
+from services.project_fs import BASE_PROJECTS_DIR
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:  # variants are an optimisation; originals are always servable
+    Image = None
+
+try:
+    import pyvips  # shrinks while decoding, so huge maps don't have to fit in memory
+except (ImportError, OSError):
+    pyvips = None
+
+logger = logging.getLogger(__name__)
+
+FORMATS = {"webp": ("WEBP", "image/webp"), "jpeg": ("JPEG", "image/jpeg")}
+
+# Settings, replaced from the app config in init_app()
+VARIANT_WIDTHS: tuple[int, ...] = (160, 480, 1024, 1920)
+PREGENERATE_WIDTHS: tuple[int, ...] = (160, 480)
+VARIANT_QUALITY = 80
+VARIANT_WORKERS = 2
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_pid: Optional[int] = None
+_inflight: dict[Path, Future] = {}
+_lock = threading.Lock()
+
+
+def variants_available() -> bool:
+    return Image is not None or pyvips is not None
+
+
+def pick_width(requested: int) -> int:
+    """The smallest configured width at least as wide as requested (or the largest)."""
+    for width in VARIANT_WIDTHS:
+        if width >= requested:
+            return width
+    return VARIANT_WIDTHS[-1]
+
+
+def pick_format(accept: str) -> str:
+    return "webp" if "image/webp" in (accept or "") else "jpeg"
+
+
+def variant_path(project: dict[str, Any], digest: str, width: int, fmt: str) -> Path:
+    return BASE_PROJECTS_DIR / project["slug"] / "_cache" / "media" / f"{digest}-w{width}.{fmt}"
+
+
+def _render(source: Path, dest: Path, width: int, fmt: str) -> Path:
+    dest.parent.mkdir(parents=True, exist_ok=True)
+    # Written beside the destination and renamed, so readers never see a partial file
+    tmp = dest.with_name(f".{os.getpid()}.{threading.get_ident()}.{dest.name}")
+
+    if pyvips is not None:
+        image = pyvips.Image.thumbnail(str(source), width, height=width * 16, size="down")
+        if fmt == "jpeg" and image.hasalpha():
+            image = image.flatten(background=[255, 255, 255])
+        image.write_to_file(f"{tmp}[Q={VARIANT_QUALITY}]")  # format from the extension
+    else:
+        pil_format = FORMATS[fmt][0]
+        with Image.open(source) as im:
+            im = ImageOps.exif_transpose(im)
+            im.thumbnail((width, width * 16))  # bound the width only; keeps the aspect ratio
+            if pil_format == "JPEG" and im.mode != "RGB":
+                im = im.convert("RGB")
+            elif im.mode not in ("RGB", "RGBA"):
+                im = im.convert("RGBA")
+            im.save(tmp, pil_format, quality=VARIANT_QUALITY)
+    os.replace(tmp, dest)
+    return dest
+
+
+def _pool() -> ThreadPoolExecutor:
+    global _executor, _executor_pid
+    if _executor is None or _executor_pid != os.getpid():
+        # Created lazily so forked workers get their own threads
+        _executor = ThreadPoolExecutor(max_workers=VARIANT_WORKERS, thread_name_prefix="media-variants")
+        _executor_pid = os.getpid()
+    return _executor
+
+
+def _submit(project: dict[str, Any], item: dict[str, Any], width: int, fmt: str) -> Optional[Future]:
+    """Render a variant in the pool unless it is cached or already being rendered."""
+    dest = variant_path(project, item["hash"], width, fmt)
+    if dest.exists():
+        return None
+    with _lock:
+        future = _inflight.get(dest)
+        if future is None:
+            future = _inflight[dest] = _pool().submit(_render, blob_path(item["hash"]), dest, width, fmt)
+            future.add_done_callback(lambda _f: _inflight.pop(dest, None))
+    return future
+
+
+def _can_resize(item: dict[str, Any], width: int) -> bool:
+    # GIFs may be animated; images already this narrow gain nothing
+    return (
+        variants_available()
+        and item["mime"] in ("image/png", "image/jpeg", "image/webp")
+        and (item["width"] is None or item["width"] > width)
+    )
+
+
+def get_variant(project: dict[str, Any], item: dict[str, Any], requested_width: int, fmt: str) -> Optional[Path]:
+    """
+    Path of the cached variant of a media row for a requested width,
+    rendering it first if needed. None means serve the original.
+    """
+    width = pick_width(requested_width)
+    if not _can_resize(item, width):
+        return None
+    future = _submit(project, item, width, fmt)
+    if future is not None:
+        try:
+            future.result()
+        except Exception:
+            logger.exception("Rendering a %dpx variant of %s failed", width, item["hash"])
+            return None
+    return variant_path(project, item["hash"], width, fmt)
+
+
+def pregenerate_variants(project: dict[str, Any], item: dict[str, Any]) -> None:
+    """Queue the usual thumbnail sizes of a new upload without waiting for them."""
+    for width in PREGENERATE_WIDTHS:
+        if _can_resize(item, width):
+            for fmt in FORMATS:
+                _submit(project, item, width, fmt)
+
+
+def init_app(app) -> None:
+    """Apply the media variant settings from the app config."""
+    global VARIANT_WIDTHS, PREGENERATE_WIDTHS, VARIANT_QUALITY, VARIANT_WORKERS
+    VARIANT_WIDTHS = tuple(sorted(app.config["MEDIA_VARIANT_WIDTHS"]))
+    PREGENERATE_WIDTHS = tuple(app.config["MEDIA_VARIANT_PREGENERATE"])
+    VARIANT_QUALITY = app.config["MEDIA_VARIANT_QUALITY"]
+    VARIANT_WORKERS = app.config["MEDIA_VARIANT_WORKERS"]
@@ -0,0 +1,340 @@
+"""
+Request metrics: per-endpoint latency histograms, DB time, connection
+reuse, render cache and memory, aggregated across worker processes.
+
+Each thread records into its own counters, so observing a request takes
+no lock. Every process periodically writes a JSON snapshot to
+METRICS_DIR/<pid>.json; aggregate() merges the live snapshot of this
+process with the recent snapshots of the others.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import threading
+import time
+import weakref
+from pathlib import Path
+from typing import Any
+
+from flask import g, request
+
+import db
+from services.render_cache import render_cache
+
+# Upper bounds (seconds) of the request latency histogram buckets; +Inf is implicit
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _empty_endpoint() -> dict[str, Any]:
+    return {
+        "count": 0,
+        "errors": 0,
+        "seconds": 0.0,
+        "db_seconds": 0.0,
+        "queries": 0,
+        "buckets": [0] * (len(LATENCY_BUCKETS) + 1),
+    }
+
+
+def _merge_endpoints(into: dict[str, dict], endpoints: dict[str, dict]) -> None:
+    for name, stats in endpoints.items():
+        target = into.setdefault(name, _empty_endpoint())
+        for key in ("count", "errors", "seconds", "db_seconds", "queries"):
+            target[key] += stats[key]
+        target["buckets"] = [a + b for a, b in zip(target["buckets"], stats["buckets"])]
+
+
+def _memory() -> dict[str, int]:
+    """Current and peak resident set size in bytes, where the platform reports them."""
+    memory = {}
+    try:
+        with open("/proc/self/statm") as f:
+            memory["rss_bytes"] = int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        pass
+    try:
+        import resource
+        memory["max_rss_bytes"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+    except ImportError:
+        pass
+    return memory
+
+
+class MetricsRegistry:
+    """Per-process request metrics with lock-free recording."""
+
+    def __init__(self, directory: Path | None = None, flush_interval: float = 10.0):
+        self.directory = directory
+        self.flush_interval = flush_interval
+        self.started = time.time()
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        # Live threads' counters; counters of finished threads are folded into _retired
+        self._threads: list[tuple[weakref.ref, dict[str, dict]]] = []
+        self._retired: dict[str, dict] = {}
+        self._flusher_pid: int | None = None
+
+    def _thread_endpoints(self) -> dict[str, dict]:
+        endpoints = getattr(self._local, "endpoints", None)
+        if endpoints is None:
+            endpoints = self._local.endpoints = {}
+            with self._lock:
+                live = []
+                for ref, stats in self._threads:
+                    if ref() is None:
+                        _merge_endpoints(self._retired, stats)
+                    else:
+                        live.append((ref, stats))
+                live.append((weakref.ref(threading.current_thread()), endpoints))
+                self._threads = live
+        return endpoints
+
+    def observe(self, endpoint: str, seconds: float, status: int, db_seconds: float = 0.0, queries: int = 0) -> None:
+        """Record one finished request. Only touches the calling thread's counters."""
+        endpoints = self._thread_endpoints()
+        stats = endpoints.get(endpoint)
+        if stats is None:
+            stats = endpoints[endpoint] = _empty_endpoint()
+        stats["count"] += 1
+        stats["seconds"] += seconds
+        stats["db_seconds"] += db_seconds
+        stats["queries"] += queries
+        if status >= 500:
+            stats["errors"] += 1
+        bucket = 0
+        while bucket < len(LATENCY_BUCKETS) and seconds > LATENCY_BUCKETS[bucket]:
+            bucket += 1
+        stats["buckets"][bucket] += 1
+
+    def snapshot(self) -> dict[str, Any]:
+        """This process's metrics as a JSON-serializable dict."""
+        endpoints: dict[str, dict] = {}
+        with self._lock:
+            _merge_endpoints(endpoints, self._retired)
+            threads = [stats for _, stats in self._threads]
+        for stats in threads:
+            # Another thread may add an endpoint while we read; copy the keys first
+            _merge_endpoints(endpoints, {name: stats[name] for name in list(stats)})
+        return {
+            "pid": os.getpid(),
+            "started": self.started,
+            "time": time.time(),
+            "endpoints": endpoints,
+            "db": db.get_pool_stats(),
+            "render_cache": render_cache.stats(),
+            "memory": _memory(),
+        }
+
+    def flush(self) -> None:
+        """Write this process's snapshot for other workers to aggregate."""
+        if self.directory is None:
+            return
+        self.directory.mkdir(parents=True, exist_ok=True)
+        path = self.directory / f"{os.getpid()}.json"
+        tmp = path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(self.snapshot()), encoding="utf-8")
+        os.replace(tmp, path)
+
+    def _flush_loop(self) -> None:
+        while True:
+            time.sleep(self.flush_interval)
+            try:
+                self.flush()
+            except OSError:
+                pass
+
+    def ensure_flusher(self) -> None:
+        """Start this process's snapshot writer; started lazily so forked workers get their own."""
+        pid = os.getpid()
+        if self._flusher_pid == pid or self.directory is None:
+            return
+        with self._lock:
+            if self._flusher_pid == pid:
+                return
+            self._flusher_pid = pid
+        threading.Thread(target=self._flush_loop, name="metrics-flush", daemon=True).start()
+
+    def aggregate(self) -> dict[str, Any]:
+        """
+        Merge this process's live snapshot with the other workers' files.
+
+        Snapshots not refreshed for three flush intervals belong to
+        workers that have exited and are ignored.
+        """
+        snapshots = [self.snapshot()]
+        if self.directory is not None and self.directory.is_dir():
+            cutoff = time.time() - 3 * self.flush_interval
+            for path in self.directory.glob("*.json"):
+                if path.stem == str(os.getpid()):
+                    continue
+                try:
+                    snapshot = json.loads(path.read_text(encoding="utf-8"))
+                except (OSError, ValueError):
+                    continue
+                if snapshot.get("time", 0) >= cutoff:
+                    snapshots.append(snapshot)
+
+        endpoints: dict[str, dict] = {}
+        totals: dict[str, dict[str, int]] = {"db": {}, "render_cache": {}, "memory": {}}
+        for snapshot in snapshots:
+            _merge_endpoints(endpoints, snapshot["endpoints"])
+            for section, counters in totals.items():
+                for key, value in snapshot.get(section, {}).items():
+                    counters[key] = counters.get(key, 0) + value
+
+        return {
+            "time": time.time(),
+            "started": min(s["started"] for s in snapshots),
+            "processes": [
+                {"pid": s["pid"], "started": s["started"], "memory": s.get("memory", {})} for s in snapshots
+            ],
+            "endpoints": endpoints,
+            **totals,
+        }
+
+
+registry = MetricsRegistry()
+
+
+def histogram_quantile(buckets: list[int], q: float) -> float | None:
+    """Estimate a latency quantile (seconds) by interpolating within histogram buckets."""
+    total = sum(buckets)
+    if not total:
+        return None
+    rank = q * total
+    seen = 0
+    for i, count in enumerate(buckets):
+        if count and seen + count >= rank:
+            lower = LATENCY_BUCKETS[i - 1] if i > 0 else 0.0
+            upper = LATENCY_BUCKETS[i] if i < len(LATENCY_BUCKETS) else LATENCY_BUCKETS[-1]
+            return lower + (upper - lower) * (rank - seen) / count
+        seen += count
+    return LATENCY_BUCKETS[-1]
+
+
+def dashboard_summary(metrics: dict[str, Any]) -> dict[str, Any]:
+    """Derived numbers for the admin dashboard."""
+    uptime = max(metrics["time"] - metrics["started"], 1e-9)
+    endpoints = []
+    for name, stats in sorted(metrics["endpoints"].items(), key=lambda item: -item[1]["seconds"]):
+        count = stats["count"]
+        endpoints.append({
+            "endpoint": name,
+            "count": count,
+            "errors": stats["errors"],
+            "rate": count / uptime,
+            "mean_ms": stats["seconds"] / count * 1000 if count else 0.0,
+            "p50_ms": (histogram_quantile(stats["buckets"], 0.5) or 0.0) * 1000,
+            "p95_ms": (histogram_quantile(stats["buckets"], 0.95) or 0.0) * 1000,
+            "db_share": stats["db_seconds"] / stats["seconds"] if stats["seconds"] else 0.0,
+            "queries": stats["queries"] / count if count else 0.0,
+        })
+
+    seconds = sum(s["seconds"] for s in metrics["endpoints"].values())
+    db_seconds = sum(s["db_seconds"] for s in metrics["endpoints"].values())
+    connections = metrics["db"]
+    cache = metrics["render_cache"]
+    lookups = cache.get("hits", 0) + cache.get("misses", 0)
+    acquired = connections.get("opened", 0) + connections.get("reused", 0)
+    return {
+        "uptime_seconds": uptime,
+        "processes": len(metrics["processes"]),
+        "requests": sum(e["count"] for e in endpoints),
+        "rate": sum(e["count"] for e in endpoints) / uptime,
+        "db_share": db_seconds / seconds if seconds else 0.0,
+        "connection_reuse": connections.get("reused", 0) / acquired if acquired else 0.0,
+        "connections_opened": connections.get("opened", 0),
+        "render_cache_hit_ratio": cache.get("hits", 0) / lookups if lookups else 0.0,
+        "render_cache_bytes": cache.get("bytes", 0),
+        "rss_bytes": metrics["memory"].get("rss_bytes", 0),
+        "endpoints": endpoints,
+    }
+
+
+def _label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def render_prometheus(metrics: dict[str, Any]) -> str:
+    """Aggregated metrics in the Prometheus text exposition format."""
+    lines = [
+        "# HELP mythdb_request_duration_seconds Request latency by endpoint.",
+        "# TYPE mythdb_request_duration_seconds histogram",
+    ]
+    for name, stats in sorted(metrics["endpoints"].items()):
+        label = _label(name)
+        cumulative = 0
+        for bound, count in zip((*LATENCY_BUCKETS, "+Inf"), stats["buckets"]):
+            cumulative += count
+            lines.append(f'mythdb_request_duration_seconds_bucket{{endpoint="{label}",le="{bound}"}} {cumulative}')
+        lines.append(f'mythdb_request_duration_seconds_sum{{endpoint="{label}"}} {stats["seconds"]:.6f}')
+        lines.append(f'mythdb_request_duration_seconds_count{{endpoint="{label}"}} {stats["count"]}')
+
+    per_endpoint = [
+        ("mythdb_request_errors_total", "counter", "Requests answered with a 5xx status.", "errors"),
+        ("mythdb_db_seconds_total", "counter", "Time spent in SQL statements.", "db_seconds"),
+        ("mythdb_db_queries_total", "counter", "SQL statements executed.", "queries"),
+    ]
+    for metric, kind, help_text, key in per_endpoint:
+        lines += [f"# HELP {metric} {help_text}", f"# TYPE {metric} {kind}"]
+        for name, stats in sorted(metrics["endpoints"].items()):
+            lines.append(f'{metric}{{endpoint="{_label(name)}"}} {stats[key]}')
+
+    totals = [
+        ("mythdb_db_connections_opened_total", "counter", "SQLite connections opened.", metrics["db"].get("opened", 0)),
+        ("mythdb_db_connections_reused_total", "counter", "Pooled connections reused.", metrics["db"].get("reused", 0)),
+        ("mythdb_db_connections_idle", "gauge", "Idle pooled connections.", metrics["db"].get("idle", 0)),
+        ("mythdb_render_cache_hits_total", "counter", "Render cache hits.", metrics["render_cache"].get("hits", 0)),
+        ("mythdb_render_cache_misses_total", "counter", "Render cache misses.", metrics["render_cache"].get("misses", 0)),
+        ("mythdb_render_cache_bytes", "gauge", "Rendered HTML held in memory.", metrics["render_cache"].get("bytes", 0)),
+        ("mythdb_worker_processes", "gauge", "Worker processes reporting metrics.", len(metrics["processes"])),
+    ]
+    for metric, kind, help_text, value in totals:
+        lines += [f"# HELP {metric} {help_text}", f"# TYPE {metric} {kind}", f"{metric} {value}"]
+
+    lines += [
+        "# HELP mythdb_process_resident_memory_bytes Resident memory per worker process.",
+        "# TYPE mythdb_process_resident_memory_bytes gauge",
+    ]
+    for process in metrics["processes"]:
+        if "rss_bytes" in process["memory"]:
+            lines.append(f'mythdb_process_resident_memory_bytes{{pid="{process["pid"]}"}} {process["memory"]["rss_bytes"]}')
+    return "\n".join(lines) + "\n"
+
+
+def _start_timer() -> None:
+    registry.ensure_flusher()
+    g._metrics_started = time.perf_counter()
+
+
+def _record_request(response):
+    # Registered after db.init_app, so this runs before db's after_request pops the query log
+    started = g.pop("_metrics_started", None)
+    if started is not None:
+        queries = db.get_request_queries()
+        registry.observe(
+            request.endpoint or "unmatched",
+            time.perf_counter() - started,
+            response.status_code,
+            sum(q.duration for q in queries),
+            len(queries),
+        )
+    return response
+
+
+def _record_failure(exc: BaseException | None = None) -> None:
+    # Unhandled exceptions skip after_request; count them as 500s here
+    started = g.pop("_metrics_started", None)
+    if started is not None and exc is not None:
+        registry.observe(request.endpoint or "unmatched", time.perf_counter() - started, 500)
+
+
+def init_app(app) -> None:
+    """Apply the metrics settings from the app config and time every request."""
+    registry.directory = Path(app.config["METRICS_DIR"]) if app.config["METRICS_DIR"] else None
+    registry.flush_interval = app.config["METRICS_FLUSH_SECONDS"]
+    app.before_request(_start_timer)
+    app.after_request(_record_request)
+    app.teardown_request(_record_failure)
@@ -0,0 +1,144 @@
+"""
+Markdown to plain text.
+
+The plain text is what a reader sees: markup, link targets, fences and
+table rules are dropped, and blocks are separated by newlines. It is
+computed when an article or project description is written and stored
+next to the markdown, so search, excerpts and word counts never have to
+parse markdown at query time.
+"""
+
+from __future__ import annotations
+
+import html
+import re
+
+# Line prefixes that are markup: headings, blockquotes, list markers, task boxes
+_HEADING_RE = re.compile(r"\s{0,3}#{1,6}(?:\s+|$)")
+_QUOTE_RE = re.compile(r"\s{0,3}(?:>\s?)+")
+_LIST_RE = re.compile(r"\s*(?:[-*+]|\d{1,9}[.)])\s+(?:\[[ xX]\]\s+)?")
+_FENCE_RE = re.compile(r"\s{0,3}(`{3,}|~{3,})")
+# Lines dropped entirely: horizontal rules, table rules, setext underlines, reference definitions
+_DROPPED_LINE_RE = re.compile(
+    r"\s{0,3}(?:(?:[-*_]\s*){3,}|=+|\|?\s*:?-+:?\s*(?:\|\s*:?-+:?\s*)+\|?|\[[^\]]+\]:\s+\S.*)\s*$"
+)
+_CLOSING_HASHES_RE = re.compile(r"\s+#+\s*$")
+
+_INLINE_RE = re.compile(
+    r"""
+      (?P<image>!\[(?P<alt>[^\]]*)\]\([^)]*\))
+    | (?P<link>\[(?P<label>[^\]]+)\](?:\([^)]*\)|\[[^\]]*\]))
+    | (?P<footnote>\[\^[^\]]+\])
+    | (?P<code>(?P<ticks>`+)(?P<code_text>.+?)(?P=ticks))
+    | <(?P<autolink>(?:https?|mailto):[^>\s]+)>
+    | (?P<tag></?[A-Za-z][^>]*>)
+    | \\(?P<escaped>[\\`*_{}\[\]()#+\-.!|>~])
+    | (?P<entity>&(?:[A-Za-z]+|\#\d+|\#x[0-9A-Fa-f]+);)
+    | (?P<markup>\*{1,3}|~~|(?<!\w)_{1,3}|_{1,3}(?!\w))
+    | (?P<pipe>\s*\|\s*)
+    """,
+    re.VERBOSE,
+)
+
+
+class _Builder:
+    """Accumulates text pieces and the separators between them."""
+
+    def __init__(self):
+        self.parts: list[str] = []
+
+    def add(self, text: str) -> None:
+        if text:
+            self.parts.append(text)
+
+    def separator(self, text: str) -> None:
+        """
+        A space or newline joining lines and blocks.
+
+        Runs collapse to one character, a newline winning over a space.
+        """
+        if not self.parts:
+            return
+        last = self.parts[-1]
+        if last.endswith("\n") or (last.endswith(" ") and text == " "):
+            return
+        if last == " ":
+            self.parts[-1] = text
+            return
+        self.parts.append(text)
+
+
+def _inline(builder: _Builder, line: str) -> None:
+    pos = 0
+    for match in _INLINE_RE.finditer(line):
+        builder.add(line[pos:match.start()])
+        pos = match.end()
+        kind = match.lastgroup
+        if match.group("image") is not None:
+            _inline(builder, match.group("alt"))
+        elif match.group("link") is not None:
+            _inline(builder, match.group("label"))
+        elif match.group("code") is not None:
+            builder.add(match.group("code_text"))
+        elif match.group("autolink") is not None:
+            builder.add(match.group("autolink"))
+        elif match.group("escaped") is not None:
+            builder.add(match.group("escaped"))
+        elif match.group("entity") is not None:
+            builder.add(html.unescape(match.group("entity")))
+        elif kind == "pipe":
+            builder.separator(" ")
+    builder.add(line[pos:])
+
+
+def markdown_to_text(markdown_text: str | None) -> str:
+    """Convert markdown to plain text."""
+    builder = _Builder()
+    fence = None
+    for line in (markdown_text or "").splitlines(keepends=True):
+        content = line.rstrip("\r\n")
+
+        fence_match = _FENCE_RE.match(content)
+        if fence is not None:
+            if fence_match and fence_match.group(1)[0] == fence[0] and len(fence_match.group(1)) >= len(fence):
+                fence = None
+                builder.separator("\n")
+            else:
+                builder.add(content)
+                builder.separator("\n")
+            continue
+        if fence_match:
+            fence = fence_match.group(1)
+            builder.separator("\n")
+            continue
+
+        if not content.strip():
+            builder.separator("\n")
+            continue
+        if _DROPPED_LINE_RE.match(content):
+            builder.separator("\n")
+            continue
+
+        offset = 0
+        block_start = content.lstrip().startswith("|")  # table row
+        for prefix_re in (_QUOTE_RE, _HEADING_RE, _LIST_RE):
+            prefix = prefix_re.match(content, offset)
+            if prefix:
+                offset = prefix.end()
+                block_start = block_start or prefix_re is _LIST_RE
+        heading = _HEADING_RE.match(content)
+        end = len(content)
+        if heading:
+            closing = _CLOSING_HASHES_RE.search(content, offset)
+            if closing:
+                end = closing.start()
+        body = content[offset:end].strip()
+        if not body:
+            continue
+
+        builder.separator("\n" if block_start or heading else " ")
+        _inline(builder, body)
+        if heading:
+            builder.separator("\n")
+
+    return "".join(builder.parts).rstrip()
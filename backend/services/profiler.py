@@ -0,0 +1,187 @@
+"""
+Sampling profiler for slow requests.
+
+Opted-in requests (by endpoint or a random percentage) register their
+thread with a single sampler thread that reads sys._current_frames()
+every few milliseconds. When such a request turns out slower than
+PROFILE_THRESHOLD_MS its samples are saved as a collapsed-stack profile
+(one "frame;frame;frame count" line per stack, the input format of
+flamegraph.pl and speedscope) under PROFILE_DIR, keeping the newest
+PROFILE_KEEP files so every worker process shares one list.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import random
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any
+
+from flask import g, request
+
+_BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Frame labels by code object, so each sample only walks and joins
+_labels: dict = {}
+
+
+def _frame_label(code) -> str:
+    label = _labels.get(code)
+    if label is None:
+        path = code.co_filename
+        if path.startswith(_BACKEND_DIR):
+            path = os.path.relpath(path, _BACKEND_DIR)
+        else:
+            path = "/".join(Path(path).parts[-2:])
+        # Semicolons separate frames in the collapsed format
+        label = _labels[code] = f"{code.co_name} ({path}:{code.co_firstlineno})".replace(";", ":")
+    return label
+
+
+def _collapse(frame) -> str:
+    labels = []
+    while frame is not None:
+        labels.append(_frame_label(frame.f_code))
+        frame = frame.f_back
+    return ";".join(reversed(labels))
+
+
+class Sampler:
+    """One background thread sampling the stacks of registered threads."""
+
+    def __init__(self, interval: float = 0.005):
+        self.interval = interval
+        self._targets: dict[int, Counter] = {}
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread_pid: int | None = None
+
+    def start(self, thread_id: int) -> Counter:
+        """Begin sampling a thread; returns the counter its stacks accumulate in."""
+        samples: Counter = Counter()
+        with self._lock:
+            if self._thread_pid != os.getpid():
+                # Started lazily so forked workers get their own sampler
+                self._thread_pid = os.getpid()
+                threading.Thread(target=self._run, name="profiler-sampler", daemon=True).start()
+            self._targets[thread_id] = samples
+        self._wake.set()
+        return samples
+
+    def stop(self, thread_id: int) -> None:
+        with self._lock:
+            self._targets.pop(thread_id, None)
+            if not self._targets:
+                self._wake.clear()
+
+    def _run(self) -> None:
+        while True:
+            self._wake.wait()
+            time.sleep(self.interval)
+            with self._lock:
+                targets = list(self._targets.items())
+            frames = sys._current_frames()
+            for thread_id, samples in targets:
+                frame = frames.get(thread_id)
+                if frame is not None:
+                    samples[_collapse(frame)] += 1
+
+
+sampler = Sampler()
+
+# Settings, replaced from the app config in init_app()
+PROFILE_DIR: Path | None = None
+PROFILE_ROUTES: frozenset[str] = frozenset()
+PROFILE_SAMPLE_RATE = 0.0
+PROFILE_THRESHOLD_MS = 500.0
+PROFILE_KEEP = 20
+
+
+def _should_profile() -> bool:
+    if PROFILE_DIR is None:
+        return False
+    if request.endpoint in PROFILE_ROUTES:
+        return True
+    return PROFILE_SAMPLE_RATE > 0 and random.random() < PROFILE_SAMPLE_RATE
+
+
+def save_profile(meta: dict[str, Any], samples: Counter) -> str:
+    """Write a profile and prune the oldest beyond PROFILE_KEEP. Returns its id."""
+    PROFILE_DIR.mkdir(parents=True, exist_ok=True)
+    profile_id = f"{time.time_ns()}-{os.getpid()}"
+    meta = {**meta, "id": profile_id, "samples": sum(samples.values())}
+    folded = "".join(f"{stack} {count}\n" for stack, count in samples.most_common())
+    (PROFILE_DIR / f"{profile_id}.folded").write_text(folded, encoding="utf-8")
+    (PROFILE_DIR / f"{profile_id}.json").write_text(json.dumps(meta), encoding="utf-8")
+
+    for old in sorted(PROFILE_DIR.glob("*.json"), reverse=True)[PROFILE_KEEP:]:
+        old.unlink(missing_ok=True)
+        old.with_suffix(".folded").unlink(missing_ok=True)
+    return profile_id
+
+
+def list_profiles() -> list[dict[str, Any]]:
+    """Saved profiles, newest first."""
+    if PROFILE_DIR is None or not PROFILE_DIR.is_dir():
+        return []
+    profiles = []
+    for path in sorted(PROFILE_DIR.glob("*.json"), reverse=True)[:PROFILE_KEEP]:
+        try:
+            profiles.append(json.loads(path.read_text(encoding="utf-8")))
+        except (OSError, ValueError):
+            continue
+    return profiles
+
+
+def get_profile_path(profile_id: str) -> Path | None:
+    """Path of a profile's collapsed stacks, or None if it doesn't exist."""
+    if PROFILE_DIR is None or not profile_id.replace("-", "").isdigit():
+        return None
+    path = PROFILE_DIR / f"{profile_id}.folded"
+    return path.resolve() if path.is_file() else None
+
+
+def _start_profile() -> None:
+    if _should_profile():
+        g._profile = (threading.get_ident(), time.perf_counter(), sampler.start(threading.get_ident()))
+
+
+def _finish_profile(exc: BaseException | None = None) -> None:
+    profile = g.pop("_profile", None)
+    if profile is None:
+        return
+    thread_id, started, samples = profile
+    sampler.stop(thread_id)
+    duration_ms = (time.perf_counter() - started) * 1000
+    if duration_ms < PROFILE_THRESHOLD_MS or not samples:
+        return
+    save_profile(
+        {
+            "endpoint": request.endpoint or "unmatched",
+            "method": request.method,
+            "path": request.full_path.rstrip("?"),
+            "duration_ms": round(duration_ms, 1),
+            "error": repr(exc) if exc else None,
+            "captured_at": datetime.now(tz=timezone.utc).isoformat(),
+        },
+        samples,
+    )
+
+
+def init_app(app) -> None:
+    """Apply the profiler settings from the app config and hook opted-in requests."""
+    global PROFILE_DIR, PROFILE_ROUTES, PROFILE_SAMPLE_RATE, PROFILE_THRESHOLD_MS, PROFILE_KEEP
+    PROFILE_DIR = Path(app.config["PROFILE_DIR"]) if app.config["PROFILE_DIR"] else None
+    PROFILE_ROUTES = frozenset(app.config["PROFILE_ROUTES"])
+    PROFILE_SAMPLE_RATE = app.config["PROFILE_SAMPLE_RATE"]
+    PROFILE_THRESHOLD_MS = app.config["PROFILE_THRESHOLD_MS"]
+    PROFILE_KEEP = app.config["PROFILE_KEEP"]
+    sampler.interval = app.config["PROFILE_INTERVAL_MS"] / 1000
+    app.before_request(_start_profile)
+    app.teardown_request(_finish_profile)
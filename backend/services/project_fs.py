@@ -1,8 +1,9 @@
 from __future__ import annotations
 
+import os
 import re
 from pathlib import Path
-from typing import Any
+from typing import Any, Iterator
 
 BASE_PROJECTS_DIR = Path("data/projects")
 RESERVED_DIRS = {"media", ".mythdb", "_cache", "__pycache__"}  # still useful for content scans
@@ -98,6 +99,29 @@ def build_tree(root: Path) -> dict[str, Any]:
     return walk_dir(root, "")
 
 
+def scan_markdown_files(root: Path) -> Iterator[tuple[str, str]]:
+    """
+    Yield (rel_path, absolute_path) for every markdown file under root.
+
+    Same rules as build_tree (hidden entries and reserved folders are
+    skipped) but uses os.scandir, so each directory costs one syscall
+    batch instead of a stat per entry, and nothing is held in memory.
+    """
+    stack = [(str(root), "")]
+    while stack:
+        dir_path, rel = stack.pop()
+        with os.scandir(dir_path) as entries:
+            for entry in entries:
+                if entry.name.startswith("."):
+                    continue
+                child_rel = f"{rel}/{entry.name}".strip("/")
+                if entry.is_dir(follow_symlinks=False):
+                    if entry.name not in RESERVED_DIRS:
+                        stack.append((entry.path, child_rel))
+                elif entry.is_file() and entry.name.lower().endswith(".md"):
+                    yield child_rel, entry.path
+
+
 def create_folder(project: dict[str, Any], parent_rel: str, folder_name: str) -> None:
     root = get_content_root(project)
     parent = _resolve_under_root(root, parent_rel)
@@ -1,14 +1,78 @@
 from __future__ import annotations
 
 import re
+import threading
+import time
+from collections import OrderedDict
 from datetime import datetime, timezone
 from typing import Any
-from pathlib import Path
+
+from flask import g, has_app_context
 
 from db import db_conn
+from services.plain_text import markdown_to_text
 from services.time_utils import format_timestamp_with_relative
 
 
+class ProjectCache:
+    """
+    Small TTL + LRU cache of project rows keyed by slug.
+
+    Writes in this process invalidate entries directly; the TTL bounds how
+    long another worker process can serve a row that changed elsewhere.
+    """
+
+    def __init__(self, ttl: float = 30.0, max_size: int = 256):
+        self.ttl = ttl
+        self.max_size = max_size
+        self._entries: OrderedDict[str, tuple[float, dict[str, Any]]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, slug: str) -> dict[str, Any] | None:
+        with self._lock:
+            entry = self._entries.get(slug)
+            if entry is None:
+                return None
+            if entry[0] < time.monotonic():
+                del self._entries[slug]
+                return None
+            self._entries.move_to_end(slug)
+            return entry[1]
+
+    def put(self, slug: str, row: dict[str, Any]) -> None:
+        with self._lock:
+            self._entries[slug] = (time.monotonic() + self.ttl, row)
+            self._entries.move_to_end(slug)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, project_id: int | None = None) -> None:
+        with self._lock:
+            if project_id is None:
+                self._entries.clear()
+                return
+            for slug in [s for s, (_, row) in self._entries.items() if row["id"] == project_id]:
+                del self._entries[slug]
+
+
+project_cache = ProjectCache()
+
+
+def init_app(app) -> None:
+    """Apply the project cache settings from the app config."""
+    project_cache.ttl = app.config["PROJECT_CACHE_TTL"]
+    project_cache.max_size = app.config["PROJECT_CACHE_SIZE"]
+    project_cache.invalidate()
+
+
+def invalidate_project_cache(project_id: int | None = None) -> None:
+    """Forget cached rows for a project (or all projects) after it changed."""
+    project_cache.invalidate(project_id)
+    if has_app_context():
+        g.pop("_projects_by_slug", None)
+        g.pop("_render_epochs", None)
+
+
 def _normalize_name(name: str) -> str:
     return " ".join(name.strip().split()).lower()
 
@@ -48,7 +112,7 @@ def _unique_slug(base_slug: str) -> str:
 def load_projects() -> list[dict[str, Any]]:
     with db_conn() as conn:
         rows = conn.execute(
-            "SELECT id, slug, name, genre, description, created_at FROM projects ORDER BY id DESC;"
+            "SELECT id, slug, name, genre, description, render_epoch, created_at FROM projects ORDER BY id DESC;"
         ).fetchall()
     return [dict(r) for r in rows]
 
@@ -79,60 +143,78 @@ def add_project(name: str, genre: str) -> dict[str, Any]:
             (slug, name, genre, created_at),
         )
         row = conn.execute(
-            "SELECT id, slug, name, genre, description, created_at FROM projects WHERE slug = ? LIMIT 1;",
+            "SELECT id, slug, name, genre, description, render_epoch, created_at FROM projects WHERE slug = ? LIMIT 1;",
             (slug,),
         ).fetchone()
 
+    invalidate_project_cache()
     return dict(row)
 
 
 def get_project_by_slug(slug: str) -> dict[str, Any] | None:
-    with db_conn() as conn:
-        row = conn.execute(
-            "SELECT id, slug, name, genre, description, created_at FROM projects WHERE slug = ? LIMIT 1;",
-            (slug,),
-        ).fetchone()
-    return dict(row) if row else None
+    """
+    Look up a project, memoized per request in flask.g and across requests
+    in project_cache. Callers get their own copy and may modify it.
+    """
+    memo = g.setdefault("_projects_by_slug", {}) if has_app_context() else {}
+    row = memo.get(slug) or project_cache.get(slug)
+
+    if row is None:
+        with db_conn() as conn:
+            found = conn.execute(
+                "SELECT id, slug, name, genre, description, render_epoch, created_at FROM projects WHERE slug = ? LIMIT 1;",
+                (slug,),
+            ).fetchone()
+        if not found:
+            return None
+        row = dict(found)
+        project_cache.put(slug, row)
+
+    memo[slug] = row
+    return dict(row)
+
+
+def get_render_epoch(project_id: int) -> int:
+    """
+    The project's current render_epoch, read from the database rather than
+    project_cache: another worker bumps it when an article is created,
+    renamed or deleted, and rendered HTML cached under a stale epoch would
+    keep the old link state. Memoized per request in flask.g.
+    """
+    memo = g.setdefault("_render_epochs", {}) if has_app_context() else {}
+    if project_id not in memo:
+        with db_conn() as conn:
+            row = conn.execute("SELECT render_epoch FROM projects WHERE id = ?;", (project_id,)).fetchone()
+        memo[project_id] = row["render_epoch"] if row else 0
+    return memo[project_id]
+
 
 def _get_project_statistics(project_id: int):
-    """Get statistics for a project."""
+    """Get statistics for a project (aggregates are maintained by triggers on write)."""
     from datetime import datetime
     
     with db_conn() as conn:
-        # Count total articles
-        articles_count = conn.execute(
-            "SELECT COUNT(*) as count FROM articles WHERE project_id = ?;",
-            (project_id,),
-        ).fetchone()["count"]
-        
-        # Count total folders
-        folders_count = conn.execute(
-            "SELECT COUNT(*) as count FROM folders WHERE project_id = ?;",
-            (project_id,),
-        ).fetchone()["count"]
-        
-        # Count total words in all articles
-        articles_content = conn.execute(
-            "SELECT body_content FROM articles WHERE project_id = ?;",
-            (project_id,),
-        ).fetchall()
-        
-        total_words = 0
-        for row in articles_content:
-            content = row["body_content"] or ""
-            # Count words by splitting on whitespace
-            words = len(content.split())
-            total_words += words
-        
-        # Get project creation date to calculate words per day
-        project_row = conn.execute(
-            "SELECT slug, created_at FROM projects WHERE id = ? LIMIT 1;",
+        totals = conn.execute(
+            """
+            SELECT p.slug, p.created_at,
+                   COALESCE(s.articles_count, 0) AS articles_count,
+                   COALESCE(s.folders_count, 0) AS folders_count,
+                   COALESCE(s.total_words, 0) AS total_words
+            FROM projects p
+            LEFT JOIN project_stats s ON s.project_id = p.id
+            WHERE p.id = ?
+            LIMIT 1;
+            """,
             (project_id,),
         ).fetchone()
-        
+
+        articles_count = totals["articles_count"] if totals else 0
+        folders_count = totals["folders_count"] if totals else 0
+        total_words = totals["total_words"] if totals else 0
+
         words_per_day = 0
-        if project_row:
-            created_at_str = project_row["created_at"]
+        if totals:
+            created_at_str = totals["created_at"]
             # Parse the ISO format datetime string
             created_at = datetime.fromisoformat(created_at_str.replace('Z', '+00:00'))
             # Use UTC now for comparison
@@ -140,17 +222,33 @@ def _get_project_statistics(project_id: int):
             days_elapsed = max((today - created_at).days, 1)  # At least 1 day
             words_per_day = round(total_words / days_elapsed, 1)
         
-        media_count = 0
-        if project_row:
-            project_slug = project_row["slug"]
-            media_dir = Path("data/projects") / project_slug / "media"
-            if media_dir.exists():
-                # Count image files
-                allowed_exts = {".png", ".jpg", ".jpeg", ".webp", ".gif"}
-                media_count = sum(
-                    1 for f in media_dir.iterdir() 
-                    if f.is_file() and f.suffix.lower() in allowed_exts
-                )
+        media_count = conn.execute("SELECT COUNT(*) FROM media WHERE project_id = ?;", (project_id,)).fetchone()[0]
+
+        # Word breakdowns by article type and by folder
+        words_by_type = conn.execute(
+            """
+            SELECT t.name AS type_name, COUNT(*) AS articles_count, SUM(a.word_count) AS total_words
+            FROM articles a
+            JOIN article_types t ON a.type_id = t.id
+            WHERE a.project_id = ?
+            GROUP BY a.type_id
+            ORDER BY total_words DESC;
+            """,
+            (project_id,),
+        ).fetchall()
+
+        words_by_folder = conn.execute(
+            """
+            SELECT a.folder_id, COALESCE(f.name, 'Root') AS folder_name,
+                   COUNT(*) AS articles_count, SUM(a.word_count) AS total_words
+            FROM articles a
+            LEFT JOIN folders f ON a.folder_id = f.id
+            WHERE a.project_id = ?
+            GROUP BY a.folder_id
+            ORDER BY total_words DESC;
+            """,
+            (project_id,),
+        ).fetchall()
         
         # Get recent articles
         recent_articles = conn.execute(
@@ -182,14 +280,18 @@ def _get_project_statistics(project_id: int):
         "words_per_day": words_per_day,
         "words_per_article": round(total_words / articles_count, 1) if articles_count > 0 else 0,
         "media_count": media_count,
+        "words_by_type": [dict(r) for r in words_by_type],
+        "words_by_folder": [dict(r) for r in words_by_folder],
         "recent_articles": formatted_articles,
     }
 
 
 def update_project_description(project_id: int, description: str) -> None:
     """Update a project's description (markdown content)."""
+    description_text = markdown_to_text(description)
     with db_conn() as conn:
         conn.execute(
-            "UPDATE projects SET description = ? WHERE id = ?;",
-            (description, project_id),
-        )
\ No newline at end of file
+            "UPDATE projects SET description = ?, description_text = ? WHERE id = ?;",
+            (description, description_text, project_id),
+        )
+    invalidate_project_cache(project_id)
\ No newline at end of file
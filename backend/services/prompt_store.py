@@ -30,13 +30,14 @@ def get_prompts_for_article_type(article_type_id: int) -> list[dict]:
 
 
 def get_prompt_values_for_article(article_id: int) -> dict:
-    """Get all prompt values for a given article, keyed by prompt key."""
+    """Get all prompt values for a given article, keyed by prompt key, with linked article titles."""
     with db_conn() as conn:
         rows = conn.execute(
             """
-            SELECT p.key, pv.value, pv.linked_article_id, pv.id
+            SELECT p.key, pv.value, pv.linked_article_id, pv.id, la.title
             FROM prompt_values pv
             JOIN prompts p ON pv.prompt_id = p.id
+            LEFT JOIN articles la ON la.id = pv.linked_article_id
             WHERE pv.article_id = ?
             """,
             (article_id,),
@@ -47,35 +48,12 @@ def get_prompt_values_for_article(article_id: int) -> dict:
                 "value": row[1],
                 "linked_article_id": row[2],
                 "prompt_value_id": row[3],
+                "linked_article_title": row[4],
             }
             for row in rows
         }
 
 
-def get_linked_articles(article_type_key: str, project_id: int) -> list[dict]:
-    """Get all articles of a given type for linking in select prompts."""
-    with db_conn() as conn:
-        rows = conn.execute(
-            """
-            SELECT a.id, a.title, a.slug
-            FROM articles a
-            JOIN article_types at ON a.type_id = at.id
-            WHERE at.key = ? AND a.project_id = ?
-            ORDER BY a.title
-            """,
-            (article_type_key, project_id),
-        ).fetchall()
-        
-        return [
-            {
-                "id": row[0],
-                "title": row[1],
-                "slug": row[2],
-            }
-            for row in rows
-        ]
-
-
 def save_prompt_value(article_id: int, prompt_id: int, value: str | None, linked_article_id: int | None = None) -> None:
     """Save or update a prompt value for an article."""
     now = datetime.now().isoformat()
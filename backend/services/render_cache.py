@@ -0,0 +1,147 @@
+"""LRU cache for rendered markdown HTML, optionally persisted to SQLite."""
+
+from __future__ import annotations
+
+import logging
+import os
+import sys
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
+from db import db_conn
+
+logger = logging.getLogger(__name__)
+
+
+class RenderCache:
+    """
+    Maps (kind, object_id) to (version, html) with a memory budget in bytes.
+
+    The version string encodes everything the HTML depends on, so a lookup
+    with a different version is a miss and the stale entry is replaced.
+
+    Persisted entries are written by a background thread, batched into one
+    transaction per flush, so a page view never takes the write lock.
+    """
+
+    def __init__(self, max_bytes: int = 32 * 1024 * 1024, persist: bool = True):
+        self.max_bytes = max_bytes
+        self.persist = persist
+        self._entries: OrderedDict[tuple[str, int], tuple[str, str, int]] = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+        self._pending: dict[tuple[str, int], tuple[str, str]] = {}
+        self._flush_scheduled = False
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._executor_pid: Optional[int] = None
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, kind: str, object_id: int, version: str) -> Optional[str]:
+        key = (kind, object_id)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == version:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+
+        html = self._load(kind, object_id, version) if self.persist else None
+        with self._lock:
+            if html is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+                self._store(key, version, html)
+        return html
+
+    def put(self, kind: str, object_id: int, version: str, html: str) -> None:
+        schedule = False
+        with self._lock:
+            self._store((kind, object_id), version, html)
+            if self.persist:
+                self._pending[(kind, object_id)] = (version, html)
+                schedule, self._flush_scheduled = not self._flush_scheduled, True
+        if schedule:
+            self._pool().submit(self.flush)
+
+    def flush(self) -> None:
+        """Write the entries put() queued for persistence, in one transaction."""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            self._flush_scheduled = False
+        if not pending:
+            return
+        try:
+            with db_conn() as conn:
+                conn.executemany(
+                    """
+                    INSERT OR REPLACE INTO rendered_html (kind, object_id, version, html)
+                    VALUES (?, ?, ?, ?);
+                    """,
+                    [(kind, object_id, version, html) for (kind, object_id), (version, html) in pending.items()],
+                )
+        except Exception:
+            # Only a cache: the pages are rendered again on the next miss
+            logger.exception("Persisting %d rendered pages failed", len(pending))
+
+    def _pool(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None or self._executor_pid != os.getpid():
+                # Created lazily so forked workers get their own thread
+                self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="render-cache")
+                self._executor_pid = os.getpid()
+            return self._executor
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._pending.clear()
+            self._size = 0
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._size,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+    def _store(self, key: tuple[str, int], version: str, html: str) -> None:
+        """Insert and evict least-recently-used entries. Caller holds the lock."""
+        size = sys.getsizeof(html)
+        if size > self.max_bytes:
+            return
+
+        old = self._entries.pop(key, None)
+        if old is not None:
+            self._size -= old[2]
+
+        self._entries[key] = (version, html, size)
+        self._size += size
+        while self._size > self.max_bytes:
+            _, (_, _, evicted_size) = self._entries.popitem(last=False)
+            self._size -= evicted_size
+
+    @staticmethod
+    def _load(kind: str, object_id: int, version: str) -> Optional[str]:
+        with db_conn() as conn:
+            row = conn.execute(
+                "SELECT html FROM rendered_html WHERE kind = ? AND object_id = ? AND version = ? LIMIT 1;",
+                (kind, object_id, version),
+            ).fetchone()
+        return row["html"] if row else None
+
+
+render_cache = RenderCache()
+
+
+def init_app(app) -> None:
+    """Apply the render cache settings from the app config."""
+    render_cache.max_bytes = app.config["RENDER_CACHE_MAX_BYTES"]
+    render_cache.persist = app.config["RENDER_CACHE_PERSIST"]
+    render_cache.clear()
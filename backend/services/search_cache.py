@@ -0,0 +1,112 @@
+"""
+In-memory cache of search responses.
+
+Entries are keyed by (normalized query, scope, generation). The
+generation is a counter in the database that triggers bump on every
+write to articles or projects (and media uploads bump explicitly), so a
+write anywhere, in any worker process, makes every older entry
+unreachable; they then age out of the LRU. Identical queries that
+arrive while one is being computed wait for it instead of running again.
+"""
+
+from __future__ import annotations
+
+import threading
+from collections import OrderedDict
+from typing import Any, Callable
+
+from db import db_conn
+
+
+def normalize_query(query: str) -> str:
+    return " ".join((query or "").lower().split())
+
+
+def get_search_generation() -> int:
+    with db_conn() as conn:
+        row = conn.execute("SELECT value FROM search_generation WHERE id = 1;").fetchone()
+    return row["value"] if row else 0
+
+
+def bump_search_generation() -> None:
+    """Invalidate cached searches after a write the triggers don't see (e.g. media files)."""
+    with db_conn() as conn:
+        conn.execute("UPDATE search_generation SET value = value + 1 WHERE id = 1;")
+
+
+class _Flight:
+    """A computation in progress that other callers can wait on."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: BaseException | None = None
+
+
+class SearchCache:
+    """
+    LRU of search results with single-flight computation.
+    """
+
+    def __init__(self, max_entries: int = 512):
+        self.max_entries = max_entries
+        self._entries: OrderedDict[tuple, Any] = OrderedDict()
+        self._inflight: dict[tuple, _Flight] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get_or_compute(self, query: str, scope: str, compute: Callable[[], Any]) -> Any:
+        """Return the cached result for the query in this scope, computing it at most once."""
+        key = (normalize_query(query), scope, get_search_generation())
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+            flight = self._inflight.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._inflight[key] = _Flight()
+                self.misses += 1
+            else:
+                self.hits += 1
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.result
+
+        try:
+            flight.result = compute()
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._inflight[key]
+                if flight.error is None:
+                    self._entries[key] = flight.result
+                    self._entries.move_to_end(key)
+                    while len(self._entries) > self.max_entries:
+                        self._entries.popitem(last=False)
+            flight.done.set()
+        return flight.result
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+
+search_cache = SearchCache()
+
+
+def init_app(app) -> None:
+    """Apply the search cache settings from the app config."""
+    search_cache.max_entries = app.config["SEARCH_CACHE_SIZE"]
+    search_cache.clear()
@@ -0,0 +1,250 @@
+"""Full-text search over articles and projects, backed by SQLite FTS5."""
+
+from __future__ import annotations
+
+import re
+from typing import Any
+
+from db import db_conn
+from services.fuzzy_index import fuzzy_lookup
+
+
+# Leading context (in tokens) returned by snippet() around the best match
+SNIPPET_TOKENS = 32
+# Characters of plain text used as the excerpt when there is no full-text match
+FALLBACK_EXCERPT_CHARS = 150
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def build_match_query(query: str) -> str:
+    """
+    Turn free text typed by a user into an FTS5 MATCH expression.
+
+    Every word becomes a quoted prefix term, so 'ash emp' matches
+    'Ashfall Empire' and no user input can inject FTS5 query syntax.
+    Returns an empty string when the query has no searchable words.
+    """
+    tokens = _TOKEN_RE.findall(query or "")
+    return " ".join(f'"{token}"*' for token in tokens)
+
+
+def search_projects(query: str, limit: int = 10) -> list[dict[str, Any]]:
+    """Return projects matching the query, best BM25 match first, with a plain-text excerpt."""
+    match = build_match_query(query)
+    if not match:
+        return []
+
+    with db_conn() as conn:
+        rows = conn.execute(
+            """
+            SELECT p.id, p.name, p.slug, p.genre,
+                   snippet(projects_fts, 2, '', '', '...', ?) AS excerpt
+            FROM projects_fts
+            JOIN projects p ON p.id = projects_fts.rowid
+            WHERE projects_fts MATCH ?
+            ORDER BY bm25(projects_fts, 10.0, 2.0, 1.0)
+            LIMIT ?;
+            """,
+            (SNIPPET_TOKENS, match, limit),
+        ).fetchall()
+    return [dict(r) for r in rows]
+
+
+def search_articles(query: str, limit: int = 20) -> list[dict[str, Any]]:
+    """
+    Return articles matching the query, best BM25 match first.
+
+    Excerpts come from the stored plain text (body_text), so they need no
+    markdown cleanup and cost the same regardless of article length.
+
+    Articles whose type name matches the query (e.g. 'npc') fill any
+    remaining slots after the full-text hits, then titles that nearly
+    match (misspellings, see services/fuzzy_index.py).
+    """
+    match = build_match_query(query)
+
+    with db_conn() as conn:
+        rows = []
+        if match:
+            rows = conn.execute(
+                """
+                SELECT a.id, a.title, a.slug,
+                       snippet(articles_fts, 1, '', '', '...', ?) AS excerpt,
+                       p.name AS project_name,
+                       p.slug AS project_slug,
+                       at.name AS type_name
+                FROM articles_fts
+                JOIN articles a ON a.id = articles_fts.rowid
+                JOIN projects p ON a.project_id = p.id
+                LEFT JOIN article_types at ON a.type_id = at.id
+                WHERE articles_fts MATCH ?
+                ORDER BY bm25(articles_fts, 10.0, 1.0)
+                LIMIT ?;
+                """,
+                (SNIPPET_TOKENS, match, limit),
+            ).fetchall()
+
+        remaining = limit - len(rows)
+        # article_types is a short list: matching its names first is cheap, and the
+        # articles are then found through their type_id index, or not looked for at all
+        type_ids = []
+        if remaining > 0:
+            type_ids = [
+                r["id"] for r in conn.execute("SELECT id FROM article_types WHERE name LIKE ?;", (f"%{query}%",))
+            ]
+        if type_ids:
+            seen_ids = [r["id"] for r in rows]
+            placeholders = ",".join("?" for _ in seen_ids)
+            exclude = f"AND a.id NOT IN ({placeholders})" if seen_ids else ""
+            type_placeholders = ",".join("?" for _ in type_ids)
+            rows += conn.execute(
+                f"""
+                SELECT a.id, a.title, a.slug,
+                       substr(a.body_text, 1, ?) || IIF(length(a.body_text) > ?, '...', '') AS excerpt,
+                       p.name AS project_name,
+                       p.slug AS project_slug,
+                       at.name AS type_name
+                FROM articles a
+                JOIN article_types at ON a.type_id = at.id
+                JOIN projects p ON a.project_id = p.id
+                WHERE a.type_id IN ({type_placeholders}) {exclude}
+                ORDER BY a.title
+                LIMIT ?;
+                """,
+                (FALLBACK_EXCERPT_CHARS, FALLBACK_EXCERPT_CHARS, *type_ids, *seen_ids, remaining),
+            ).fetchall()
+
+        remaining = limit - len(rows)
+        if remaining > 0:
+            near = fuzzy_lookup("article", query, limit=remaining, exclude_ids=[r["id"] for r in rows])
+            rows += _articles_by_id(conn, [m["object_id"] for m in near])
+
+    return [dict(r) for r in rows]
+
+
+def _articles_by_id(conn, article_ids: list[int]) -> list[Any]:
+    """Search result rows for the given articles, in the given order."""
+    if not article_ids:
+        return []
+    placeholders = ",".join("?" for _ in article_ids)
+    by_id = {
+        r["id"]: r
+        for r in conn.execute(
+            f"""
+            SELECT a.id, a.title, a.slug,
+                   substr(a.body_text, 1, ?) || IIF(length(a.body_text) > ?, '...', '') AS excerpt,
+                   p.name AS project_name,
+                   p.slug AS project_slug,
+                   at.name AS type_name
+            FROM articles a
+            JOIN projects p ON a.project_id = p.id
+            LEFT JOIN article_types at ON a.type_id = at.id
+            WHERE a.id IN ({placeholders});
+            """,
+            (FALLBACK_EXCERPT_CHARS, FALLBACK_EXCERPT_CHARS, *article_ids),
+        )
+    }
+    return [by_id[i] for i in article_ids if i in by_id]
+
+
+def _like_prefix(query: str) -> str:
+    """A LIKE pattern for names starting with query. A fixed prefix lets SQLite seek a NOCASE index."""
+    return re.sub(r"([\\%_])", r"\\\1", query) + "%"
+
+
+def search_folders(query: str, limit: int = 5) -> list[dict[str, Any]]:
+    """Folders whose name starts with the query, then near misses from the trigram index."""
+    with db_conn() as conn:
+        rows = [
+            dict(r)
+            for r in conn.execute(
+                """
+                SELECT f.id, f.name, p.name AS project_name, p.slug AS project_slug
+                FROM folders f
+                JOIN projects p ON f.project_id = p.id
+                WHERE f.name LIKE ? ESCAPE '\\'
+                ORDER BY f.name COLLATE NOCASE
+                LIMIT ?;
+                """,
+                (_like_prefix(query), limit),
+            )
+        ]
+        remaining = limit - len(rows)
+        if remaining > 0:
+            near = fuzzy_lookup("folder", query, limit=remaining, exclude_ids=[r["id"] for r in rows])
+            projects = _project_names(conn, {m["project_id"] for m in near})
+            rows += [
+                {"id": m["object_id"], "name": m["term"], **projects[m["project_id"]]}
+                for m in near
+                if m["project_id"] in projects
+            ]
+    return rows
+
+
+def search_media(query: str, limit: int = 10) -> list[dict[str, Any]]:
+    """Media files whose name starts with the query, then near misses from the trigram index."""
+    with db_conn() as conn:
+        rows = [
+            dict(r)
+            for r in conn.execute(
+                """
+                SELECT m.filename, m.hash, p.name AS project_name, p.slug AS project_slug
+                FROM media m
+                JOIN projects p ON m.project_id = p.id
+                WHERE m.filename LIKE ? ESCAPE '\\'
+                ORDER BY m.filename COLLATE NOCASE
+                LIMIT ?;
+                """,
+                (_like_prefix(query), limit),
+            )
+        ]
+        remaining = limit - len(rows)
+        if remaining > 0:
+            seen = {(r["project_slug"], r["filename"]) for r in rows}
+            near = fuzzy_lookup("media", query, limit=limit)
+            projects = _project_names(conn, {m["project_id"] for m in near})
+            hashes = _media_hashes(conn, [(m["project_id"], m["term"]) for m in near])
+            for m in near:
+                project = projects.get(m["project_id"])
+                digest = hashes.get((m["project_id"], m["term"]))
+                if project and digest and (project["project_slug"], m["term"]) not in seen and len(rows) < limit:
+                    rows.append({"filename": m["term"], "hash": digest, **project})
+    return rows
+
+
+def _media_hashes(conn, names: list[tuple[int, str]]) -> dict[tuple[int, str], str]:
+    if not names:
+        return {}
+    placeholders = ",".join("(?, ?)" for _ in names)
+    return {
+        (r["project_id"], r["filename"]): r["hash"]
+        for r in conn.execute(
+            f"SELECT project_id, filename, hash FROM media WHERE (project_id, filename) IN (VALUES {placeholders});",
+            [value for name in names for value in name],
+        )
+    }
+
+
+def _project_names(conn, project_ids: set[int]) -> dict[int, dict[str, str]]:
+    if not project_ids:
+        return {}
+    placeholders = ",".join("?" for _ in project_ids)
+    return {
+        r["id"]: {"project_name": r["name"], "project_slug": r["slug"]}
+        for r in conn.execute(f"SELECT id, name, slug FROM projects WHERE id IN ({placeholders});", list(project_ids))
+    }
+
+
+def rebuild_search_index() -> None:
+    """
+    Rebuild both FTS indexes from their content tables.
+
+    Only needed for databases that were modified without the sync
+    triggers in place (e.g. restored from an old backup).
+    """
+    with db_conn() as conn:
+        conn.execute("INSERT INTO articles_fts (articles_fts) VALUES ('rebuild');")
+        conn.execute("INSERT INTO projects_fts (projects_fts) VALUES ('rebuild');")
+        conn.execute("INSERT INTO articles_fts (articles_fts) VALUES ('optimize');")
+        conn.execute("INSERT INTO projects_fts (projects_fts) VALUES ('optimize');")
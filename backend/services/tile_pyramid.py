@@ -0,0 +1,225 @@
+"""
+Deep-zoom tile pyramids for very large media images (world maps).
+
+A pyramid cuts an image into TILE_SIZE square tiles at every zoom
+level, Google/Leaflet style: level max_zoom is full resolution, each
+level below halves it, and level 0 fits in a single tile. Tiles live
+under the project's cache folder, keyed by content hash:
+
+  data/projects/<slug>/_cache/tiles/<sha256>/<z>/<y>/<x>.jpg
+  data/projects/<slug>/_cache/tiles/<sha256>/meta.json
+
+so a tile URL never changes meaning and can be cached forever.
+Pyramids are built one at a time by a background worker into a temp
+folder that is renamed into place when complete (meta.json last).
+
+With pyvips installed the image is streamed through libvips' dzsave, so
+memory stays bounded whatever the image size. The Pillow fallback
+decodes one level at a time and refuses images above
+TILE_PILLOW_MAX_PIXELS rather than exhaust memory.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import math
+import os
+import shutil
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Optional
+
+from services.blob_store import blob_path
+from services.project_fs import BASE_PROJECTS_DIR
+
+try:
+    import pyvips
+except (ImportError, OSError):  # OSError: the binding is installed but libvips isn't
+    pyvips = None
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:
+    Image = None
+
+logger = logging.getLogger(__name__)
+
+TILE_SIZE = 256
+TILE_QUALITY = 85
+TILE_MIMETYPE = "image/jpeg"
+# A build folder untouched this long belongs to a worker that died
+STALE_BUILD_SECONDS = 3600
+
+# Settings, replaced from the app config in init_app()
+TILE_MIN_SIDE = 4096
+TILE_PILLOW_MAX_PIXELS = 100_000_000
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_pid: Optional[int] = None
+_inflight: dict[Path, Future] = {}
+_lock = threading.Lock()
+
+
+def tiles_available() -> bool:
+    return pyvips is not None or Image is not None
+
+
+def max_zoom_for(width: int, height: int) -> int:
+    return max(0, math.ceil(math.log2(max(width, height) / TILE_SIZE)))
+
+
+def tiles_dir(project: dict[str, Any], digest: str) -> Path:
+    return BASE_PROJECTS_DIR / project["slug"] / "_cache" / "tiles" / digest
+
+
+def tile_path(project: dict[str, Any], digest: str, z: int, x: int, y: int) -> Path:
+    return tiles_dir(project, digest) / str(z) / str(y) / f"{x}.jpg"
+
+
+def wants_pyramid(item: dict[str, Any]) -> bool:
+    """Whether an upload is big enough to get a pyramid without being asked."""
+    return bool(TILE_MIN_SIDE) and max(item["width"] or 0, item["height"] or 0) > TILE_MIN_SIDE
+
+
+def _build_with_vips(source: Path, out_dir: Path) -> tuple[int, int]:
+    image = pyvips.Image.new_from_file(str(source), access="sequential")
+    if image.get_typeof("orientation") and image.get("orientation") != 1:
+        # Rotating needs random access; only rare, camera-made images pay for it
+        image = pyvips.Image.new_from_file(str(source)).autorot()
+    if image.hasalpha():
+        image = image.flatten(background=[255, 255, 255])
+    # dzsave writes <out_dir>/<z>/<y>/<x>.jpg and streams the image through once.
+    # skip_blanks=-1: the google layout otherwise drops tiles of uniform colour,
+    # leaving holes inside the image that the Pillow fallback doesn't have
+    image.dzsave(
+        str(out_dir),
+        layout="google",
+        tile_size=TILE_SIZE,
+        overlap=0,
+        suffix=f".jpg[Q={TILE_QUALITY}]",
+        background=[255, 255, 255],
+        skip_blanks=-1,
+    )
+    return image.width, image.height
+
+
+def _cut_level(level, level_dir: Path) -> None:
+    columns = math.ceil(level.width / TILE_SIZE)
+    rows = math.ceil(level.height / TILE_SIZE)
+    for y in range(rows):
+        row_dir = level_dir / str(y)
+        row_dir.mkdir(parents=True, exist_ok=True)
+        for x in range(columns):
+            box = (x * TILE_SIZE, y * TILE_SIZE, min((x + 1) * TILE_SIZE, level.width), min((y + 1) * TILE_SIZE, level.height))
+            # Edge tiles are padded to full size, as dzsave does
+            tile = Image.new("RGB", (TILE_SIZE, TILE_SIZE), (255, 255, 255))
+            tile.paste(level.crop(box), (0, 0))
+            tile.save(row_dir / f"{x}.jpg", "JPEG", quality=TILE_QUALITY)
+
+
+def _build_with_pillow(source: Path, out_dir: Path) -> tuple[int, int]:
+    with Image.open(source) as im:
+        width, height = im.size
+        if width * height > TILE_PILLOW_MAX_PIXELS:
+            raise ValueError(f"{width}x{height} is too large to tile without pyvips.")
+        level = ImageOps.exif_transpose(im)
+        if level.mode in ("RGBA", "LA", "P"):
+            level = level.convert("RGBA")
+            background = Image.new("RGBA", level.size, (255, 255, 255, 255))
+            level = Image.alpha_composite(background, level)
+        level = level.convert("RGB")
+    width, height = level.size
+    for z in range(max_zoom_for(width, height), -1, -1):
+        _cut_level(level, out_dir / str(z))
+        if z:
+            level = level.reduce(2)  # the previous level is released as we go down
+    return width, height
+
+
+def _build(source: Path, dest: Path) -> dict[str, Any]:
+    tmp = dest.with_name(f".{dest.name}.{os.getpid()}.{threading.get_ident()}")
+    shutil.rmtree(tmp, ignore_errors=True)
+    try:
+        started = time.perf_counter()
+        if pyvips is not None:
+            width, height = _build_with_vips(source, tmp)
+        else:
+            width, height = _build_with_pillow(source, tmp)
+        meta = {
+            "width": width,
+            "height": height,
+            "tile_size": TILE_SIZE,
+            "max_zoom": max_zoom_for(width, height),
+            "format": "jpg",
+            "built_with": "pyvips" if pyvips is not None else "pillow",
+            "build_seconds": round(time.perf_counter() - started, 2),
+        }
+        (tmp / "meta.json").write_text(json.dumps(meta), encoding="utf-8")
+        try:
+            os.replace(tmp, dest)
+        except OSError:
+            # Another worker process finished the same pyramid first
+            if not (dest / "meta.json").exists():
+                raise
+        return meta
+    except Exception:
+        logger.exception("Building tile pyramid %s failed", dest)
+        raise
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+def _pool() -> ThreadPoolExecutor:
+    global _executor, _executor_pid
+    if _executor is None or _executor_pid != os.getpid():
+        # One build at a time bounds memory; created lazily so forked workers get their own
+        _executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="tile-pyramid")
+        _executor_pid = os.getpid()
+    return _executor
+
+
+def get_pyramid(project: dict[str, Any], digest: str) -> Optional[dict[str, Any]]:
+    """The pyramid's metadata once it is complete, else None."""
+    try:
+        return json.loads((tiles_dir(project, digest) / "meta.json").read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+
+
+def pyramid_status(project: dict[str, Any], digest: str) -> str:
+    """Returns "ready", "building" (here or in another worker process) or "missing"."""
+    dest = tiles_dir(project, digest)
+    if (dest / "meta.json").exists():
+        return "ready"
+    if dest in _inflight:
+        return "building"
+    cutoff = time.time() - STALE_BUILD_SECONDS
+    if any(p.stat().st_mtime > cutoff for p in dest.parent.glob(f".{digest}.*")):
+        return "building"
+    return "missing"
+
+
+def schedule_pyramid(project: dict[str, Any], item: dict[str, Any]) -> str:
+    """Queue a pyramid build for a media row unless it exists or is underway. Returns the status."""
+    if not tiles_available():
+        raise ValueError("Tiling needs pyvips or Pillow installed.")
+    status = pyramid_status(project, item["hash"])
+    if status != "missing":
+        return status
+    dest = tiles_dir(project, item["hash"])
+    with _lock:
+        if dest not in _inflight:
+            dest.parent.mkdir(parents=True, exist_ok=True)
+            future = _inflight[dest] = _pool().submit(_build, blob_path(item["hash"]), dest)
+            future.add_done_callback(lambda _f: _inflight.pop(dest, None))
+    return "building"
+
+
+def init_app(app) -> None:
+    """Apply the tile pyramid settings from the app config."""
+    global TILE_MIN_SIDE, TILE_PILLOW_MAX_PIXELS
+    TILE_MIN_SIDE = app.config["MEDIA_TILE_MIN_SIDE"]
+    TILE_PILLOW_MAX_PIXELS = app.config["MEDIA_TILE_PILLOW_MAX_PIXELS"]
@@ -15,3 +15,83 @@ if (quickGuideToggle) {
   
   initQuickGuideToggle();
 }
+
+// Live performance metrics
+
+const performanceSection = document.getElementById('performanceMetrics');
+const METRICS_POLL_MS = 5000;
+let previousMetrics = null;
+
+function formatPercent(ratio, digits = 1) {
+  return `${(ratio * 100).toFixed(digits)}%`;
+}
+
+function formatMegabytes(bytes) {
+  return `${(bytes / 1048576).toFixed(1)} MB`;
+}
+
+function setMetric(name, text) {
+  const el = performanceSection.querySelector(`[data-metric="${name}"]`);
+  if (el) el.textContent = text;
+}
+
+function renderEndpointRows(endpoints) {
+  const tbody = document.getElementById('endpointMetrics');
+  tbody.replaceChildren(
+    ...endpoints.map((e) => {
+      const row = document.createElement('tr');
+      const cells = [
+        e.endpoint,
+        e.count,
+        `${e.rate.toFixed(2)}/s`,
+        `${e.mean_ms.toFixed(1)} ms`,
+        `${e.p50_ms.toFixed(1)} ms`,
+        `${e.p95_ms.toFixed(1)} ms`,
+        formatPercent(e.db_share, 0),
+        e.queries.toFixed(1),
+        e.errors,
+      ];
+      cells.forEach((value) => {
+        const td = document.createElement('td');
+        td.textContent = value;
+        row.appendChild(td);
+      });
+      return row;
+    })
+  );
+}
+
+function renderMetrics(metrics) {
+  const hours = Math.floor(metrics.uptime_seconds / 3600);
+  const minutes = Math.floor((metrics.uptime_seconds % 3600) / 60);
+  setMetric('uptime', `${hours}h ${minutes}m`);
+
+  // Current rate from the change since the last poll; lifetime average on first load
+  let rate = metrics.rate;
+  if (previousMetrics) {
+    const elapsed = metrics.uptime_seconds - previousMetrics.uptime_seconds;
+    if (elapsed > 0) rate = (metrics.requests - previousMetrics.requests) / elapsed;
+  }
+  previousMetrics = metrics;
+
+  setMetric('requests', `${metrics.requests} (${rate.toFixed(2)}/s)`);
+  setMetric('db_share', formatPercent(metrics.db_share));
+  setMetric('connection_reuse', `${formatPercent(metrics.connection_reuse)} (${metrics.connections_opened} opened)`);
+  setMetric('render_cache', `${formatPercent(metrics.render_cache_hit_ratio)} (${formatMegabytes(metrics.render_cache_bytes)})`);
+  setMetric('memory', `${formatMegabytes(metrics.rss_bytes)} in ${metrics.processes} process${metrics.processes === 1 ? '' : 'es'}`);
+  renderEndpointRows(metrics.endpoints);
+}
+
+async function pollMetrics() {
+  try {
+    const response = await fetch('/admin/api/metrics');
+    if (response.ok) renderMetrics(await response.json());
+  } catch (error) {
+    console.error('Failed to load metrics:', error);
+  }
+}
+
+if (performanceSection) {
+  pollMetrics();
+  setInterval(pollMetrics, METRICS_POLL_MS);
+}
@@ -7,6 +7,8 @@ const cancelEditBtn = document.getElementById("cancelEditBtn");
 const readMode = document.getElementById("readMode");
 const editMode = document.getElementById("editMode");
 const fieldInputs = document.querySelectorAll(".field-input");
+// Not field values themselves, but only usable alongside the fields they search
+const fieldSearchInputs = document.querySelectorAll(".field-select-search");
 const editorTextarea = document.getElementById("editorTextarea");
 
 // Image viewer modal
@@ -29,7 +31,7 @@ let originalFieldValues = {}; // Store original field values for cancel
 
 // Enable/disable structured fields based on mode
 function updateFieldsState() {
-  fieldInputs.forEach((input) => {
+  [...fieldInputs, ...fieldSearchInputs].forEach((input) => {
     input.disabled = currentMode === "read";
   });
 }
@@ -197,7 +199,7 @@ function renderMediaList(files) {
     .map(
       (file) => `
     <div class="image-dropdown-item" data-filename="${file.filename}">
-      <img src="${file.url}" alt="${file.filename}" class="image-dropdown-thumb">
+      <img src="${file.thumbnail || file.url}" alt="${file.filename}" class="image-dropdown-thumb">
       <div class="image-dropdown-name">${file.filename}</div>
     </div>
   `,
@@ -363,6 +365,54 @@ fieldInputs.forEach((input) => {
   });
 });
 
+// Select prompts: typing in the search box above a select refills its
+// options from the suggest API instead of listing every candidate up front
+fieldSearchInputs.forEach((searchInput) => {
+  const select = searchInput.parentElement.querySelector(".field-select");
+  let suggestTimeout;
+
+  async function loadSuggestions() {
+    const projectSlug = document.querySelector("[data-project-slug]")?.dataset
+      .projectSlug;
+    const articleId =
+      document.querySelector("[data-article-id]")?.dataset.articleId || "";
+    const params = new URLSearchParams({
+      q: searchInput.value,
+      type: searchInput.dataset.linkedType,
+      exclude_id: articleId,
+      limit: 20,
+    });
+
+    try {
+      const response = await fetch(
+        `/projects/${projectSlug}/api/articles/suggest?${params}`,
+      );
+      if (!response.ok) return;
+      const articles = await response.json();
+
+      // Keep the placeholder and the current choice, replace the rest
+      const current = select.selectedOptions[0];
+      [...select.options].forEach((option) => {
+        if (option.value && option !== current) option.remove();
+      });
+      articles
+        .filter((article) => String(article.id) !== current?.value)
+        .forEach((article) => {
+          select.add(new Option(article.title, article.id));
+        });
+    } catch (error) {
+      console.error("Failed to load suggestions:", error);
+    }
+  }
+
+  searchInput.addEventListener("input", () => {
+    clearTimeout(suggestTimeout);
+    suggestTimeout = setTimeout(loadSuggestions, 150);
+  });
+  searchInput.addEventListener("focus", loadSuggestions, { once: true });
+  select.addEventListener("focus", loadSuggestions, { once: true });
+});
+
 // Initialize field states on page load
 updateFieldsState();
 
@@ -13,6 +13,8 @@ class MarkdownEditor {
     // State
     this.cachedMedia = null;
     this.cachedArticles = null;
+    this.articleTerm = "";
+    this.articleSearchTimeout = null;
 
     this.init();
   }
@@ -280,7 +282,7 @@ class MarkdownEditor {
       .map(
         (file) => `
             <div class="image-dropdown-item" data-filename="${file.filename}">
-              <img src="${file.url}" alt="${file.filename}" class="image-dropdown-thumb">
+              <img src="${file.thumbnail || file.url}" alt="${file.filename}" class="image-dropdown-thumb">
               <div class="image-dropdown-name">${file.filename}</div>
             </div>
         `,
@@ -297,12 +299,18 @@ class MarkdownEditor {
     });
   }
 
-  async loadArticles() {
+  async loadArticles(term = "") {
     if (!this.projectSlug) return;
+    const requested = term;
+    this.articleTerm = term;
     try {
-      // Exclude logic could be passed in options if needed
-      const res = await fetch(`/projects/${this.projectSlug}/api/articles`);
-      if (res.ok) {
+      // Only the best matches for what has been typed; the project may have thousands
+      const params = new URLSearchParams({ q: term, limit: 20 });
+      const res = await fetch(
+        `/projects/${this.projectSlug}/api/articles/suggest?${params}`,
+      );
+      // Responses can arrive out of order; drop any for an older term
+      if (res.ok && requested === this.articleTerm) {
         this.cachedArticles = await res.json();
         this.renderArticleList(this.cachedArticles);
       }
@@ -349,11 +357,12 @@ class MarkdownEditor {
         f.filename.toLowerCase().includes(term),
       );
       this.renderMediaList(filtered);
-    } else if (type === "articles" && this.cachedArticles) {
-      const filtered = this.cachedArticles.filter((a) =>
-        a.title.toLowerCase().includes(term),
+    } else if (type === "articles") {
+      clearTimeout(this.articleSearchTimeout);
+      this.articleSearchTimeout = setTimeout(
+        () => this.loadArticles(term),
+        150,
       );
-      this.renderArticleList(filtered);
     }
   }
 
@@ -52,7 +52,7 @@ function renderMediaSidebar(files) {
       (file) => `
     <div class="media-sidebar-item" title="${file.filename}">
       <div class="media-sidebar-item-image">
-        <img src="${file.url}" alt="${file.filename}" loading="lazy">
+        <img src="${file.thumbnail || file.url}" alt="${file.filename}" loading="lazy">
       </div>
       <div class="media-sidebar-item-name">${file.filename}</div>
     </div>
@@ -184,6 +184,140 @@ if (recentArticlesHeader) {
   });
 }
 
+// Words by Type section collapse/expand
+const wordBreakdownCard = document.getElementById("wordBreakdownCard");
+const wordBreakdownContent = document.getElementById("wordBreakdownContent");
+const wordBreakdownHeader =
+  wordBreakdownCard?.querySelector(".card-header-row");
+const wordBreakdownCollapseBtn =
+  wordBreakdownCard?.querySelector(".btn-collapse");
+
+if (wordBreakdownHeader) {
+  wordBreakdownHeader.addEventListener("click", () => {
+    const isExpanded =
+      wordBreakdownCollapseBtn.getAttribute("aria-expanded") === "true";
+    wordBreakdownCollapseBtn.setAttribute("aria-expanded", !isExpanded);
+    wordBreakdownContent.classList.toggle("hidden");
+  });
+}
+
+// Folder tree: the page renders the top level; deeper levels are fetched on first expand
+function escapeHtml(text) {
+  const div = document.createElement("div");
+  div.textContent = text;
+  return div.innerHTML;
+}
+
+function treeArticleHtml(article) {
+  return `
+    <li class="tree-article" data-article-id="${article.id}">
+      <div class="tree-article-row">
+        <span class="tree-article-name">📝
+          <a href="/projects/${projectSlug}/a/${article.id}">${escapeHtml(article.title)}</a></span>
+        <div class="tree-article-actions">
+          <button type="button" class="article-action-btn" aria-label="Rename article" title="Rename">✏️</button>
+          <form method="post" action="/projects/${projectSlug}/a/${article.id}/delete" style="margin: 0; display: inline">
+            <button type="submit" class="article-action-btn article-action-danger" aria-label="Delete article" title="Delete"
+              onclick="return confirm('Delete article? This cannot be undone.');">🗑️</button>
+          </form>
+        </div>
+      </div>
+    </li>`;
+}
+
+function treeFolderHtml(folder) {
+  return `
+    <li class="tree-folder" data-folder-id="${folder.id}" data-loaded="false">
+      <div class="tree-row">
+        <button type="button" class="tree-toggle" aria-label="Toggle folder" aria-expanded="false">
+          <span class="toggle-icon">▶</span>
+        </button>
+        <span class="tree-name">📁 ${escapeHtml(folder.name)}</span>
+        <div class="tree-folder-menu">
+          <button type="button" class="tree-menu-btn" aria-label="Folder options" data-folder-id="${folder.id}">⋮</button>
+          <div class="tree-dropdown" data-folder-id="${folder.id}">
+            <button class="dropdown-item" data-action="new-folder" data-parent-id="${folder.id}">➕ Folder</button>
+            <button class="dropdown-item" data-action="new-article" data-parent-id="${folder.id}">➕ Article</button>
+            <button class="dropdown-item dropdown-warning" data-action="rename-folder" data-folder-id="${folder.id}">✏️ Rename</button>
+            <form method="post" action="/projects/${projectSlug}/folders/${folder.id}/delete" style="margin: 0; display: inline">
+              <button type="submit" class="dropdown-item dropdown-danger"
+                onclick="return confirm('Delete folder? It must be empty.');">🗑️ Delete</button>
+            </form>
+          </div>
+        </div>
+      </div>
+    </li>`;
+}
+
+async function fetchFolderLevel(folderId) {
+  const response = await fetch(
+    `/projects/${projectSlug}/api/folders?parent_id=${folderId}`,
+  );
+  if (!response.ok) throw new Error(`HTTP ${response.status}`);
+  return response.json();
+}
+
+// Adds a folder's articles and subfolders beneath it, hidden until expanded
+async function loadFolderContents(folderItem) {
+  const level = await fetchFolderLevel(folderItem.dataset.folderId);
+  if (level.articles.length > 0) {
+    folderItem.insertAdjacentHTML(
+      "beforeend",
+      `<ul class="tree-articles tree-collapsible hidden">${level.articles.map(treeArticleHtml).join("")}</ul>`,
+    );
+  }
+  if (level.folders.length > 0) {
+    folderItem.insertAdjacentHTML(
+      "beforeend",
+      `<ul class="tree-children tree-collapsible hidden">${level.folders.map(treeFolderHtml).join("")}</ul>`,
+    );
+  }
+  folderItem.dataset.loaded = "true";
+}
+
+document.addEventListener("click", async (e) => {
+  const btn = e.target.closest(".tree-toggle");
+  if (!btn) return;
+  e.preventDefault();
+  e.stopPropagation();
+
+  const folder = btn.closest(".tree-folder");
+  if (!folder) return;
+  const newExpanded = btn.getAttribute("aria-expanded") !== "true";
+
+  if (newExpanded && folder.dataset.loaded === "false") {
+    folder.dataset.loaded = "loading"; // ignore repeated clicks while fetching
+    try {
+      await loadFolderContents(folder);
+    } catch (error) {
+      folder.dataset.loaded = "false";
+      console.error("Failed to load folder:", error);
+      return;
+    }
+  } else if (folder.dataset.loaded === "loading") {
+    return;
+  }
+
+  btn.setAttribute("aria-expanded", newExpanded);
+  const icon = btn.querySelector(".toggle-icon");
+  if (icon) {
+    icon.textContent = newExpanded ? "▼" : "▶";
+  }
+  folder
+    .querySelectorAll(":scope > .tree-articles, :scope > .tree-children")
+    .forEach((el) => el.classList.toggle("hidden", !newExpanded));
+});
+
+// The Root folder's subfolders are shown expanded under the Root section
+document.querySelectorAll("[data-autoload-parent-id]").forEach(async (list) => {
+  try {
+    const level = await fetchFolderLevel(list.dataset.autoloadParentId);
+    list.innerHTML = level.folders.map(treeFolderHtml).join("");
+  } catch (error) {
+    console.error("Failed to load folder:", error);
+  }
+});
+
 // Rename folder functionality
 document.addEventListener("click", (e) => {
   const btn = e.target.closest('button[data-action="rename-folder"]');